@@ -0,0 +1,120 @@
+"""
+Incremental parsing of an agent's JSON answer while it is generated.
+
+The decomposers answer with one array of objects, either bare
+(``[{...}, ...]``) or under a field of a top-level object
+(``{"stories": [{...}, ...]}``). ``ArrayItemParser`` is fed the text as the
+model streams it and returns each element of that array as soon as its
+closing brace arrives, so it can be stored and shown before the rest of
+the answer exists. Text around the JSON (e.g. a Markdown code fence or a
+sentence of prose) is ignored: the document starts at the first ``{``
+followed by a key or ``[`` followed by an object, so a stray bracket in
+the prose is never taken for it.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+
+class ArrayItemParser:
+    """Yields the objects of one array of a streamed JSON document as they close."""
+
+    def __init__(self, field: Optional[str] = None):
+        # Field of the top-level object holding the array; a top-level array is always used
+        self.field = field
+        self._buffer = ""
+        # Next character of the buffer to scan
+        self._pos = 0
+        # Whether the start of the JSON document has been found
+        self._rooted = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        # Nesting depth of the array's elements once it has been found
+        self._item_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self.closed = False
+        self.items = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume the next piece of the answer.
+
+        Returns:
+            Elements of the array completed by this chunk, in order
+
+        Raises:
+            ValueError: If a completed element isn't valid JSON
+        """
+        self._buffer += chunk
+        completed = []
+        i = self._pos
+        while i < len(self._buffer):
+            c = self._buffer[i]
+            if not self._rooted:
+                if c not in "{[":
+                    i += 1
+                    continue
+                j = i + 1
+                while j < len(self._buffer) and self._buffer[j].isspace():
+                    j += 1
+                if j == len(self._buffer):
+                    # The next chunk tells whether this bracket starts the document
+                    break
+                if self._buffer[j] not in ('"}' if c == "{" else "{]"):
+                    i += 1
+                    continue
+                self._rooted = True
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._item_depth is None:
+                        self._last_key = self._buffer[self._string_start + 1:i]
+                i += 1
+                continue
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                if c == "[" and self._item_depth is None and not self.closed and (
+                    self._depth == 0 or self._depth == 1 and self._last_key == self.field
+                ):
+                    self._item_depth = self._depth + 1
+                elif c == "{" and self._depth == self._item_depth:
+                    self._item_start = i
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if c == "}" and self._item_start is not None and self._depth == self._item_depth:
+                    completed.append(json.loads(self._buffer[self._item_start:i + 1]))
+                    self._item_start = None
+                elif c == "]" and self._item_depth is not None and self._depth == self._item_depth - 1:
+                    self._item_depth = None
+                    self.closed = True
+                if self._depth == 0:
+                    # The document has ended; whatever follows is prose
+                    self.closed = True
+            i += 1
+        self._pos = i
+        self._trim()
+        self.items += len(completed)
+        return completed
+
+    def _trim(self) -> None:
+        """Drop text that no element or open string still needs."""
+        if self._item_start is not None:
+            cut = self._item_start
+        elif self._in_string:
+            cut = self._string_start
+        else:
+            cut = self._pos
+        self._buffer = self._buffer[cut:]
+        self._pos -= cut
+        if self._item_start is not None:
+            self._item_start -= cut
+        self._string_start -= cut
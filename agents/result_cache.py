@@ -0,0 +1,189 @@
+"""
+Content-addressed cache of agent responses.
+
+An agent's final response is stored under a hash of the normalized request
+payload together with the agent's name, instruction, model and output
+schema, so the same epic, story or backlog is only sent to the model once and
+a prompt or model change never serves a stale answer. Entries live in a
+SQLite file shared by the workers of a host; they expire ``ttl_seconds``
+after they were written and the least recently used ones are evicted once
+more than ``max_entries`` are stored. Lookups and stores run in a worker
+thread, so a request waiting on another worker's write to the file never
+blocks the event loop.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from google.adk.agents import BaseAgent
+
+DEFAULT_PATH = "agent_cache.db"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600.0
+DEFAULT_MAX_ENTRIES = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_results (
+    key TEXT PRIMARY KEY,
+    agent TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_agent_results_accessed ON agent_results(accessed_at);
+"""
+
+
+def normalize_payload(text: str, ignore: Iterable[str] = ()) -> str:
+    """
+    Canonical form of a request payload.
+
+    JSON payloads are re-serialized with sorted keys and without the
+    ``ignore``d top-level fields (e.g. the ID of a freshly created epic);
+    anything else has its whitespace collapsed.
+    """
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return " ".join(text.split())
+    if isinstance(value, dict):
+        ignored = set(ignore)
+        value = {key: item for key, item in value.items() if key not in ignored}
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def agent_fingerprint(agent: BaseAgent) -> Dict[str, Any]:
+    """What, besides the payload, decides an agent's answer."""
+    instruction = getattr(agent, "instruction", "")
+    model = getattr(agent, "model", "")
+    output_schema = getattr(agent, "output_schema", None)
+    return {
+        "agent": agent.name,
+        "instruction": instruction if isinstance(instruction, str) else getattr(instruction, "__qualname__", repr(instruction)),
+        "model": model if isinstance(model, str) else getattr(model, "model", repr(model)),
+        "output_schema": output_schema.model_json_schema() if output_schema else None,
+    }
+
+
+def cache_key(agent: BaseAgent, payload: str, ignore: Iterable[str] = ()) -> str:
+    material = json.dumps(
+        {**agent_fingerprint(agent), "payload": normalize_payload(payload, ignore)},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite-backed store of agent responses with TTL and LRU size eviction.
+
+    The connection is opened on first use by each process (never inherited
+    across a ``fork``). With ``ttl_seconds`` or ``max_entries`` at 0 the
+    cache is disabled and no file is opened.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        # Entries counted after this process's last store, so stats() never waits on the file
+        self.entries = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Build the cache from AGENT_CACHE_PATH, AGENT_CACHE_TTL_SECONDS and AGENT_CACHE_MAX_ENTRIES (0 disables it)."""
+        return cls(
+            path=os.getenv("AGENT_CACHE_PATH", DEFAULT_PATH),
+            ttl_seconds=float(os.getenv("AGENT_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+            max_entries=int(os.getenv("AGENT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        if self._conn is None or self._pid != pid:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            if self.path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(_SCHEMA)
+            self._pid = pid
+        return self._conn
+
+    async def get(self, key: str) -> Optional[str]:
+        """The cached response, or None on a miss or expired entry."""
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, agent: str, response: str) -> None:
+        """Store a response, then drop expired entries and the least recently used ones over ``max_entries``."""
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self._put, key, agent, response)
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response FROM agent_results WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE agent_results SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def _put(self, key: str, agent: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO agent_results (key, agent, response, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, agent, response, now, now),
+            )
+            self.stores += 1
+            expired = conn.execute("DELETE FROM agent_results WHERE created_at <= ?", (now - self.ttl_seconds,)).rowcount
+            overflow = conn.execute(
+                "DELETE FROM agent_results WHERE key IN "
+                "(SELECT key FROM agent_results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self.evictions += expired + overflow
+            self.entries = conn.execute("SELECT COUNT(*) FROM agent_results").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "entries": self.entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+# Shared per-process cache used by every AgentRuntime
+result_cache = ResultCache.from_env()
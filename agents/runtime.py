@@ -0,0 +1,268 @@
+"""
+Shared execution layer for the app's ADK agents.
+
+Each agent gets one long-lived ``AgentRuntime``: a single ``Runner`` on its
+own ``InMemorySessionService``, built once per process instead of per request.
+Sessions only live for one run; they are deleted as soon as the agent's final
+response has arrived (or the run failed). At most ``max_sessions`` runs are
+in progress at a time; further runs wait for a slot rather than taking the
+session of a run still in progress, so a worker's footprint stays flat
+however many runs it serves. Sessions a run never got to delete, e.g.
+because its task was abandoned, are evicted once they are older than
+``session_ttl_seconds``.
+
+Final responses are kept in the content-addressed ``result_cache`` (see
+agents/result_cache.py), so a repeated request is answered without a run,
+and identical requests that arrive while a run is in progress share it
+(see agents/single_flight.py).
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agents.result_cache import ResultCache, cache_key, result_cache
+from agents.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+USER_ID = "gurpalsingh"
+DEFAULT_SESSION_TTL_SECONDS = 600.0
+DEFAULT_MAX_SESSIONS = 100
+# Partial events carry the answer's text as the model generates it
+STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+
+class AgentRuntime:
+    """One agent's shared ``Runner`` and its ephemeral sessions."""
+
+    def __init__(
+        self,
+        agent: BaseAgent,
+        app_name: str,
+        session_ttl_seconds: float = DEFAULT_SESSION_TTL_SECONDS,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        cache: ResultCache = result_cache,
+        volatile_fields: Iterable[str] = (),
+    ):
+        self.agent = agent
+        self.app_name = app_name
+        self.session_ttl_seconds = session_ttl_seconds
+        self.max_sessions = max_sessions
+        self.cache = cache
+        # Payload fields left out of the cache key because they don't change the answer
+        self.volatile_fields = tuple(volatile_fields)
+        self.flights = SingleFlight(agent.name)
+        self.session_service = InMemorySessionService()
+        self.runner = Runner(agent=agent, app_name=app_name, session_service=self.session_service)
+        # Session ID -> when it was opened (monotonic), oldest first
+        self._open: "OrderedDict[str, float]" = OrderedDict()
+        # One slot per session a run may hold
+        self._slots = asyncio.Semaphore(max_sessions)
+        self.runs = 0
+        self.runs_waited = 0
+        self.failures = 0
+        self.sessions_deleted = 0
+        self.sessions_evicted = 0
+        self.peak_sessions = 0
+        runtimes[agent.name] = self
+
+    @classmethod
+    def from_env(cls, agent: BaseAgent, app_name: str, volatile_fields: Iterable[str] = ()) -> "AgentRuntime":
+        """Build the runtime from AGENT_SESSION_TTL_SECONDS and AGENT_MAX_SESSIONS."""
+        return cls(
+            agent,
+            app_name,
+            session_ttl_seconds=float(os.getenv("AGENT_SESSION_TTL_SECONDS", DEFAULT_SESSION_TTL_SECONDS)),
+            max_sessions=int(os.getenv("AGENT_MAX_SESSIONS", DEFAULT_MAX_SESSIONS)),
+            volatile_fields=volatile_fields,
+        )
+
+    def _open_session(self) -> str:
+        self._evict()
+        session = self.session_service.create_session(
+            app_name=self.app_name,
+            user_id=USER_ID,
+            state={"initial_key": "initial_value"},
+        )
+        self._open[session.id] = time.monotonic()
+        self.peak_sessions = max(self.peak_sessions, len(self._open))
+        return session.id
+
+    def _delete_session(self, session_id: str) -> None:
+        self._open.pop(session_id, None)
+        self.session_service.delete_session(app_name=self.app_name, user_id=USER_ID, session_id=session_id)
+
+    def _evict(self) -> None:
+        """Drop the sessions older than ``session_ttl_seconds``; sessions of runs still in progress are younger."""
+        expired_before = time.monotonic() - self.session_ttl_seconds
+        while self._open:
+            session_id, opened_at = next(iter(self._open.items()))
+            if opened_at > expired_before:
+                break
+            self._delete_session(session_id)
+            self.sessions_evicted += 1
+            logger.warning(f"Evicted {self.app_name} session {session_id}")
+
+    async def run(self, text: str, bypass_cache: bool = False, refresh_cache: bool = False) -> Optional[str]:
+        """
+        Answer one message from the result cache, or run the agent on it in a fresh session.
+
+        A call made while an identical message is being run with the same
+        cache flags waits for that run and returns its response (or raises
+        its error).
+
+        Args:
+            text: The user message
+            bypass_cache: Neither read nor store a cached response
+            refresh_cache: Run the agent even if a response is cached, and store the new one
+
+        Returns:
+            Text of the agent's final response, or None if it gave none
+        """
+        key = cache_key(self.agent, text, self.volatile_fields)
+        if not bypass_cache and not refresh_cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        async def run_and_store() -> Optional[str]:
+            final_response_text = await self._run_agent(text)
+            if not bypass_cache and final_response_text:
+                await self.cache.put(key, self.agent.name, final_response_text)
+            return final_response_text
+
+        # Only calls with the same cache flags share a run, so e.g. a refresh never gets a cached answer
+        return await self.flights.do(f"{key}:{bypass_cache:d}{refresh_cache:d}", run_and_store)
+
+    async def stream(self, text: str, bypass_cache: bool = False, refresh_cache: bool = False) -> AsyncIterator[str]:
+        """
+        Like ``run``, but yield the response text piece by piece while the model generates it.
+
+        A cached response is yielded in one piece. Streams aren't coalesced
+        with other calls, since each caller consumes its own generation.
+        """
+        key = cache_key(self.agent, text, self.volatile_fields)
+        if not bypass_cache and not refresh_cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        pieces = []
+        async for piece in self._stream_agent(text):
+            pieces.append(piece)
+            yield piece
+        final_response_text = "".join(pieces).strip()
+        if not bypass_cache and final_response_text:
+            await self.cache.put(key, self.agent.name, final_response_text)
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[str]:
+        """A fresh session for one run, deleted when the run ends however it ends; waits while all slots are taken."""
+        if self._slots.locked():
+            self.runs_waited += 1
+        async with self._slots:
+            session_id = self._open_session()
+            self.runs += 1
+            try:
+                yield session_id
+            except Exception:
+                self.failures += 1
+                raise
+            finally:
+                if session_id in self._open:
+                    self._delete_session(session_id)
+                    self.sessions_deleted += 1
+
+    async def _run_agent(self, text: str) -> Optional[str]:
+        content = types.Content(role="user", parts=[types.Part(text=text)])
+        final_response_text = None
+        async with self._session() as session_id:
+            async for event in self.runner.run_async(user_id=USER_ID, session_id=session_id, new_message=content):
+                if event.is_final_response() and event.content and event.content.parts:
+                    final_response_text = event.content.parts[0].text.strip()
+        return final_response_text
+
+    async def _stream_agent(self, text: str) -> AsyncIterator[str]:
+        content = types.Content(role="user", parts=[types.Part(text=text)])
+        streamed = False
+        async with self._session() as session_id:
+            events = self.runner.run_async(
+                user_id=USER_ID, session_id=session_id, new_message=content, run_config=STREAMING_RUN_CONFIG
+            )
+            # Closed with the session when the consumer stops early
+            async with aclosing(events):
+                async for event in events:
+                    if not (event.content and event.content.parts and event.content.parts[0].text):
+                        continue
+                    if event.partial:
+                        streamed = True
+                        yield event.content.parts[0].text
+                    elif event.is_final_response() and not streamed:
+                        # The model answered in one piece
+                        yield event.content.parts[0].text
+
+    def session_bytes(self) -> int:
+        """Approximate memory held by the open sessions (their serialized size)."""
+        sessions = self.session_service.sessions.get(self.app_name, {}).get(USER_ID, {})
+        return sum(len(session.model_dump_json()) for session in sessions.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "live_sessions": len(self._open),
+            "session_bytes": self.session_bytes(),
+            "peak_sessions": self.peak_sessions,
+            "runs": self.runs,
+            "runs_waited": self.runs_waited,
+            "failures": self.failures,
+            "sessions_deleted": self.sessions_deleted,
+            "sessions_evicted": self.sessions_evicted,
+            "coalesced": self.flights.coalesced,
+        }
+
+
+# Agent name -> its runtime, filled in as the controllers build them
+runtimes: Dict[str, AgentRuntime] = {}
+
+
+def runtime_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: runtime.stats() for name, runtime in runtimes.items()}
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition of each agent's sessions and runs, and of the result cache."""
+    metrics = (
+        ("agent_live_sessions", "gauge", "live_sessions"),
+        ("agent_session_bytes", "gauge", "session_bytes"),
+        ("agent_runs_total", "counter", "runs"),
+        ("agent_runs_waited_total", "counter", "runs_waited"),
+        ("agent_run_failures_total", "counter", "failures"),
+        ("agent_sessions_evicted_total", "counter", "sessions_evicted"),
+        ("agent_coalesced_requests_total", "counter", "coalesced"),
+    )
+    stats = runtime_stats()
+    lines = []
+    for name, kind, key in metrics:
+        lines.append(f"# TYPE {name} {kind}")
+        for agent, values in stats.items():
+            lines.append(f'{name}{{agent="{agent}"}} {values[key]}')
+    cache_stats = result_cache.stats()
+    for name, kind, key in (
+        ("agent_cache_entries", "gauge", "entries"),
+        ("agent_cache_hits_total", "counter", "hits"),
+        ("agent_cache_misses_total", "counter", "misses"),
+        ("agent_cache_evictions_total", "counter", "evictions"),
+    ):
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {cache_stats[key]}")
+    return "\n".join(lines) + "\n"
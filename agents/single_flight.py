@@ -0,0 +1,67 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+While a call for a key is in flight, further calls with the same key wait
+for it instead of starting their own, and all of them get its result, or
+its exception if it fails. The work runs in its own task, so a caller that
+disconnects doesn't cancel it for the others. Once the call completes the
+key is released; later calls start a new one (and usually find the result
+in the result cache).
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """In-flight calls of one kind, keyed by their normalized input."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        groups[name] = self
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``call`` unless a call with the same key is in flight, and return its result.
+
+        Args:
+            key: Identity of the call; equal keys must mean interchangeable results
+            call: Starts the work; only invoked by the first caller
+
+        Raises:
+            Whatever the shared call raised
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        self._calls.pop(key, None)
+        if not task.cancelled():
+            # Retrieved here too, in case every caller has gone away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+# Name -> group, filled in as the controllers and runtimes build them
+groups: Dict[str, SingleFlight] = {}
+
+
+def single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: group.stats() for name, group in groups.items()}
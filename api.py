@@ -1,20 +1,40 @@
 import os
+import time
+
+# Start of the app import, for the startup report
+IMPORT_STARTED = time.perf_counter()
+# Process that imported the app; with gunicorn --preload the workers are forked from it
+IMPORTED_BY_PID = os.getpid()
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file if it exists, before any module reads its settings
+load_dotenv()
+
 import json
+import resource
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from starlette.routing import Match
 from google.adk.cli.fast_api import get_fast_api_app
 # from custom_routes import router as custom_router
-from routes import epic, user_story, sprint, task_routes, developer_routes
-from dotenv import load_dotenv
+from routes import epic, user_story, sprint, task_routes, developer_routes, project, activity, jobs
+from routes.streaming import STREAMED_MEDIA_TYPES
+from agents import runtime as agent_runtime
+from agents.single_flight import single_flight_stats
+from controllers.job_controller import job_queue
+from firestore.activity_writer import activity_writer
+from firestore.cache import entity_cache
+from firestore.replica import board_replica
+from firestore.firestore_client import ClientFactory, client_factory
+from firestore.instrumentation import route_metrics, track_storage
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file if it exists
-load_dotenv()
-
 # Handle Google credentials
 def setup_google_credentials():
     try:
@@ -55,42 +75,174 @@ AGENT_DIR = BASE_DIR  # Parent directory containing multi_tool_agent
 # Set up DB path for sessions
 SESSION_DB_URL = f"sqlite:///{os.path.join(BASE_DIR, 'sessions.db')}"
 
-# Create the FastAPI app using ADK's helper
-app: FastAPI = get_fast_api_app(
-    agent_dir=AGENT_DIR,
-    session_db_url=SESSION_DB_URL,
-    allow_origins=["*"],  # In production, restrict this
-    web=False,  # Enable the ADK Web UI
-)
-
-# app.include_router(custom_router)
-app.include_router(epic.router)
-app.include_router(user_story.router)
-app.include_router(sprint.router)
-app.include_router(task_routes.router)
-app.include_router(developer_routes.router)
+def resident_memory_mb() -> float:
+    """Current resident set size of this process (peak size where /proc isn't available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def startup_report() -> dict:
+    """How long this worker took to boot and what it holds once ready."""
+    return {
+        "pid": os.getpid(),
+        "preloaded": os.getpid() != IMPORTED_BY_PID,
+        "import_seconds": round(IMPORT_SECONDS, 3),
+        "ready_after_seconds": round(READY_AT - IMPORT_STARTED, 3) if READY_AT else None,
+        "resident_memory_mb": round(resident_memory_mb(), 1),
+        "storage_client_created": client_factory.created,
+    }
+
+READY_AT = None
+
+# Background services owned by each worker process
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global READY_AT
+    READY_AT = time.perf_counter()
+    logger.info(f"Worker startup: {startup_report()}")
+    board_replica.start()
+    activity_writer.start()
+    job_queue.start()
+    try:
+        yield
+    finally:
+        # Hand unfinished jobs back to the queue for another worker
+        await job_queue.stop()
+        # Drain queued activity entries before the worker exits
+        await activity_writer.stop()
+        board_replica.stop()
 
 # Add custom endpoints
-@app.get("/test")
 async def test():
     logger.info("Test endpoint called")
     return {"message": "test"}
 
-@app.get("/health")
 async def health_check():
     logger.info("Health check endpoint called")
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "entity_cache": entity_cache.stats(),
+        "board_replica": board_replica.status(),
+        "activity_writer": activity_writer.stats(),
+        "agents": agent_runtime.runtime_stats(),
+        "agent_cache": agent_runtime.result_cache.stats(),
+        "single_flight": single_flight_stats(),
+        "job_queue": job_queue.stats(),
+        "startup": startup_report(),
+    }
+
+async def metrics():
+    """Per-route request and storage totals, activity write-behind, agent session and job queue metrics in Prometheus text format."""
+    body = (
+        route_metrics.render_prometheus()
+        + activity_writer.render_prometheus()
+        + agent_runtime.render_prometheus()
+        + job_queue.render_prometheus()
+    )
+    return Response(body, media_type="text/plain; version=0.0.4")
+
+def route_template(request) -> str:
+    """Path template of the matched route, so metrics aren't labelled per document ID."""
+    for route in request.app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
 
 # Add a test middleware to log all requests
-@app.middleware("http")
 async def log_requests(request, call_next):
     logger.info(f"Incoming request: {request.method} {request.url.path}")
     logger.info(f"Request headers: {request.headers}")
     logger.info(f"Request query params: {request.query_params}")
-    response = await call_next(request)
-    logger.info(f"Response status: {response.status_code}")
+    started = time.perf_counter()
+    with track_storage() as storage:
+        response = await call_next(request)
+
+    def report() -> None:
+        route_metrics.observe(request.method, route_template(request), storage, time.perf_counter() - started)
+        logger.info(
+            f"Response status: {response.status_code} "
+            f"(firestore rpcs={storage.rpcs} reads={storage.reads} writes={storage.writes} "
+            f"time={storage.seconds * 1000:.2f}ms)"
+        )
+
+    if response.headers.get("content-type", "").startswith(STREAMED_MEDIA_TYPES):
+        # Streamed bodies are read from storage while they are sent, after the
+        # headers are out: leave the X-Firestore-* headers off and account
+        # for the request once the body is done
+        body = response.body_iterator
+
+        async def reported_body():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                report()
+
+        response.body_iterator = reported_body()
+        return response
+
+    response.headers["X-Firestore-RPCs"] = str(storage.rpcs)
+    response.headers["X-Firestore-Reads"] = str(storage.reads)
+    response.headers["X-Firestore-Writes"] = str(storage.writes)
+    response.headers["X-Firestore-Time-Ms"] = f"{storage.seconds * 1000:.2f}"
+    report()
     return response
 
+def create_app() -> FastAPI:
+    """The ADK app with this repo's routes; built once per process, see ``LazyApp``."""
+    # Create the FastAPI app using ADK's helper
+    app = get_fast_api_app(
+        agent_dir=AGENT_DIR,
+        session_db_url=SESSION_DB_URL,
+        allow_origins=["*"],  # In production, restrict this
+        web=False,  # Enable the ADK Web UI
+        lifespan=lifespan,
+    )
+
+    # app.include_router(custom_router)
+    app.include_router(epic.router)
+    app.include_router(user_story.router)
+    app.include_router(sprint.router)
+    app.include_router(task_routes.router)
+    app.include_router(developer_routes.router)
+    app.include_router(project.router)
+    app.include_router(activity.router)
+    app.include_router(jobs.router)
+
+    app.add_api_route("/test", test, methods=["GET"])
+    app.add_api_route("/health", health_check, methods=["GET"])
+    app.add_api_route("/metrics", metrics, methods=["GET"])
+    app.middleware("http")(log_requests)
+    return app
+
+class LazyApp:
+    """
+    ASGI entry point that builds the app on first use in each process.
+
+    With gunicorn --preload the master imports every module, which is the
+    slow part and is shared with the workers copy-on-write, but never
+    builds the app (about 20ms). So the ADK session service's SQLAlchemy
+    engine on sessions.db is opened by the worker using it rather than
+    inherited across ``fork``, as ``ClientFactory`` does for the storage client.
+    """
+
+    def __init__(self, create):
+        self._factory = ClientFactory(create)
+
+    async def __call__(self, scope, receive, send):
+        await self._factory()(scope, receive, send)
+
+    def __getattr__(self, name: str):
+        return getattr(self._factory(), name)
+
+app = LazyApp(create_app)
+
+# Shared by every worker when the app is preloaded (see Procfile)
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
 if __name__ == "__main__":
     # Use the PORT environment variable, defaulting to 8080
     port = int(os.environ.get("PORT", 8080))
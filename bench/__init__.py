@@ -0,0 +1,8 @@
+"""
+Offline benchmark suite.
+
+Runs the FastAPI app from ``api.py`` in-process against the in-memory SQLite
+storage backend and a stubbed LLM, and records latency percentiles and
+Firestore-equivalent RPCs, reads and writes for every route. See
+``bench/run.py``.
+"""
@@ -0,0 +1,226 @@
+"""
+Run every route of the app against the in-memory backend and check the RPC budgets.
+
+    python -m bench.run                    # measure and compare with bench/budgets.json
+    python -m bench.run --update-budgets   # record the current numbers as the budgets
+
+For each route the report holds latency percentiles of the in-process round
+trip and the worst-case Firestore-equivalent RPCs, document reads and writes
+of one request. The entity cache is disabled so the numbers are what a cold
+worker pays; a change that adds an N+1 pattern shows up as a higher count.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "budgets.json")
+DEFAULT_ITERATIONS = 20
+DEFAULT_WARMUP = 2
+COUNTERS = ("rpcs", "reads", "writes")
+# Per-request totals the log_requests middleware reports; they must match what the backend served
+ATTRIBUTION_HEADERS = (("rpcs", "RPCs"), ("reads", "Reads"), ("writes", "Writes"))
+
+
+def configure_environment() -> None:
+    """Point the app at the in-memory backend; must run before ``api`` is imported."""
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_DB_PATH"] = ":memory:"
+    os.environ["ENTITY_CACHE_TTL_SECONDS"] = "0"
+    os.environ["BOARD_REPLICA_ENABLED"] = "0"
+    # Writes are measured on the request that makes them, not in a later flush
+    os.environ["ACTIVITY_WRITE_BEHIND"] = "0"
+    # Every decompose and plan request runs the (stubbed) agent
+    os.environ["AGENT_CACHE_TTL_SECONDS"] = "0"
+    # Queued jobs would otherwise run, and be measured, between scenarios
+    os.environ["JOB_WORKERS_ENABLED"] = "0"
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, int(round(q / 100 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+def uncovered_routes(app) -> List[str]:
+    """Routes defined by this repo (not by ADK) that have no scenario."""
+    from fastapi.routing import APIRoute
+    from bench.scenarios import SCENARIOS
+
+    covered = {scenario.key for scenario in SCENARIOS}
+    missing = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        module = route.endpoint.__module__
+        if module != "api" and not module.startswith("routes."):
+            continue
+        for method in route.methods:
+            if f"{method} {route.path}" not in covered:
+                missing.append(f"{method} {route.path}")
+    return sorted(missing)
+
+
+async def _measure(client, db, fx, scenario, iterations: int, warmup: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    worst = {counter: 0 for counter in COUNTERS}
+    errors: List[str] = []
+    for iteration in range(warmup + iterations):
+        path_params = await scenario.setup(fx) if scenario.setup else {}
+        body = scenario.body(fx) if scenario.body else None
+        files = scenario.files(fx) if scenario.files else None
+        query = scenario.query(fx) if callable(scenario.query) else scenario.query
+
+        before = dict(db.usage)
+        started = time.perf_counter()
+        response = await client.request(
+            scenario.method, scenario.path.format(**path_params), json=body, params=query, files=files
+        )
+        elapsed = time.perf_counter() - started
+        used = {counter: db.usage[counter] - before[counter] for counter in COUNTERS}
+
+        if response.status_code >= 400:
+            errors.append(f"{response.status_code}: {response.text[:200]}")
+        attributed = {counter: response.headers.get(f"X-Firestore-{header}") for counter, header in ATTRIBUTION_HEADERS}
+        if any(value is not None and int(value) != used[counter] for counter, value in attributed.items()):
+            errors.append(f"request headers attribute {attributed} but the backend served {used}")
+        if iteration < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        for counter in COUNTERS:
+            worst[counter] = max(worst[counter], used[counter])
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        **worst,
+        "errors": errors[:3],
+    }
+
+
+async def run_benchmark(iterations: int = DEFAULT_ITERATIONS, warmup: int = DEFAULT_WARMUP) -> Dict[str, Dict[str, Any]]:
+    """
+    Seed a board and issue every scenario against the app in-process.
+
+    Returns:
+        Route key (``"GET /epic/"``) -> latency percentiles, worst-case
+        rpcs/reads/writes per request and the first errors seen
+    """
+    configure_environment()
+    import httpx
+    from api import app
+    from bench.scenarios import SCENARIOS, seed
+    from bench.stub_llm import install_stub_llm
+    from firestore.firestore_client import db
+    from firestore.sqlite_backend import SQLiteClient
+
+    db = getattr(db, "wrapped", db)
+    if not isinstance(db, SQLiteClient):
+        raise RuntimeError("The storage client was created before the benchmark could select the in-memory backend")
+    logging.getLogger().setLevel(logging.WARNING)
+    install_stub_llm()
+
+    report: Dict[str, Dict[str, Any]] = {}
+    async with app.router.lifespan_context(app):
+        fx = await seed()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in SCENARIOS:
+                report[scenario.report_key] = await _measure(client, db, fx, scenario, iterations, warmup)
+    for key in uncovered_routes(app):
+        report[key] = {"errors": ["no benchmark scenario for this route"]}
+    return report
+
+
+def load_budgets(path: str = BUDGETS_PATH) -> Dict[str, Dict[str, int]]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_budgets(report: Dict[str, Dict[str, Any]], path: str = BUDGETS_PATH) -> None:
+    budgets = {
+        key: {counter: result[counter] for counter in COUNTERS}
+        for key, result in sorted(report.items())
+        if not result["errors"]
+    }
+    with open(path, "w") as f:
+        json.dump(budgets, f, indent=2)
+        f.write("\n")
+
+
+def check_budgets(report: Dict[str, Dict[str, Any]], budgets: Dict[str, Dict[str, int]]) -> List[str]:
+    """Return one message per failed request, missing budget or exceeded counter."""
+    violations = []
+    for key, result in report.items():
+        if result["errors"]:
+            violations.append(f"{key}: {result['errors'][0]}")
+            continue
+        budget = budgets.get(key)
+        if budget is None:
+            violations.append(f"{key}: no budget recorded")
+            continue
+        for counter in COUNTERS:
+            if result[counter] > budget[counter]:
+                violations.append(f"{key}: {result[counter]} {counter} per request, budget is {budget[counter]}")
+    return violations
+
+
+def format_report(report: Dict[str, Dict[str, Any]], budgets: Optional[Dict[str, Dict[str, int]]] = None) -> str:
+    header = f"{'route':<42} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rpcs':>6} {'reads':>6} {'writes':>6}"
+    lines = [header, "-" * len(header)]
+    for key, result in report.items():
+        if result["errors"]:
+            lines.append(f"{key:<42} ERROR {result['errors'][0]}")
+            continue
+        budget = (budgets or {}).get(key, {})
+        counts = [
+            f"{result[counter]}/{budget[counter]}" if counter in budget else str(result[counter])
+            for counter in COUNTERS
+        ]
+        lines.append(
+            f"{key:<42} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+            f"{counts[0]:>6} {counts[1]:>6} {counts[2]:>6}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--update-budgets", action="store_true", help="Record the measured counts as the new budgets")
+    parser.add_argument("--json", help="Also write the full report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args.iterations, args.warmup))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_budgets:
+        save_budgets(report)
+        print(format_report(report))
+        print(f"\nBudgets written to {BUDGETS_PATH}")
+        return 0
+
+    budgets = load_budgets()
+    print(format_report(report, budgets))
+    violations = check_budgets(report, budgets)
+    for violation in violations:
+        print(f"OVER BUDGET {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import io
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from firestore import developer, epic, jobs, relationships, sprint, story, task, transfer
+
+
+class Fixtures:
+    """IDs of the seeded board the scenarios run against."""
+
+    def __init__(self):
+        self.epic_ids: List[str] = []
+        self.story_ids: List[str] = []
+        self.task_ids: List[str] = []
+        self.sprint_ids: List[str] = []
+        self.developer_ids: List[str] = []
+        # Export of the seeded board, taken once for the import scenario
+        self.archive: Optional[bytes] = None
+
+
+class Scenario:
+    """
+    One request issued against one route.
+
+    Args:
+        method: HTTP method
+        path: Route path template, e.g. ``/epic/{epic_id}``
+        setup: Prepares the target of one iteration and returns its path
+            parameters; not measured. Routes that consume their target
+            (deletes) create a fresh one here.
+        body: Builds the JSON body
+        query: Query string parameters, or builds them
+        files: Builds the multipart file uploads
+        variant: Tells apart several scenarios of the same route in the report
+    """
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        setup: Optional[Callable[[Fixtures], Awaitable[Dict[str, str]]]] = None,
+        body: Optional[Callable[[Fixtures], Any]] = None,
+        query: Optional[Union[Dict[str, Any], Callable[[Fixtures], Dict[str, Any]]]] = None,
+        files: Optional[Callable[[Fixtures], Dict[str, Any]]] = None,
+        variant: Optional[str] = None,
+    ):
+        self.method = method
+        self.path = path
+        self.setup = setup
+        self.body = body
+        self.query = query
+        self.files = files
+        self.variant = variant
+
+    @property
+    def key(self) -> str:
+        return f"{self.method} {self.path}"
+
+    @property
+    def report_key(self) -> str:
+        return f"{self.key} ({self.variant})" if self.variant else self.key
+
+
+def _developer_data(index: int) -> Dict[str, Any]:
+    return {
+        "name": f"Developer {index}",
+        "email": f"dev{index}@example.com",
+        "designation": "Engineer",
+        "experience_level": "Mid",
+        "skills": ["python", "react"] if index % 2 else ["python"],
+        "status": "available",
+        "joined_date": "2024-01-01T00:00:00Z",
+    }
+
+
+def _story_data(index: int) -> Dict[str, Any]:
+    return {
+        "title": f"Story {index}",
+        "description": "As a user, I want a feature, so that I get value",
+        "acceptance_criteria": ["It works"],
+        "status": "todo",
+        "priority": "high",
+    }
+
+
+def _task_data(index: int) -> Dict[str, Any]:
+    return {
+        "title": f"Task {index}",
+        "description": "Implement it",
+        "assignees": [],
+        "status": "todo" if index % 2 else "in_progress",
+        "priority": "normal",
+    }
+
+
+def _sprint_data(index: int) -> Dict[str, Any]:
+    return {
+        "name": f"Sprint {index}",
+        "goal": "Ship it",
+        "start_date": "2024-01-01T00:00:00Z",
+        "end_date": "2024-01-14T00:00:00Z",
+        "status": "active",
+        "team_id": "team-1",
+    }
+
+
+async def seed(
+    epics: int = 3,
+    stories_per_epic: int = 5,
+    tasks_per_story: int = 4,
+    sprints: int = 2,
+    developers: int = 5,
+) -> Fixtures:
+    """Write a linked board (epics -> stories -> tasks, sprints, developers) straight through the data layer."""
+    fx = Fixtures()
+    for i in range(developers):
+        fx.developer_ids.append(await developer.create_developer(_developer_data(i)))
+    for i in range(sprints):
+        fx.sprint_ids.append(await sprint.create_sprint(_sprint_data(i)))
+    for e in range(epics):
+        epic_id = await epic.create_epic({"title": f"Epic {e}", "description": "Epic", "status": "open", "priority": "high"})
+        fx.epic_ids.append(epic_id)
+        for s in range(stories_per_epic):
+            story_data = _story_data(s) | {"sprint_id": fx.sprint_ids[0]}
+            story_id = await story.create_story(story_data)
+            await relationships.link_story_to_epic(story_id, epic_id, story=story_data)
+            fx.story_ids.append(story_id)
+            for t in range(tasks_per_story):
+                task_data = _task_data(t) | {"epic_id": epic_id, "sprint_id": fx.sprint_ids[0]}
+                task_id = await task.create_task(task_data)
+                await relationships.link_task_to_story(task_id, story_id, task=task_data)
+                fx.task_ids.append(task_id)
+    await relationships.add_task_dependency(fx.task_ids[0], fx.task_ids[1])
+
+    comment = {"content": "Looks good", "author": "dev-0"}
+    activity = {"action": "updated", "description": "Changed status", "user": "dev-0"}
+    for module, doc_id in ((task, fx.task_ids[0]), (story, fx.story_ids[0]), (sprint, fx.sprint_ids[0])):
+        for _ in range(3):
+            await module.add_comment(doc_id, dict(comment))
+            await module.log_activity(doc_id, dict(activity))
+    # Archive of the seeded board, so the import's cost doesn't depend on what earlier scenarios wrote
+    await _archive(fx)
+    return fx
+
+
+async def _new_task(fx: Fixtures) -> Dict[str, str]:
+    return {"task_id": await task.create_task(_task_data(0))}
+
+
+async def _new_story(fx: Fixtures) -> Dict[str, str]:
+    return {"story_id": await story.create_story(_story_data(0))}
+
+
+async def _new_sprint(fx: Fixtures) -> Dict[str, str]:
+    return {"sprint_id": await sprint.create_sprint(_sprint_data(0))}
+
+
+async def _new_developer(fx: Fixtures) -> Dict[str, str]:
+    return {"developer_id": await developer.create_developer(_developer_data(0))}
+
+
+async def _new_job(fx: Fixtures) -> Dict[str, str]:
+    return {"job_id": await jobs.create_job("story_decompose", {"story_description": "Decompose me"})}
+
+
+async def _archive(fx: Fixtures) -> Dict[str, str]:
+    if fx.archive is None:
+        buffer = io.BytesIO()
+        await transfer.export_board(buffer)
+        fx.archive = buffer.getvalue()
+    return {}
+
+
+def _target(name: str, pick: Callable[[Fixtures], str]) -> Callable[[Fixtures], Awaitable[Dict[str, str]]]:
+    async def setup(fx: Fixtures) -> Dict[str, str]:
+        return {name: pick(fx)}
+    return setup
+
+
+_epic = _target("epic_id", lambda fx: fx.epic_ids[0])
+_story = _target("story_id", lambda fx: fx.story_ids[0])
+_task = _target("task_id", lambda fx: fx.task_ids[0])
+_sprint = _target("sprint_id", lambda fx: fx.sprint_ids[0])
+_developer = _target("developer_id", lambda fx: fx.developer_ids[0])
+
+_comment = lambda fx: {"content": "Benchmark comment", "author": "dev-0"}
+_activity = lambda fx: {"action": "updated", "description": "Benchmark activity", "user": "dev-0"}
+_assignment = lambda fx: {"developer_ids": fx.developer_ids[:2]}
+_bulk_assignment = lambda fx: {
+    "assignments": [{"task_id": task_id, "developer_ids": fx.developer_ids[:2]} for task_id in fx.task_ids[:20]]
+}
+
+# Reads come first so every read scenario sees the same seeded board
+SCENARIOS: List[Scenario] = [
+    Scenario("GET", "/test"),
+    Scenario("GET", "/health"),
+    Scenario("GET", "/metrics"),
+    Scenario("GET", "/epic/"),
+    Scenario("GET", "/epic/{epic_id}", setup=_epic),
+    Scenario("GET", "/epic/{epic_id}/tree", setup=_epic),
+    Scenario("GET", "/user_story/"),
+    Scenario("GET", "/user_story/{story_id}", setup=_story),
+    Scenario("GET", "/user_story/{story_id}/comments", setup=_story),
+    Scenario("GET", "/user_story/{story_id}/activity", setup=_story),
+    Scenario("GET", "/sprint/"),
+    Scenario("GET", "/sprint/{sprint_id}", setup=_sprint),
+    Scenario("GET", "/sprint/{sprint_id}/comments", setup=_sprint),
+    Scenario("GET", "/sprint/{sprint_id}/activity", setup=_sprint),
+    Scenario("GET", "/tasks/"),
+    Scenario("GET", "/tasks/{task_id}", setup=_task),
+    Scenario("GET", "/tasks/{task_id}/comments", setup=_task),
+    Scenario("GET", "/tasks/{task_id}/activity", setup=_task),
+    Scenario("GET", "/developers/"),
+    Scenario("GET", "/developers/{developer_id}", setup=_developer),
+    Scenario("GET", "/activity/recent"),
+    Scenario("GET", "/jobs/{job_id}", setup=_new_job),
+    Scenario("GET", "/jobs/", query={"status": "queued", "limit": 5}),
+    Scenario("GET", "/project/export"),
+    Scenario("GET", "/epic/", query={"stream": "true"}, variant="stream"),
+    Scenario("GET", "/user_story/", query={"stream": "true"}, variant="stream"),
+    Scenario("GET", "/sprint/", query={"stream": "true"}, variant="stream"),
+    Scenario("GET", "/tasks/", query={"stream": "true"}, variant="stream"),
+    Scenario("GET", "/developers/", query={"stream": "true"}, variant="stream"),
+
+    Scenario("POST", "/epic/", body=lambda fx: {"title": "New epic", "description": "Epic", "status": "open"}),
+    Scenario("PUT", "/epic/{epic_id}", setup=_epic, body=lambda fx: {"status": "in_progress"}),
+    Scenario("POST", "/user_story/", body=lambda fx: _story_data(0)),
+    Scenario("PUT", "/user_story/{story_id}", setup=_story, body=lambda fx: {"status": "in_progress"}),
+    Scenario("DELETE", "/user_story/{story_id}", setup=_new_story),
+    Scenario("POST", "/user_story/{story_id}/comments", setup=_story, body=_comment),
+    Scenario("POST", "/user_story/{story_id}/activity", setup=_story, body=_activity),
+    Scenario("POST", "/sprint/", body=lambda fx: _sprint_data(0)),
+    Scenario("PUT", "/sprint/{sprint_id}", setup=_sprint, body=lambda fx: {"status": "active"}),
+    Scenario("DELETE", "/sprint/{sprint_id}", setup=_new_sprint),
+    Scenario("POST", "/sprint/{sprint_id}/comments", setup=_sprint, body=_comment),
+    Scenario("POST", "/sprint/{sprint_id}/activity", setup=_sprint, body=_activity),
+    Scenario("POST", "/tasks/", body=lambda fx: _task_data(0)),
+    Scenario("PUT", "/tasks/{task_id}", setup=_task, body=lambda fx: {"status": "done"}),
+    Scenario("DELETE", "/tasks/{task_id}", setup=_new_task),
+    Scenario("POST", "/tasks/{task_id}/comments", setup=_task, body=_comment),
+    Scenario("POST", "/tasks/{task_id}/activity", setup=_task, body=_activity),
+    Scenario("POST", "/tasks/{task_id}/assign", setup=_task, body=_assignment),
+    Scenario("POST", "/tasks/{task_id}/unassign", setup=_task, body=_assignment),
+    Scenario("POST", "/tasks/bulk-assign", body=_bulk_assignment),
+    Scenario("POST", "/tasks/bulk-unassign", body=_bulk_assignment),
+    Scenario("POST", "/developers/", body=lambda fx: _developer_data(0)),
+    Scenario("PUT", "/developers/{developer_id}", setup=_developer, body=lambda fx: {"status": "available"}),
+    Scenario("DELETE", "/developers/{developer_id}", setup=_new_developer),
+    Scenario(
+        "POST", "/project/import",
+        setup=_archive, files=lambda fx: {"file": ("board.ndjson.gz", fx.archive, "application/gzip")},
+    ),
+
+    Scenario("POST", "/epic/decompose", body=lambda fx: {"title": "Epic", "description": "Decompose me"}),
+    Scenario("POST", "/epic/decompose/stream", body=lambda fx: {"title": "Epic", "description": "Decompose me"}),
+    Scenario(
+        "POST", "/epic/decompose/batch",
+        body=lambda fx: [{"title": f"Epic {i}", "description": "Decompose me"} for i in range(3)],
+    ),
+    Scenario("POST", "/user_story/decompose", body=lambda fx: {"story_description": "Decompose me"}),
+    Scenario(
+        "POST", "/user_story/decompose/stream",
+        body=lambda fx: {"story_description": "Decompose me"}, query=lambda fx: {"story_id": fx.story_ids[1]},
+    ),
+    Scenario(
+        "POST", "/sprint/plan",
+        body=lambda fx: {"sprint_goal": "Ship it", "available_stories": fx.story_ids[:3], "team_capacity": 40},
+    ),
+    Scenario("POST", "/jobs/epic/decompose", body=lambda fx: {"title": "Epic", "description": "Decompose me"}),
+    Scenario("POST", "/jobs/user_story/decompose", body=lambda fx: {"story_description": "Decompose me"}),
+    Scenario(
+        "POST", "/jobs/sprint/plan",
+        body=lambda fx: {"sprint_goal": "Ship it", "available_stories": fx.story_ids[:3], "team_capacity": 40},
+    ),
+]
@@ -0,0 +1,100 @@
+import asyncio
+import json
+from typing import AsyncGenerator, Dict
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+STORIES_PER_EPIC = 5
+TASKS_PER_STORY = 4
+# Characters per partial response when the agent is run in streaming mode
+STREAM_CHUNK_SIZE = 64
+
+# Canned answers matching each agent's output_schema
+CANNED_RESPONSES: Dict[str, dict] = {
+    "epic_decomposer": {
+        "stories": [
+            {
+                "title": f"Story {i}",
+                "description": f"As a user, I want feature {i}, so that I get value {i}",
+                "acceptance_criteria": [f"Criterion {i}.{j}" for j in range(3)],
+            }
+            for i in range(STORIES_PER_EPIC)
+        ]
+    },
+    "task_decomposer": {
+        "tasks": [
+            {
+                "title": f"Task {i}",
+                "description": f"Implement part {i}",
+                "role": "backend",
+                "estimate_hours": 4,
+                "story_points": 2,
+            }
+            for i in range(TASKS_PER_STORY)
+        ]
+    },
+    "sprint_planner": {
+        "planned_tasks": [
+            {
+                "title": f"Task {i}",
+                "description": f"Implement part {i}",
+                "role": "backend",
+                "estimate_hours": 4,
+                "sprint_points": 2,
+                "assigned_to": "dev-0",
+                "status": "scheduled",
+                "planned_start_day": i,
+                "planned_end_day": i + 1,
+            }
+            for i in range(TASKS_PER_STORY)
+        ]
+    },
+}
+
+
+class StubLlm(BaseLlm):
+    """
+    Answers every request with a fixed JSON document after an optional simulated delay.
+
+    When streamed, the document arrives in partial responses spread over the
+    delay, followed by the whole text, as Gemini's SSE mode delivers it.
+    """
+
+    response_text: str
+    delay_seconds: float = 0.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        if stream:
+            chunks = [
+                self.response_text[i:i + STREAM_CHUNK_SIZE]
+                for i in range(0, len(self.response_text), STREAM_CHUNK_SIZE)
+            ]
+            for chunk in chunks:
+                if self.delay_seconds:
+                    await asyncio.sleep(self.delay_seconds / len(chunks))
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        elif self.delay_seconds:
+            await asyncio.sleep(self.delay_seconds)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=self.response_text)]),
+            turn_complete=True,
+        )
+
+
+def install_stub_llm(delay_seconds: float = 0.0) -> None:
+    """Point every agent of the app at a ``StubLlm`` so no request leaves the process."""
+    from agents.epic_decomposer import root_agent as epic_agent
+    from agents.sprint_planner import root_agent as sprint_planner_agent
+    from agents.task_decomposer import root_agent as task_decomposer_agent
+
+    for agent in (epic_agent, sprint_planner_agent, task_decomposer_agent):
+        agent.model = StubLlm(
+            model=f"stub-{agent.name}",
+            response_text=json.dumps(CANNED_RESPONSES[agent.name]),
+            delay_seconds=delay_seconds,
+        )
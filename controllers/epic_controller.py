@@ -1,41 +1,39 @@
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from agents.incremental_json import ArrayItemParser
+from agents.result_cache import normalize_payload
+from agents.runtime import AgentRuntime
+from agents.single_flight import SingleFlight
 from agents.epic_decomposer import root_agent as epic_agent
-from google.genai import types
 from firestore import epic, story, relationships
 from fastapi import HTTPException
-from typing import Dict, Any, List
+from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional
+from firestore.pagination import DEFAULT_PAGE_SIZE
+import asyncio
 import json
+import os
+import random
 
-session_service = InMemorySessionService()
-USER_ID = "gurpalsingh"
 APP_NAME = "epic decomposer"
+# One runner for the worker; each decomposition gets a session that is deleted when it ends.
+# The new epic's ID doesn't change the stories, so it isn't part of the cache key
+runtime = AgentRuntime.from_env(epic_agent, APP_NAME, volatile_fields=("epic_id",))
+# Identical epics submitted while one is being decomposed share its epic and stories
+epic_flights = SingleFlight("epic_decompose")
 
-async def decompose_epic_logic(payload: str):
+# Epics of one batch request decomposed at the same time
+EPIC_BATCH_CONCURRENCY = int(os.getenv("EPIC_BATCH_CONCURRENCY", "8"))
+EPIC_BATCH_MAX_SIZE = 100
+# Agent runs tried per epic while the model is rate limited, backing off exponentially in between
+RATE_LIMIT_ATTEMPTS = int(os.getenv("RATE_LIMIT_ATTEMPTS", "5"))
+RATE_LIMIT_BACKOFF_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_SECONDS", "1.0"))
+MAX_BACKOFF_SECONDS = 30.0
+
+async def decompose_epic_logic(payload: str, bypass_cache: bool = False, refresh_cache: bool = False):
     input_data = json.loads(payload)
     epic_id = input_data.get("epic_id")
 
-    new_session = session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        state={"initial_key": "initial_value"}
-    )
-    SESSION_ID = new_session.id
-
-    runner = Runner(
-        agent=epic_agent,
-        app_name=APP_NAME,
-        session_service=session_service,
-    )
-
-    user_content = types.Content(role="user", parts=[types.Part(text=payload)])
-
-    final_response_text = None
-
     try:
-        async for event in runner.run_async(user_id=USER_ID, session_id=SESSION_ID, new_message=user_content):
-            if event.is_final_response() and event.content and event.content.parts:
-                final_response_text = event.content.parts[0].text.strip()
+        final_response_text = await runtime.run(payload, bypass_cache=bypass_cache, refresh_cache=refresh_cache)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during agent run: {e}")
 
@@ -60,10 +58,12 @@ async def decompose_epic_logic(payload: str):
         ]
         
         # Bulk create all stories
-        created_stories = story.bulk_create_stories(stories_to_create)
+        created_stories = await story.bulk_create_stories(stories_to_create)
         
-        # Bulk link stories to epic
-        relationships.bulk_link_stories_to_epic([s["id"] for s in created_stories], epic_id)
+        # Bulk link the stories that were written to the epic
+        await relationships.bulk_link_stories_to_epic(
+            [s["id"] for s in created_stories if "error" not in s], epic_id
+        )
         
         return created_stories
     except json.JSONDecodeError:
@@ -71,32 +71,249 @@ async def decompose_epic_logic(payload: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating stories: {str(e)}")
 
+async def create_and_decompose_epic_logic(
+    epic_data: Dict[str, Any], bypass_cache: bool = False, refresh_cache: bool = False
+) -> Dict[str, Any]:
+    """Create the epic and its stories; concurrent identical submissions (and cache flags) get the same result."""
+    async def create_and_decompose() -> Dict[str, Any]:
+        # First create the epic and get its ID
+        epic_result = await create_epic_logic(epic_data)
+        epic_id = epic_result["id"]
+
+        # Decompose the epic into stories
+        stories_result = await decompose_epic_logic(
+            json.dumps({**epic_data, "epic_id": epic_id}), bypass_cache=bypass_cache, refresh_cache=refresh_cache
+        )
+        return {"epic_id": epic_id, "stories": stories_result}
+
+    flight_key = f"{normalize_payload(json.dumps(epic_data))}:{bypass_cache:d}{refresh_cache:d}"
+    return await epic_flights.do(flight_key, create_and_decompose)
+
+async def decompose_epic_once_logic(
+    epic_id: str,
+    epic_data: Dict[str, Any],
+    bypass_cache: bool = False,
+    refresh_cache: bool = False,
+    progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Create the epic ``epic_id`` with its stories, unless an earlier attempt already did.
+
+    The epic and its stories are written in one commit, so a retried call
+    (e.g. a background job run again after its worker died) finds either
+    nothing and decomposes the epic, or the whole epic and returns it.
+    ``progress`` is called with the number of stories the agent has written
+    so far, once per story.
+    """
+    async def existing_epic() -> Optional[Dict[str, Any]]:
+        tree = await relationships.get_epic_tree(epic_id, depth=1)
+        return None if tree is None else {"epic_id": epic_id, "stories": tree["stories"]}
+
+    done = await existing_epic()
+    if done is not None:
+        return done
+
+    parser = ArrayItemParser("stories")
+    stories = []
+    try:
+        payload = json.dumps({**epic_data, "epic_id": epic_id})
+        async for piece in runtime.stream(payload, bypass_cache=bypass_cache, refresh_cache=refresh_cache):
+            for story_item in parser.feed(piece):
+                stories.append({**story_item, "status": "todo"})
+                if progress is not None:
+                    await progress({"stories_decomposed": len(stories)})
+    except ValueError:
+        raise HTTPException(status_code=500, detail="Invalid response format from agent")
+    if not stories:
+        raise HTTPException(status_code=500, detail="No stories generated by agent")
+
+    written = (await relationships.bulk_create_epics_with_stories({epic_id: (dict(epic_data), stories)}))[epic_id]
+    if not written["success"]:
+        # Another attempt may have created the epic meanwhile
+        done = await existing_epic()
+        if done is not None:
+            return done
+        raise HTTPException(status_code=500, detail=f"Error creating stories: {written['error']}")
+    return {"epic_id": epic_id, "stories": written["stories"]}
+
+async def stream_decompose_epic_logic(
+    epic_data: Dict[str, Any], bypass_cache: bool = False, refresh_cache: bool = False
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Store and link each story as soon as the agent has written it.
+
+    Yields ``epic`` (the ID the epic will have), one ``story`` per stored
+    story and ``done`` with all of them; a failure ends the stream with an
+    ``error`` event instead. The epic is created in one commit with its
+    first story, so a run that produces no stories leaves no empty epic.
+    """
+    epic_id = epic.new_epic_id()
+    yield {"event": "epic", "data": {"epic_id": epic_id}}
+
+    parser = ArrayItemParser("stories")
+    stories = []
+    try:
+        payload = json.dumps({**epic_data, "epic_id": epic_id})
+        async for piece in runtime.stream(payload, bypass_cache=bypass_cache, refresh_cache=refresh_cache):
+            for story_item in parser.feed(piece):
+                story_data = {**story_item, "epic_id": epic_id, "status": "todo"}
+                if not stories:
+                    written = (await relationships.bulk_create_epics_with_stories({
+                        epic_id: (dict(epic_data), [story_data])
+                    }))[epic_id]
+                    if not written["success"]:
+                        raise RuntimeError(f"Error creating epic: {written['error']}")
+                    stories.append(written["stories"][0])
+                else:
+                    story_id = await story.create_story(story_data)
+                    await relationships.link_story_to_epic(story_id, epic_id, story=story_data)
+                    stories.append({"id": story_id, **story_data})
+                yield {"event": "story", "data": stories[-1]}
+    except ValueError:
+        yield {"event": "error", "data": {"detail": "Invalid response format from agent"}}
+        return
+    except Exception as e:
+        yield {"event": "error", "data": {"detail": f"Error during agent run: {e}"}}
+        return
+
+    if not stories:
+        yield {"event": "error", "data": {"detail": "No stories generated by agent"}}
+        return
+    yield {"event": "done", "data": {"epic_id": epic_id, "stories": stories}}
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether the model (Gemini or Vertex AI) turned the request down for quota."""
+    return isinstance(error, (ResourceExhausted, TooManyRequests)) or getattr(error, "code", None) == 429
+
+async def _run_with_backoff(payload: str, bypass_cache: bool, refresh_cache: bool) -> Optional[str]:
+    for attempt in range(1, RATE_LIMIT_ATTEMPTS + 1):
+        try:
+            return await runtime.run(payload, bypass_cache=bypass_cache, refresh_cache=refresh_cache)
+        except Exception as e:
+            if attempt == RATE_LIMIT_ATTEMPTS or not is_rate_limited(e):
+                raise
+            # Full jitter, so the epics of a batch don't retry in lockstep
+            delay = min(MAX_BACKOFF_SECONDS, RATE_LIMIT_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            await asyncio.sleep(random.uniform(0, delay))
+
+async def decompose_epics_batch_logic(
+    epics_data: List[Dict[str, Any]], bypass_cache: bool = False, refresh_cache: bool = False
+) -> Dict[str, Any]:
+    """
+    Decompose many epics at once and create them with their stories.
+
+    Up to ``EPIC_BATCH_CONCURRENCY`` agent runs are in flight at a time,
+    each retried with backoff while the model is rate limited. The epics
+    that were decomposed are then written with their stories in one bulk
+    commit; an epic whose decomposition failed isn't created, so the batch
+    can be resubmitted with just the failed ones.
+
+    Returns:
+        One result per epic, in input order: ``epic_id`` and ``stories``, or ``error``
+    """
+    if not epics_data:
+        raise HTTPException(status_code=400, detail="No epics to decompose")
+    if len(epics_data) > EPIC_BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {EPIC_BATCH_MAX_SIZE} epics per batch")
+
+    semaphore = asyncio.Semaphore(EPIC_BATCH_CONCURRENCY)
+    epic_ids = [epic.new_epic_id() for _ in epics_data]
+
+    async def decompose(epic_id: str, epic_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with semaphore:
+            try:
+                final_response_text = await _run_with_backoff(
+                    json.dumps({**epic_data, "epic_id": epic_id}), bypass_cache, refresh_cache
+                )
+            except Exception as e:
+                raise RuntimeError(f"Error during agent run: {e}")
+        if not final_response_text:
+            raise RuntimeError("No response received from agent.")
+        try:
+            stories_data = json.loads(final_response_text).get("stories", [])
+        except (json.JSONDecodeError, AttributeError):
+            raise RuntimeError("Invalid response format from agent")
+        if not stories_data:
+            raise RuntimeError("No stories generated by agent")
+        return [{**story_item, "status": "todo"} for story_item in stories_data]
+
+    outcomes = await asyncio.gather(
+        *(decompose(epic_id, epic_data) for epic_id, epic_data in zip(epic_ids, epics_data)), return_exceptions=True
+    )
+
+    # Every decomposed epic and its stories in one bulk write
+    try:
+        written = await relationships.bulk_create_epics_with_stories({
+            epic_id: (epic_data, outcome)
+            for epic_id, epic_data, outcome in zip(epic_ids, epics_data, outcomes)
+            if not isinstance(outcome, BaseException)
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating stories: {str(e)}")
+
+    results = []
+    for index, (epic_id, outcome) in enumerate(zip(epic_ids, outcomes)):
+        if isinstance(outcome, BaseException):
+            results.append({"index": index, "error": str(outcome)})
+        elif not written[epic_id]["success"]:
+            results.append({"index": index, "error": f"Error creating stories: {written[epic_id]['error']}"})
+        else:
+            results.append({"index": index, "epic_id": epic_id, "stories": written[epic_id]["stories"]})
+    succeeded = sum("error" not in result for result in results)
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
 async def create_epic_logic(epic_data: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        epic_id = epic.create_epic(epic_data)
+        epic_id = await epic.create_epic(epic_data)
         return {"id": epic_id, "message": "Epic created successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 async def get_epic_logic(epic_id: str) -> Dict[str, Any]:
     try:
-        result = epic.get_epic(epic_id)
+        result = await epic.get_epic(epic_id)
         if not result:
             raise HTTPException(status_code=404, detail="Epic not found")
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def get_epic_tree_logic(epic_id: str, depth: int, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    try:
+        result = await relationships.get_epic_tree(epic_id, depth=depth, fields=fields)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Epic not found")
+    return result
+
 async def update_epic_logic(epic_id: str, updates: Dict[str, Any]) -> Dict[str, str]:
     try:
-        epic.update_epic(epic_id, updates)
+        await epic.update_epic(epic_id, updates)
         return {"message": "Epic updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def list_epics_logic() -> Dict[str, List[Dict[str, Any]]]:
+async def list_epics_logic(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Dict[str, Any]:
+    try:
+        epics, next_page_token = await epic.list_epics(filters, limit, page_token)
+        return {"epics": epics, "next_page_token": next_page_token}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def stream_epics_logic(
+    filters: Optional[Dict[str, Any]] = None,
+    page_token: Optional[str] = None,
+) -> AsyncIterator[dict]:
     try:
-        epics = epic.list_epics()
-        return {"epics": epics}
+        return epic.stream_epics(filters, page_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,304 @@
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from controllers.epic_controller import decompose_epic_once_logic
+from controllers.sprint_controller import plan_sprint_logic
+from controllers.story_controller import decompose_user_story_logic
+from firestore import jobs
+from firestore.pagination import DEFAULT_PAGE_SIZE
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import socket
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> runs one job from its lease, payload and options
+JOB_HANDLERS: Dict[str, Callable[[jobs.Lease, Dict[str, Any], Dict[str, Any]], Awaitable[Any]]] = {
+    # The epic takes the job's ID, so a job run again after a lost lease finds the epic an
+    # earlier run created instead of creating a second one
+    "epic_decompose": lambda lease, payload, options: decompose_epic_once_logic(
+        lease.job_id, payload, progress=lambda progress: jobs.report_progress(lease, progress), **options
+    ),
+    "story_decompose": lambda lease, payload, options: decompose_user_story_logic(json.dumps(payload), **options),
+    "sprint_plan": lambda lease, payload, options: plan_sprint_logic(json.dumps(payload), **options),
+}
+# Jobs of each kind one worker process runs at a time
+DEFAULT_CONCURRENCY = {"epic_decompose": 2, "story_decompose": 4, "sprint_plan": 2}
+DEFAULT_POLL_INTERVAL_SECONDS = 5.0
+# Longest wait between polls once the queue has stayed empty for a while
+DEFAULT_MAX_POLL_INTERVAL_SECONDS = 60.0
+DEFAULT_LEASE_SECONDS = 300.0
+# Claims of a job whose worker never finished it (e.g. died) before it is failed
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def parse_concurrency(value: str) -> Dict[str, int]:
+    """``"epic_decompose=1,sprint_plan=3"`` -> overrides of ``DEFAULT_CONCURRENCY``."""
+    concurrency = dict(DEFAULT_CONCURRENCY)
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        kind, _, count = item.partition("=")
+        if kind.strip() not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind in JOB_CONCURRENCY: {kind}")
+        concurrency[kind.strip()] = int(count)
+    return concurrency
+
+
+class JobQueue:
+    """
+    Bounded pool of background agent runs fed from the persisted ``jobs`` collection.
+
+    ``enqueue`` stores the job and returns at once. Workers are off unless
+    enabled, since every polling process pays for its queries whether or
+    not there is work; enable them on the processes that should run jobs.
+    When started, a worker polls for claimable jobs of each kind it has a
+    free slot for (at once after a local enqueue or a finished job,
+    otherwise after ``poll_interval_seconds``, doubling up to
+    ``max_poll_interval_seconds`` while polls find nothing), claims them
+    and runs them, renewing the claim's lease while the agent works. Jobs
+    of a worker that dies are picked up by another once their lease
+    expires; a worker that finds its lease was taken over abandons the run
+    without writing its outcome. ``stop`` hands running jobs back to the
+    queue. Since the queue lives in storage, jobs also survive a restart of
+    every worker.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        concurrency: Optional[Dict[str, int]] = None,
+        poll_interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS,
+        max_poll_interval_seconds: float = DEFAULT_MAX_POLL_INTERVAL_SECONDS,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        self.enabled = enabled
+        self.concurrency = concurrency or dict(DEFAULT_CONCURRENCY)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_poll_interval_seconds = max(poll_interval_seconds, max_poll_interval_seconds)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        # Job ID -> task running it
+        self._active: Dict[str, asyncio.Task] = {}
+        self._running = {kind: 0 for kind in JOB_HANDLERS}
+        self.enqueued = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.released = 0
+        # Runs abandoned because another worker took their job over
+        self.lost = 0
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        """
+        Build the queue from JOB_WORKERS_ENABLED (off by default; the Procfile turns it on), JOB_CONCURRENCY,
+        JOB_POLL_INTERVAL_SECONDS, JOB_MAX_POLL_INTERVAL_SECONDS, JOB_LEASE_SECONDS and JOB_MAX_ATTEMPTS.
+        """
+        return cls(
+            enabled=os.getenv("JOB_WORKERS_ENABLED", "0").lower() in ("1", "true", "yes"),
+            concurrency=parse_concurrency(os.getenv("JOB_CONCURRENCY", "")),
+            poll_interval_seconds=float(os.getenv("JOB_POLL_INTERVAL_SECONDS", DEFAULT_POLL_INTERVAL_SECONDS)),
+            max_poll_interval_seconds=float(
+                os.getenv("JOB_MAX_POLL_INTERVAL_SECONDS", DEFAULT_MAX_POLL_INTERVAL_SECONDS)
+            ),
+            lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopping
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> str:
+        """Persist a job for the workers and return its ID."""
+        job_id = await jobs.create_job(kind, payload, options)
+        self.enqueued += 1
+        if self.running:
+            self._wake.set()
+        return job_id
+
+    def start(self) -> None:
+        """Start polling for jobs on the running event loop."""
+        if not self.enabled:
+            logger.warning("Job workers are off (JOB_WORKERS_ENABLED); queued jobs wait for a process that runs them")
+            return
+        if self._task is not None:
+            return
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Job workers started as {self.worker} with concurrency {self.concurrency}")
+
+    async def stop(self) -> None:
+        """Stop taking jobs and hand the running ones back to the queue."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        active = list(self._active.values())
+        for task in active:
+            task.cancel()
+        await asyncio.gather(*active, return_exceptions=True)
+        self._task = None
+        logger.info(f"Job workers stopped ({self.succeeded} succeeded, {self.failed} failed, {self.released} released)")
+
+    async def _run(self) -> None:
+        interval = self.poll_interval_seconds
+        while not self._stopping:
+            try:
+                claimed = await self._dispatch()
+            except Exception:
+                logger.exception("Job dispatch failed")
+                claimed = 0
+            if claimed:
+                interval = self.poll_interval_seconds
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+                # Local work arrived or a slot freed up
+                interval = self.poll_interval_seconds
+            except asyncio.TimeoutError:
+                # Nothing happened here; poll less often until something does
+                interval = min(interval * 2, self.max_poll_interval_seconds)
+            self._wake.clear()
+
+    async def _dispatch(self) -> int:
+        """Claim and start jobs for every kind with a free slot; returns how many were claimed."""
+        claimed = 0
+        for kind, limit in self.concurrency.items():
+            free = limit - self._running[kind]
+            if free <= 0 or self._stopping:
+                continue
+            for job, update_time in await jobs.claimable_jobs(kind, free):
+                lease = await jobs.claim_job(job["id"], update_time, self.worker, self.lease_seconds)
+                if lease is not None:
+                    claimed += 1
+                    self._running[kind] += 1
+                    self._active[job["id"]] = asyncio.get_running_loop().create_task(self._execute(job, lease))
+        return claimed
+
+    async def _heartbeat(self, lease: jobs.Lease, run: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await jobs.renew_lease(lease, self.lease_seconds)
+            except jobs.LeaseLost:
+                # Another worker runs the job now; stop this run rather than finish it twice
+                logger.warning(f"Lost the lease of job {lease.job_id}, abandoning its run")
+                run.cancel()
+                return
+            except Exception:
+                logger.exception(f"Renewing the lease of job {lease.job_id} failed")
+
+    async def _settle(self, update: Awaitable[None], lease: jobs.Lease) -> bool:
+        """Write the end of a run; False if the job was taken over in the meantime."""
+        try:
+            await update
+        except jobs.LeaseLost:
+            self.lost += 1
+            logger.warning(f"Job {lease.job_id} was taken over by another worker, dropping this run's outcome")
+            return False
+        return True
+
+    async def _execute(self, job: Dict[str, Any], lease: jobs.Lease) -> None:
+        job_id, kind = job["id"], job["kind"]
+        heartbeat = asyncio.get_running_loop().create_task(self._heartbeat(lease, asyncio.current_task()))
+        try:
+            if job.get("attempts", 0) >= self.max_attempts:
+                raise RuntimeError(f"Gave up after {job['attempts']} attempts that never finished")
+            result = await JOB_HANDLERS[kind](lease, job.get("payload") or {}, job.get("options") or {})
+        except asyncio.CancelledError:
+            heartbeat.cancel()
+            if lease.lost:
+                # Cancelled by the heartbeat, not by stop()
+                self.lost += 1
+                return
+            if await self._settle(jobs.release_job(lease), lease):
+                self.released += 1
+            raise
+        except Exception as e:
+            heartbeat.cancel()
+            error = str(e.detail) if isinstance(e, HTTPException) else str(e)
+            if await self._settle(jobs.finish_job(lease, error=error), lease):
+                self.failed += 1
+        else:
+            heartbeat.cancel()
+            if await self._settle(jobs.finish_job(lease, result=jsonable_encoder(result)), lease):
+                self.succeeded += 1
+        finally:
+            self._running[kind] -= 1
+            self._active.pop(job_id, None)
+            if self.running:
+                # A slot is free
+                self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "worker": self.worker,
+            "active": {kind: {"running": self._running[kind], "limit": limit} for kind, limit in self.concurrency.items()},
+            "enqueued": self.enqueued,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "released": self.released,
+            "lost": self.lost,
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition of the running jobs and job totals of this worker."""
+        lines = ["# TYPE job_queue_running gauge"]
+        for kind in self.concurrency:
+            lines.append(f'job_queue_running{{kind="{kind}"}} {self._running[kind]}')
+        for name, value in (
+            ("job_queue_enqueued_total", self.enqueued),
+            ("job_queue_succeeded_total", self.succeeded),
+            ("job_queue_failed_total", self.failed),
+            ("job_queue_released_total", self.released),
+            ("job_queue_lost_total", self.lost),
+        ):
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared per-process queue, started and stopped by the app lifespan
+job_queue = JobQueue.from_env()
+
+async def enqueue_job_logic(kind: str, payload: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        job_id = await job_queue.enqueue(kind, payload, options)
+        return {"job_id": job_id, "status": jobs.QUEUED}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def get_job_logic(job_id: str) -> Dict[str, Any]:
+    try:
+        result = await jobs.get_job(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return result
+
+async def list_jobs_logic(
+    filters: Optional[Dict[str, Any]] = None,
+    ids: Optional[List[str]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Dict[str, Any]:
+    try:
+        if ids:
+            # Status of a known set of jobs, e.g. everything a client submitted
+            return {"jobs": await jobs.get_jobs(ids), "next_page_token": None}
+        job_list, next_page_token = await jobs.list_jobs(filters, limit, page_token)
+        return {"jobs": job_list, "next_page_token": next_page_token}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,47 +1,18 @@
 from fastapi import HTTPException
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from agents.runtime import AgentRuntime
 from agents.sprint_planner import root_agent as sprint_planner_agent
-from google.genai import types
-from dotenv import load_dotenv
 from firestore import sprint
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterator, Optional
+from firestore.pagination import DEFAULT_PAGE_SIZE
 
-load_dotenv()
-
-# Initialize the session service once
-session_service = InMemorySessionService()
-USER_ID = "gurpalsingh"
 APP_NAME = "sprint planner"
+# One runner for the worker; each plan gets a session that is deleted when it ends
+runtime = AgentRuntime.from_env(sprint_planner_agent, APP_NAME)
 
 
-async def plan_sprint_logic(payload: str):
-    input_text = payload
-
-    # Create a new session
-    new_session = session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        state={"initial_key": "initial_value"}
-    )
-    SESSION_ID = new_session.id
-
-    # Initialize the runner with the existing session service
-    runner = Runner(
-        agent=sprint_planner_agent,
-        app_name=APP_NAME,
-        session_service=session_service,
-    )
-
-    # Prepare the user content
-    user_content = types.Content(role="user", parts=[types.Part(text=input_text)])
-
-    final_response_text = None
-
+async def plan_sprint_logic(payload: str, bypass_cache: bool = False, refresh_cache: bool = False):
     try:
-        async for event in runner.run_async(user_id=USER_ID, session_id=SESSION_ID, new_message=user_content):
-            if event.is_final_response() and event.content and event.content.parts:
-                final_response_text = event.content.parts[0].text.strip()
+        final_response_text = await runtime.run(payload, bypass_cache=bypass_cache, refresh_cache=refresh_cache)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during agent run: {e}")
 
@@ -52,14 +23,14 @@ async def plan_sprint_logic(payload: str):
 
 async def create_sprint_logic(sprint_data: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        sprint_id = sprint.create_sprint(sprint_data)
+        sprint_id = await sprint.create_sprint(sprint_data)
         return {"id": sprint_id, "message": "Sprint created successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 async def get_sprint_logic(sprint_id: str) -> Dict[str, Any]:
     try:
-        result = sprint.get_sprint(sprint_id)
+        result = await sprint.get_sprint(sprint_id)
         if not result:
             raise HTTPException(status_code=404, detail="Sprint not found")
         return result
@@ -68,49 +39,80 @@ async def get_sprint_logic(sprint_id: str) -> Dict[str, Any]:
 
 async def update_sprint_logic(sprint_id: str, updates: Dict[str, Any]) -> Dict[str, str]:
     try:
-        sprint.update_sprint(sprint_id, updates)
+        await sprint.update_sprint(sprint_id, updates)
         return {"message": "Sprint updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 async def delete_sprint_logic(sprint_id: str) -> Dict[str, str]:
     try:
-        sprint.delete_sprint(sprint_id)
+        await sprint.delete_sprint(sprint_id)
         return {"message": "Sprint deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def list_sprints_logic() -> Dict[str, List[Dict[str, Any]]]:
+async def list_sprints_logic(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Dict[str, Any]:
+    try:
+        sprints, next_page_token = await sprint.list_sprints(filters, limit, page_token)
+        return {"sprints": sprints, "next_page_token": next_page_token}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def stream_sprints_logic(
+    filters: Optional[Dict[str, Any]] = None,
+    page_token: Optional[str] = None,
+) -> AsyncIterator[dict]:
     try:
-        sprints = sprint.list_sprints()
-        return {"sprints": sprints}
+        return sprint.stream_sprints(filters, page_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 async def add_sprint_comment_logic(sprint_id: str, comment: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        comment_id = sprint.add_comment(sprint_id, comment)
+        comment_id = await sprint.add_comment(sprint_id, comment)
         return {"id": comment_id, "message": "Comment added successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def get_sprint_comments_logic(sprint_id: str) -> Dict[str, List[Dict[str, Any]]]:
+async def get_sprint_comments_logic(
+    sprint_id: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Dict[str, Any]:
     try:
-        comments = sprint.get_comments(sprint_id)
-        return {"comments": comments}
+        comments, next_page_token = await sprint.get_comments(sprint_id, limit, page_token, newest_first)
+        return {"comments": comments, "next_page_token": next_page_token}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 async def log_sprint_activity_logic(sprint_id: str, activity: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        activity_id = sprint.log_activity(sprint_id, activity)
+        activity_id = await sprint.log_activity(sprint_id, activity)
         return {"id": activity_id, "message": "Activity logged successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def get_sprint_activity_log_logic(sprint_id: str) -> Dict[str, List[Dict[str, Any]]]:
+async def get_sprint_activity_log_logic(
+    sprint_id: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Dict[str, Any]:
     try:
-        activity_log = sprint.get_activity_log(sprint_id)
-        return {"activity_log": activity_log}
+        activity_log, next_page_token = await sprint.get_activity_log(sprint_id, limit, page_token, newest_first)
+        return {"activity_log": activity_log, "next_page_token": next_page_token}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
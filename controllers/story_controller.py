@@ -1,46 +1,18 @@
 from fastapi import  HTTPException
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from agents.incremental_json import ArrayItemParser
+from agents.runtime import AgentRuntime
 from agents.task_decomposer import root_agent as task_decomposer_agent
-from google.genai import types
-from dotenv import load_dotenv
-from firestore import story
-from typing import Dict, Any, List
+from firestore import relationships, story, task
+from typing import Dict, Any, AsyncIterator, Optional
+from firestore.pagination import DEFAULT_PAGE_SIZE
 
-load_dotenv()
-
-# Initialize the session service once
-session_service = InMemorySessionService()
-USER_ID = "gurpalsingh"
 APP_NAME = "user story decomposer"
+# One runner for the worker; each decomposition gets a session that is deleted when it ends
+runtime = AgentRuntime.from_env(task_decomposer_agent, APP_NAME)
 
-async def decompose_user_story_logic(payload: str):
-    input_text = payload
-
-    # Create a new session
-    new_session = session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        state={"initial_key": "initial_value"}
-    )
-    SESSION_ID = new_session.id
-
-    # Initialize the runner with the existing session service
-    runner = Runner(
-        agent=task_decomposer_agent,
-        app_name=APP_NAME,
-        session_service=session_service,
-    )
-
-    # Prepare the user content
-    user_content = types.Content(role="user", parts=[types.Part(text=input_text)])
-
-    final_response_text = None
-
+async def decompose_user_story_logic(payload: str, bypass_cache: bool = False, refresh_cache: bool = False):
     try:
-        async for event in runner.run_async(user_id=USER_ID, session_id=SESSION_ID, new_message=user_content):
-            if event.is_final_response() and event.content and event.content.parts:
-                final_response_text = event.content.parts[0].text.strip()
+        final_response_text = await runtime.run(payload, bypass_cache=bypass_cache, refresh_cache=refresh_cache)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during agent run: {e}")
 
@@ -49,16 +21,57 @@ async def decompose_user_story_logic(payload: str):
     else:
         raise HTTPException(status_code=500, detail="No response received from agent.")
 
+async def stream_decompose_user_story_logic(
+    payload: str,
+    story_id: Optional[str] = None,
+    bypass_cache: bool = False,
+    refresh_cache: bool = False,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield each task as soon as the agent has written it.
+
+    With ``story_id`` every task is also created and linked to that story
+    before it is sent. Yields one ``task`` per task and ``done`` with all of
+    them; a failure ends the stream with an ``error`` event instead.
+    """
+    if story_id is not None and not await story.get_story(story_id):
+        yield {"event": "error", "data": {"detail": "Story not found"}}
+        return
+
+    parser = ArrayItemParser("tasks")
+    tasks = []
+    try:
+        async for piece in runtime.stream(payload, bypass_cache=bypass_cache, refresh_cache=refresh_cache):
+            for task_item in parser.feed(piece):
+                if story_id is not None:
+                    task_data = {**task_item, "status": "todo"}
+                    task_id = await task.create_task(task_data)
+                    await relationships.link_task_to_story(task_id, story_id, task=task_data)
+                    task_item = {"id": task_id, **task_data, "story_id": story_id}
+                tasks.append(task_item)
+                yield {"event": "task", "data": task_item}
+    except ValueError:
+        yield {"event": "error", "data": {"detail": "Invalid response format from agent"}}
+        return
+    except Exception as e:
+        yield {"event": "error", "data": {"detail": f"Error during agent run: {e}"}}
+        return
+
+    if not tasks:
+        yield {"event": "error", "data": {"detail": "No response received from agent."}}
+        return
+    yield {"event": "done", "data": {"story_id": story_id, "tasks": tasks}}
+
 async def create_story_logic(story_data: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        story_id = story.create_story(story_data)
+        story_id = await story.create_story(story_data)
         return {"id": story_id, "message": "Story created successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 async def get_story_logic(story_id: str) -> Dict[str, Any]:
     try:
-        result = story.get_story(story_id)
+        result = await story.get_story(story_id)
         if not result:
             raise HTTPException(status_code=404, detail="Story not found")
         return result
@@ -67,49 +80,80 @@ async def get_story_logic(story_id: str) -> Dict[str, Any]:
 
 async def update_story_logic(story_id: str, updates: Dict[str, Any]) -> Dict[str, str]:
     try:
-        story.update_story(story_id, updates)
+        await story.update_story(story_id, updates)
         return {"message": "Story updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 async def delete_story_logic(story_id: str) -> Dict[str, str]:
     try:
-        story.delete_story(story_id)
+        await story.delete_story(story_id)
         return {"message": "Story deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def list_stories_logic() -> Dict[str, List[Dict[str, Any]]]:
+async def list_stories_logic(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Dict[str, Any]:
+    try:
+        stories, next_page_token = await story.list_stories(filters, limit, page_token)
+        return {"stories": stories, "next_page_token": next_page_token}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def stream_stories_logic(
+    filters: Optional[Dict[str, Any]] = None,
+    page_token: Optional[str] = None,
+) -> AsyncIterator[dict]:
     try:
-        stories = story.list_stories()
-        return {"stories": stories}
+        return story.stream_stories(filters, page_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 async def add_comment_logic(story_id: str, comment: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        comment_id = story.add_comment(story_id, comment)
+        comment_id = await story.add_comment(story_id, comment)
         return {"id": comment_id, "message": "Comment added successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def get_comments_logic(story_id: str) -> Dict[str, List[Dict[str, Any]]]:
+async def get_comments_logic(
+    story_id: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Dict[str, Any]:
     try:
-        comments = story.get_comments(story_id)
-        return {"comments": comments}
+        comments, next_page_token = await story.get_comments(story_id, limit, page_token, newest_first)
+        return {"comments": comments, "next_page_token": next_page_token}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 async def log_activity_logic(story_id: str, activity: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        activity_id = story.log_activity(story_id, activity)
+        activity_id = await story.log_activity(story_id, activity)
         return {"id": activity_id, "message": "Activity logged successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def get_activity_log_logic(story_id: str) -> Dict[str, List[Dict[str, Any]]]:
+async def get_activity_log_logic(
+    story_id: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Dict[str, Any]:
     try:
-        activity_log = story.get_activity_log(story_id)
-        return {"activity_log": activity_log}
+        activity_log, next_page_token = await story.get_activity_log(story_id, limit, page_token, newest_first)
+        return {"activity_log": activity_log, "next_page_token": next_page_token}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
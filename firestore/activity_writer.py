@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from firestore.bulk import WriteUnit, bulk_commit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_MAX_QUEUE = 10000
+# Flushes an entry takes part in before it is dropped
+MAX_WRITE_ATTEMPTS = 3
+
+# (document reference, data, failed attempts so far)
+PendingEntry = Tuple[Any, dict, int]
+
+
+class ActivityWriter:
+    """
+    Write-behind buffer for activity log entries.
+
+    When enabled (ACTIVITY_WRITE_BEHIND=1) and started, ``add`` assigns the
+    entry its document ID and returns it at once; the entry is queued and
+    written by a background flush once ``flush_size`` entries are waiting or
+    ``flush_interval_seconds`` have passed, whichever comes first. A flush
+    commits everything queued with ``bulk_commit``, so a busy sprint review
+    costs one round trip per few hundred entries instead of one per entry.
+    Only round trips drop: each entry is still its own document, and so one
+    billed write, because the feeds page, export and return IDs per entry.
+    When the queue holds ``max_queue`` entries, ``add`` flushes before
+    queueing so memory stays bounded. ``stop`` drains the queue.
+
+    Entries only show up in the activity feeds once flushed. Entries that
+    still fail after ``MAX_WRITE_ATTEMPTS`` flushes are logged and dropped.
+    Without write-behind, or before ``start``, ``add`` writes directly.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+    ):
+        self.enabled = enabled
+        self.flush_size = flush_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_queue = max_queue
+        self._pending: Deque[PendingEntry] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "ActivityWriter":
+        """Build the writer from ACTIVITY_WRITE_BEHIND, ACTIVITY_FLUSH_SIZE, ACTIVITY_FLUSH_INTERVAL_SECONDS and ACTIVITY_MAX_QUEUE."""
+        return cls(
+            enabled=os.getenv("ACTIVITY_WRITE_BEHIND", "").lower() in ("1", "true", "yes"),
+            flush_size=int(os.getenv("ACTIVITY_FLUSH_SIZE", DEFAULT_FLUSH_SIZE)),
+            flush_interval_seconds=float(os.getenv("ACTIVITY_FLUSH_INTERVAL_SECONDS", DEFAULT_FLUSH_INTERVAL_SECONDS)),
+            max_queue=int(os.getenv("ACTIVITY_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopping
+
+    async def add(self, collection_ref, data: dict) -> str:
+        """
+        Write (or queue) one entry of an ``activity`` subcollection.
+
+        Args:
+            collection_ref: The ``activity`` subcollection of a task, story or sprint
+            data: The entry
+
+        Returns:
+            ID of the entry's document
+        """
+        if not self.running:
+            _, reference = await collection_ref.add(data)
+            return reference.id
+        if len(self._pending) >= self.max_queue:
+            await self.flush()
+        reference = collection_ref.document()
+        self._pending.append((reference, data, 0))
+        self.enqueued += 1
+        if len(self._pending) >= self.flush_size:
+            self._wake.set()
+        return reference.id
+
+    def start(self) -> None:
+        """Start the background flush loop on the running event loop."""
+        if not self.enabled or self._task is not None:
+            return
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(
+            f"Activity write-behind started (flush at {self.flush_size} entries or every {self.flush_interval_seconds}s)"
+        )
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write everything still queued."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        while self._pending:
+            await self.flush()
+        self._task = None
+        logger.info(f"Activity write-behind stopped ({self.written} written, {self.dropped} dropped)")
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Activity flush failed")
+
+    async def flush(self) -> None:
+        """Commit every queued entry; failed ones are queued again for the next flush."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            entries = list(self._pending)
+            self._pending.clear()
+            started = time.perf_counter()
+            results = await bulk_commit([
+                WriteUnit(reference.path, [("create", reference, data)]) for reference, data, _ in entries
+            ])
+            elapsed = time.perf_counter() - started
+
+            for (reference, data, attempts), result in zip(entries, results):
+                if result["success"]:
+                    self.written += 1
+                elif attempts + 1 < MAX_WRITE_ATTEMPTS:
+                    self._pending.append((reference, data, attempts + 1))
+                else:
+                    self.dropped += 1
+                    logger.error(f"Dropping activity entry {reference.path}: {result['error']}")
+            self.flushes += 1
+            self.flush_seconds += elapsed
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "queue_depth": len(self._pending),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "flush_seconds": self.flush_seconds,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition of the queue depth and flush totals."""
+        stats = self.stats()
+        metrics = (
+            ("activity_writer_queue_depth", "gauge", "queue_depth"),
+            ("activity_writer_enqueued_total", "counter", "enqueued"),
+            ("activity_writer_written_total", "counter", "written"),
+            ("activity_writer_dropped_total", "counter", "dropped"),
+            ("activity_writer_flushes_total", "counter", "flushes"),
+            ("activity_writer_flush_seconds_total", "counter", "flush_seconds"),
+            ("activity_writer_flush_seconds_max", "gauge", "max_flush_seconds"),
+        )
+        lines = []
+        for name, kind, key in metrics:
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {stats[key]}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared per-process writer, started and drained by the app lifespan
+activity_writer = ActivityWriter.from_env()
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from firestore.firestore_client import db
+
+# Document references sent per BatchGetDocuments RPC. Keeps a single request
+# well under Firestore's payload limits while an epic with hundreds of
+# children still resolves in a couple of round trips.
+GET_ALL_CHUNK_SIZE = 300
+
+
+class ReadStats:
+    """Counts the round trips and documents a batched read cost."""
+
+    def __init__(self):
+        self.rpcs = 0
+        self.documents = 0
+
+    def __repr__(self) -> str:
+        return f"ReadStats(rpcs={self.rpcs}, documents={self.documents})"
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def get_document(
+    collection: str,
+    doc_id: str,
+    field_paths: Optional[List[str]] = None,
+    stats: Optional[ReadStats] = None,
+) -> Optional[Dict]:
+    """Fetch one document (optionally only some fields), or None if it doesn't exist."""
+    snap = await db.collection(collection).document(doc_id).get(field_paths=field_paths)
+    if stats is not None:
+        stats.rpcs += 1
+        stats.documents += 1 if snap.exists else 0
+    if not snap.exists:
+        return None
+    return (snap.to_dict() or {}) | {"id": snap.id}
+
+
+async def get_documents(
+    collection: str,
+    doc_ids: Iterable[str],
+    field_paths: Optional[List[str]] = None,
+    stats: Optional[ReadStats] = None,
+    chunk_size: int = GET_ALL_CHUNK_SIZE,
+) -> List[Dict]:
+    """
+    Fetch many documents of one collection with batched multi-gets.
+
+    IDs are de-duplicated and split into chunks of ``chunk_size``; every chunk
+    is a single ``get_all`` round trip and chunks are fetched concurrently.
+    Missing documents are skipped and the result keeps the order of ``doc_ids``.
+
+    Args:
+        collection: Name of the collection the IDs belong to
+        doc_ids: Document IDs to resolve
+        field_paths: Only return these fields (plus ``id``) when given
+        stats: Optional counter updated with the RPCs issued
+
+    Returns:
+        List of document dicts with their IDs
+    """
+    ordered_ids = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+    if not ordered_ids:
+        return []
+
+    collection_ref = db.collection(collection)
+
+    async def fetch_chunk(chunk: List[str]) -> Dict[str, Dict]:
+        refs = [collection_ref.document(doc_id) for doc_id in chunk]
+        found = {}
+        async for snap in db.get_all(refs, field_paths=field_paths):
+            if snap.exists:
+                found[snap.id] = (snap.to_dict() or {}) | {"id": snap.id}
+        return found
+
+    results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in _chunks(ordered_ids, chunk_size)))
+
+    by_id = {}
+    for found in results:
+        by_id.update(found)
+    if stats is not None:
+        stats.rpcs += len(results)
+        stats.documents += len(by_id)
+    return [by_id[doc_id] for doc_id in ordered_ids if doc_id in by_id]
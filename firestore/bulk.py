@@ -0,0 +1,115 @@
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from firestore.firestore_client import db
+
+# Firestore rejects commits with more than 500 writes
+BATCH_WRITE_LIMIT = 500
+# Batches committed at the same time by one bulk operation
+DEFAULT_CONCURRENCY = int(os.getenv("BULK_WRITE_CONCURRENCY", "8"))
+
+# (operation, document reference, data); operation is set/create/update/delete
+Write = Tuple[str, Any, Optional[dict]]
+
+
+class WriteUnit:
+    """The writes for one item of a bulk operation; they always land in the same commit."""
+
+    def __init__(self, key: str, writes: List[Write]):
+        self.key = key
+        self.writes = writes
+
+
+def _pack(units: List[WriteUnit], capacity: int) -> List[List[WriteUnit]]:
+    """Group units into batches of at most ``capacity`` writes, keeping their order."""
+    batches: List[List[WriteUnit]] = []
+    current: List[WriteUnit] = []
+    size = 0
+    for unit in units:
+        if len(unit.writes) > capacity:
+            raise ValueError(f"Item {unit.key} needs {len(unit.writes)} writes, more than one batch can hold")
+        if current and size + len(unit.writes) > capacity:
+            batches.append(current)
+            current, size = [], 0
+        current.append(unit)
+        size += len(unit.writes)
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def bulk_commit(
+    units: List[WriteUnit],
+    shared_writes: Optional[Callable[[List[WriteUnit]], List[Write]]] = None,
+    shared_write_count: int = 0,
+    chunk_size: int = BATCH_WRITE_LIMIT,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """
+    Commit an arbitrary number of writes as auto-chunked, parallel batches.
+
+    Units are packed into batches below the 500-write limit and the batches
+    are committed concurrently. Each batch is atomic; when one fails, its
+    units are retried one commit each so that only the offending items are
+    reported as failed. A unit with more writes than one batch can hold is
+    reported as failed without being written.
+
+    Args:
+        units: Writes grouped per reported item
+        shared_writes: Builds extra writes added to every batch for the units
+            it holds (e.g. one ArrayUnion on a parent document)
+        shared_write_count: Number of writes ``shared_writes`` adds per batch
+        chunk_size: Maximum writes per batch
+        concurrency: Maximum batches in flight
+
+    Returns:
+        One ``{"id", "success", "error"}`` result per unit, in input order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    results: Dict[int, Dict[str, Any]] = {}
+    position = {id(unit): index for index, unit in enumerate(units)}
+
+    async def commit(batch_units: List[WriteUnit]) -> None:
+        batch = db.batch()
+        for unit in batch_units:
+            for operation, reference, data in unit.writes:
+                if operation == "delete":
+                    batch.delete(reference)
+                else:
+                    getattr(batch, operation)(reference, data)
+        if shared_writes is not None:
+            for operation, reference, data in shared_writes(batch_units):
+                getattr(batch, operation)(reference, data)
+        await batch.commit()
+
+    async def run(batch_units: List[WriteUnit]) -> None:
+        async with semaphore:
+            try:
+                await commit(batch_units)
+            except Exception as e:
+                if len(batch_units) == 1:
+                    results[position[id(batch_units[0])]] = {
+                        "id": batch_units[0].key, "success": False, "error": str(e)
+                    }
+                    return
+            else:
+                for unit in batch_units:
+                    results[position[id(unit)]] = {"id": unit.key, "success": True, "error": None}
+                return
+        # Isolate the failing items of the batch
+        await asyncio.gather(*(run([unit]) for unit in batch_units))
+
+    capacity = chunk_size - shared_write_count
+    fitting = []
+    for index, unit in enumerate(units):
+        if len(unit.writes) > capacity:
+            results[index] = {
+                "id": unit.key,
+                "success": False,
+                "error": f"Needs {len(unit.writes)} writes, more than the {capacity} one commit can hold",
+            }
+        else:
+            fitting.append(unit)
+    await asyncio.gather(*(run(batch_units) for batch_units in _pack(fitting, capacity)))
+    return [results[index] for index in range(len(units))]
@@ -0,0 +1,131 @@
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+DEFAULT_MAX_SIZE = 1000
+DEFAULT_TTL_SECONDS = 30.0
+
+
+class EntityCache:
+    """
+    Bounded read-through cache for single documents, keyed by (collection, id).
+
+    Entries are evicted least-recently-used once ``max_size`` is reached and
+    expire ``ttl_seconds`` after they were stored, which bounds how stale a
+    write made by another worker can look. Writes made by this worker
+    invalidate the affected entries immediately. Callers get deep copies, so
+    mutating a returned document never corrupts the cache.
+
+    A read that started before an invalidation can finish after it, so
+    callers take ``generation()`` before reading and pass it to ``set``;
+    the value is dropped if its key was invalidated in between. The last
+    ``max_size`` invalidations are remembered per key; a read older than
+    the ones forgotten since is not cached at all.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; key -> generation of its last one
+        self._generation = 0
+        self._invalidated: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._forgotten = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+
+    @classmethod
+    def from_env(cls) -> "EntityCache":
+        """Build the cache from ENTITY_CACHE_MAX_SIZE and ENTITY_CACHE_TTL_SECONDS (0 disables it)."""
+        return cls(
+            max_size=int(os.getenv("ENTITY_CACHE_MAX_SIZE", DEFAULT_MAX_SIZE)),
+            ttl_seconds=float(os.getenv("ENTITY_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        """Return a copy of the cached document, or None on a miss."""
+        if not self.enabled:
+            return None
+        key = (collection, doc_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def generation(self) -> int:
+        """Token to take before reading a document that will be passed to ``set``."""
+        with self._lock:
+            return self._generation
+
+    def set(self, collection: str, doc_id: str, value: dict, generation: int) -> None:
+        """Cache ``value`` unless the document was invalidated since ``generation`` was taken."""
+        if not self.enabled:
+            return
+        key = (collection, doc_id)
+        with self._lock:
+            if self._invalidated.get(key, self._forgotten) > generation:
+                self.stale_sets += 1
+                return
+            self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, collection: str, *doc_ids: str) -> None:
+        """Drop the given documents so the next read goes to Firestore."""
+        with self._lock:
+            for doc_id in doc_ids:
+                key = (collection, doc_id)
+                self._generation += 1
+                self._invalidated[key] = self._generation
+                self._invalidated.move_to_end(key)
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+            while len(self._invalidated) > max(self.max_size, 1):
+                self._forgotten = self._invalidated.popitem(last=False)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._invalidated.clear()
+            self._forgotten = self._generation
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_sets": self.stale_sets,
+            }
+
+
+# Shared per-process cache
+entity_cache = EntityCache.from_env()
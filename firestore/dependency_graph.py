@@ -0,0 +1,182 @@
+import asyncio
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from firestore.firestore_client import db
+
+TASK_COLLECTION = "tasks"
+META_COLLECTION = "meta"
+GRAPH_META_DOC = "task_dependency_graph"
+# Fields of the meta document a freshness check needs
+META_FIELDS = ["version", "seq", "changes"]
+# Dependency writes whose changed task IDs the meta document remembers
+CHANGE_LOG_SIZE = 100
+
+
+class DependencyGraph:
+    """
+    In-process index of the task dependency graph.
+
+    Keeps an adjacency list (task -> tasks it depends on) and a reverse
+    adjacency list (task -> tasks that depend on it). The index is loaded
+    once from the ``tasks`` collection and then updated incrementally by the
+    dependency writers in ``firestore/relationships.py``.
+
+    Every dependency write also replaces a version token on the
+    ``meta/task_dependency_graph`` document, preconditioned on the version
+    this process last saw, and appends the IDs of the tasks whose
+    ``dependencies`` it changed to a log of the last ``CHANGE_LOG_SIZE``
+    writes there, numbered by ``seq``. Checking freshness is therefore a
+    single document read; after a change made by another worker only the
+    tasks logged since this process's ``seq`` are re-read. A worker that
+    fell further behind than the log, or a version written without one
+    (e.g. by an import), reloads the whole graph, which reads every task.
+    """
+
+    def __init__(self):
+        self._forward: Dict[str, Set[str]] = {}
+        self._reverse: Dict[str, Set[str]] = {}
+        self._version: Optional[str] = None
+        self._seq = 0
+        self._changes: List[Dict[str, Any]] = []
+        # Version token -> (seq, change log) written by a staged bump
+        self._staged: Dict[str, Tuple[int, List[Dict[str, Any]]]] = {}
+        self._meta_update_time = None
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def meta_ref(self):
+        return db.collection(META_COLLECTION).document(GRAPH_META_DOC)
+
+    async def ensure_fresh(self, meta_snapshot=None) -> None:
+        """
+        Make sure the index reflects the latest committed graph.
+
+        Args:
+            meta_snapshot: Already fetched snapshot of the graph meta document;
+                read from Firestore when not given
+        """
+        if meta_snapshot is None:
+            meta_snapshot = await self.meta_ref.get()
+        meta = (meta_snapshot.to_dict() or {}) if meta_snapshot.exists else {}
+        remote_version = meta.get("version")
+
+        if self._loaded and remote_version == self._version:
+            self._meta_update_time = meta_snapshot.update_time if meta_snapshot.exists else None
+            return
+
+        async with self._lock:
+            if self._loaded and remote_version == self._version:
+                return
+            remote_seq = meta.get("seq", 0)
+            changes = meta.get("changes", [])
+            missed = [change for change in changes if change["seq"] > self._seq]
+            if self._loaded and missed and len(missed) == remote_seq - self._seq:
+                await self._refresh({task_id for change in missed for task_id in change["tasks"]})
+            else:
+                await self._load()
+            self._version = remote_version
+            self._seq = remote_seq
+            self._changes = changes
+            self._meta_update_time = meta_snapshot.update_time if meta_snapshot.exists else None
+            self._loaded = True
+
+    async def _load(self) -> None:
+        forward: Dict[str, Set[str]] = {}
+        reverse: Dict[str, Set[str]] = {}
+        query = db.collection(TASK_COLLECTION).select(["dependencies"])
+        async for snap in query.stream():
+            dependencies = (snap.to_dict() or {}).get("dependencies", [])
+            if dependencies:
+                forward[snap.id] = set(dependencies)
+                for dep_id in dependencies:
+                    reverse.setdefault(dep_id, set()).add(snap.id)
+        self._forward = forward
+        self._reverse = reverse
+
+    async def _refresh(self, task_ids: Set[str]) -> None:
+        """Re-read the ``dependencies`` of the given tasks; a deleted task loses its edges."""
+        references = [db.collection(TASK_COLLECTION).document(task_id) for task_id in sorted(task_ids)]
+        async for snap in db.get_all(references, field_paths=["dependencies"]):
+            dependencies = (snap.to_dict() or {}).get("dependencies", []) if snap.exists else []
+            for dep_id in self._forward.pop(snap.id, set()):
+                self._reverse.get(dep_id, set()).discard(snap.id)
+            if dependencies:
+                self._forward[snap.id] = set(dependencies)
+                for dep_id in dependencies:
+                    self._reverse.setdefault(dep_id, set()).add(snap.id)
+
+    def stage_version_bump(self, batch, task_ids: Iterable[str]) -> str:
+        """
+        Add the version token write to ``batch``.
+
+        The write is preconditioned on the meta document not having changed
+        since the last freshness check, so the batch fails instead of silently
+        racing a dependency change made by another worker.
+
+        Args:
+            batch: The batch that changes the dependencies
+            task_ids: Tasks whose ``dependencies`` the batch changes (or deletes)
+
+        Returns:
+            The new version token, to be passed to ``commit_version``
+        """
+        token = uuid.uuid4().hex
+        seq = self._seq + 1
+        changes = (self._changes + [{"seq": seq, "tasks": sorted(set(task_ids))}])[-CHANGE_LOG_SIZE:]
+        data = {"version": token, "seq": seq, "changes": changes}
+        if self._meta_update_time is None:
+            batch.create(self.meta_ref, data)
+        else:
+            batch.update(self.meta_ref, data, option=db.write_option(last_update_time=self._meta_update_time))
+        self._staged[token] = (seq, changes)
+        return token
+
+    def commit_version(self, token: str, update_time) -> None:
+        """Record the version token written by a successful batch commit."""
+        self._seq, self._changes = self._staged.pop(token)
+        # Bumps staged alongside this one were preconditioned on the same update time and failed
+        self._staged.clear()
+        self._version = token
+        self._meta_update_time = update_time
+
+    def invalidate(self) -> None:
+        """Force a full reload on the next freshness check."""
+        self._loaded = False
+        self._seq = 0
+        self._changes = []
+
+    def add_edge(self, task_id: str, depends_on_task_id: str) -> None:
+        self._forward.setdefault(task_id, set()).add(depends_on_task_id)
+        self._reverse.setdefault(depends_on_task_id, set()).add(task_id)
+
+    def remove_edge(self, task_id: str, depends_on_task_id: str) -> None:
+        self._forward.get(task_id, set()).discard(depends_on_task_id)
+        self._reverse.get(depends_on_task_id, set()).discard(task_id)
+
+    def dependencies(self, task_id: str) -> List[str]:
+        """IDs of the tasks ``task_id`` depends on."""
+        return sorted(self._forward.get(task_id, ()))
+
+    def dependents(self, task_id: str) -> List[str]:
+        """IDs of the tasks that depend on ``task_id``."""
+        return sorted(self._reverse.get(task_id, ()))
+
+    def reaches(self, start_id: str, target_id: str) -> bool:
+        """Whether ``target_id`` is reachable from ``start_id`` along dependency edges."""
+        stack = [start_id]
+        seen = {start_id}
+        while stack:
+            node = stack.pop()
+            if node == target_id:
+                return True
+            for next_id in self._forward.get(node, ()):
+                if next_id not in seen:
+                    seen.add(next_id)
+                    stack.append(next_id)
+        return False
+
+
+# Shared per-process index
+dependency_graph = DependencyGraph()
@@ -1,46 +1,65 @@
-from google.cloud import firestore
-from typing import List, Optional, Dict
+from firestore.firestore_client import db
+from firestore.cache import entity_cache
+from typing import Any, AsyncIterator, List, Optional, Dict
+from firestore.pagination import DEFAULT_PAGE_SIZE, Page, list_page, stream_page
 
-# Initialize Firestore client
-db = firestore.Client()
 COLLECTION = 'developers'
 
-def create_developer(developer_data: dict) -> str:
+# Fields list_developers can filter on server-side, with their Firestore operator
+DEVELOPER_FILTERS = {
+    "status": "==",
+    "experience_level": "==",
+    "skills": "array_contains",
+}
+
+async def create_developer(developer_data: dict) -> str:
     """Create a new developer document in Firestore."""
     doc_ref = db.collection(COLLECTION).document()
-    doc_ref.set(developer_data)
+    await doc_ref.set(developer_data)
     return doc_ref.id
 
-def get_developer(developer_id: str) -> Optional[dict]:
+async def get_developer(developer_id: str) -> Optional[dict]:
     """Get a developer by ID."""
+    cached = entity_cache.get(COLLECTION, developer_id)
+    if cached is not None:
+        return cached
     doc_ref = db.collection(COLLECTION).document(developer_id)
-    doc = doc_ref.get()
+    generation = entity_cache.generation()
+    doc = await doc_ref.get()
     if doc.exists:
         data = doc.to_dict()
         data['id'] = doc.id
+        entity_cache.set(COLLECTION, developer_id, data, generation)
         return data
     return None
 
-def update_developer(developer_id: str, developer_data: dict) -> None:
+async def update_developer(developer_id: str, developer_data: dict) -> None:
     """Update an existing developer document."""
     doc_ref = db.collection(COLLECTION).document(developer_id)
-    if not doc_ref.get().exists:
+    if not (await doc_ref.get()).exists:
         raise ValueError(f"Developer with ID {developer_id} not found")
-    doc_ref.update(developer_data)
+    await doc_ref.update(developer_data)
+    entity_cache.invalidate(COLLECTION, developer_id)
 
-def delete_developer(developer_id: str) -> None:
+async def delete_developer(developer_id: str) -> None:
     """Delete a developer document."""
     doc_ref = db.collection(COLLECTION).document(developer_id)
-    if not doc_ref.get().exists:
+    if not (await doc_ref.get()).exists:
         raise ValueError(f"Developer with ID {developer_id} not found")
-    doc_ref.delete()
+    await doc_ref.delete()
+    entity_cache.invalidate(COLLECTION, developer_id)
 
-def list_developers() -> List[dict]:
-    """List all developers."""
-    docs = db.collection(COLLECTION).stream()
-    developers = []
-    for doc in docs:
-        data = doc.to_dict()
-        data['id'] = doc.id
-        developers.append(data)
-    return developers 
\ No newline at end of file
+async def list_developers(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Page:
+    """List one page of developers; ``limit=None`` opts into a full scan."""
+    return await list_page(db.collection(COLLECTION), filters, DEVELOPER_FILTERS, limit, page_token)
+
+def stream_developers(
+    filters: Optional[Dict[str, Any]] = None,
+    page_token: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Every matching developer, yielded one at a time for NDJSON exports."""
+    return stream_page(db.collection(COLLECTION), filters, DEVELOPER_FILTERS, page_token)
@@ -1,55 +1,65 @@
-from dotenv import load_dotenv
-import os
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from firestore.firestore_client import get_collection_ref, db
-
-load_dotenv()
-print("GOOGLE_APPLICATION_CREDENTIALSepic:", os.getenv("GOOGLE_APPLICATION_CREDENTIALS"))
+from firestore.firestore_client import get_collection_ref
+from firestore.batching import get_documents
+from firestore.cache import entity_cache
+from firestore.replica import board_replica
+from firestore.pagination import DEFAULT_PAGE_SIZE, Page, list_page, stream_page
 
 EPIC_COLLECTION = "epics"
+# Epics buffered per story-title multi-get while streaming
+EPIC_STREAM_CHUNK_SIZE = 100
 
-def save_epic(epic_id: str, data: dict):
-    ref = get_collection_ref(EPIC_COLLECTION)
-    ref.document(epic_id).set(data)
+# Fields list_epics can filter on server-side, with their Firestore operator
+EPIC_FILTERS = {
+    "status": "==",
+    "priority": "==",
+    "owner": "==",
+}
 
-def get_epic(epic_id: str):
+async def save_epic(epic_id: str, data: dict):
     ref = get_collection_ref(EPIC_COLLECTION)
-    return ref.document(epic_id).get().to_dict()
+    await ref.document(epic_id).set(data)
+    entity_cache.invalidate(EPIC_COLLECTION, epic_id)
 
-def list_epics():
+async def get_epic(epic_id: str):
+    if board_replica.is_ready(EPIC_COLLECTION):
+        result = board_replica.get(EPIC_COLLECTION, epic_id)
+        if result is not None:
+            result.pop("id")
+        return result
+    cached = entity_cache.get(EPIC_COLLECTION, epic_id)
+    if cached is not None:
+        return cached
     ref = get_collection_ref(EPIC_COLLECTION)
-    epics = []
-    all_story_ids = set()  # Track unique story IDs across all epics
-    epic_docs = []  # Store epic docs temporarily
-    
-    # First pass: collect all epic data and story IDs
-    for doc in ref.stream():
-        epic_data = doc.to_dict()
-        epic_data["id"] = doc.id
+    generation = entity_cache.generation()
+    result = (await ref.document(epic_id).get()).to_dict()
+    if result is not None:
+        entity_cache.set(EPIC_COLLECTION, epic_id, result, generation)
+    return result
+
+async def _attach_story_titles(epic_docs: List[dict]) -> List[dict]:
+    """Replace each epic's story IDs with ``{id, title}`` of the stories that exist."""
+    all_story_ids = set()  # Track unique story IDs across the epics
+    for epic_data in epic_docs:
         story_ids = epic_data.get("stories", [])
         if story_ids:
             all_story_ids.update(story_ids)
-        epic_docs.append(epic_data)
     
-    # Batch get all stories in one operation
-    stories_dict = {}
-    if all_story_ids:
-        stories_ref = get_collection_ref("stories")
-        # Convert to list because get() expects a sequence
-        story_refs = [stories_ref.document(sid) for sid in all_story_ids]
-        # Get all stories in a single batch operation
-        story_snapshots = db.get_all(story_refs)
-        
-        # Create a lookup dictionary
-        for snap in story_snapshots:
-            if snap.exists:
-                story_data = snap.to_dict()
-                stories_dict[snap.id] = {
-                    "id": snap.id,
-                    "title": story_data.get("title", "Untitled Story")
-                }
+    # Batch get all story titles with chunked multi-gets (or from the replica)
+    if board_replica.is_ready("stories"):
+        story_docs = [board_replica.get("stories", sid) for sid in all_story_ids]
+    else:
+        story_docs = await get_documents("stories", all_story_ids, field_paths=["title"])
+    stories_dict = {
+        story_data["id"]: {
+            "id": story_data["id"],
+            "title": story_data.get("title", "Untitled Story")
+        }
+        for story_data in story_docs
+        if story_data is not None
+    }
     
-    # Second pass: attach story data to epics
     for epic_data in epic_docs:
         story_ids = epic_data.get("stories", [])
         epic_data["stories"] = [
@@ -57,25 +67,70 @@ def list_epics():
             for sid in story_ids
             if sid in stories_dict
         ]
-        epics.append(epic_data)
-    
-    return epics
+    return epic_docs
+
+async def list_epics(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Page:
+    """List one page of epics with their story titles; ``limit=None`` opts into a full scan."""
+    ref = get_collection_ref(EPIC_COLLECTION)
+    if board_replica.is_ready(EPIC_COLLECTION):
+        epic_docs, next_page_token = board_replica.list_page(EPIC_COLLECTION, filters, EPIC_FILTERS, limit, page_token)
+    else:
+        epic_docs, next_page_token = await list_page(ref, filters, EPIC_FILTERS, limit, page_token)
+    return await _attach_story_titles(epic_docs), next_page_token
+
+def stream_epics(
+    filters: Optional[Dict[str, Any]] = None,
+    page_token: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """
+    Every matching epic with its story titles, yielded one at a time for NDJSON exports.
+
+    Epics are buffered ``EPIC_STREAM_CHUNK_SIZE`` at a time so their story
+    titles are resolved with one multi-get per chunk rather than per epic.
+    """
+    if board_replica.is_ready(EPIC_COLLECTION):
+        epic_docs = board_replica.stream(EPIC_COLLECTION, filters, EPIC_FILTERS, page_token)
+    else:
+        epic_docs = stream_page(get_collection_ref(EPIC_COLLECTION), filters, EPIC_FILTERS, page_token)
+
+    async def with_titles() -> AsyncIterator[dict]:
+        chunk = []
+        async for epic_data in epic_docs:
+            chunk.append(epic_data)
+            if len(chunk) == EPIC_STREAM_CHUNK_SIZE:
+                for item in await _attach_story_titles(chunk):
+                    yield item
+                chunk = []
+        for item in await _attach_story_titles(chunk):
+            yield item
+
+    return with_titles()
+
+def new_epic_id() -> str:
+    """An unused epic ID, for writes that create the epic together with other documents"""
+    return get_collection_ref(EPIC_COLLECTION).document().id
 
-def create_epic(data: dict) -> str:
+async def create_epic(data: dict) -> str:
     """Creates a new epic document and returns its ID"""
     ref = get_collection_ref(EPIC_COLLECTION)
     doc_ref = ref.document()  # Creates a document with auto-generated ID
-    doc_ref.set(data)
+    await doc_ref.set(data)
     return doc_ref.id
 
-def update_epic(epic_id: str, data: dict):
+async def update_epic(epic_id: str, data: dict):
     """Updates an existing epic document with the provided data"""
     ref = get_collection_ref(EPIC_COLLECTION)
     doc_ref = ref.document(epic_id)
-    doc_ref.update(data)
+    await doc_ref.update(data)
+    entity_cache.invalidate(EPIC_COLLECTION, epic_id)
 
-def delete_epic(epic_id: str):
+async def delete_epic(epic_id: str):
     """Deletes an epic document"""
     ref = get_collection_ref(EPIC_COLLECTION)
     doc_ref = ref.document(epic_id)
-    doc_ref.delete()
+    await doc_ref.delete()
+    entity_cache.invalidate(EPIC_COLLECTION, epic_id)
@@ -0,0 +1,156 @@
+"""
+Time-ordered, cursor-paginated feeds of the ``comments`` and ``activity`` subcollections.
+
+A feed is ordered by the entry's timestamp with the document path as the
+tie-breaker; the page token carries both, so pages stay stable while new
+entries arrive. ``recent_activity`` reads the same subcollections across
+every task, story and sprint with one collection group query per kind
+(see the ``fieldOverrides`` in ``firestore.indexes.json``); its page token
+holds one such cursor per kind, since a cursor is only meaningful to the
+query whose results it came from.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from google.cloud import firestore
+
+from firestore.firestore_client import db
+from firestore.pagination import DEFAULT_PAGE_SIZE, DOCUMENT_ID, Page, decode_page_token, encode_page_token
+
+# Subcollection -> field its entries are ordered by
+FEED_ORDER_FIELDS = {
+    "comments": "created_at",
+    "activity": "timestamp",
+}
+
+
+def _decode_cursor(page_token: str) -> Tuple[datetime, str]:
+    cursor = decode_page_token(page_token)
+    try:
+        value, name = cursor
+        return datetime.fromisoformat(value), str(name)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid page_token")
+
+
+def _decode_group_cursors(page_token: str) -> Dict[str, Tuple[datetime, str]]:
+    cursors = {}
+    for cursor in decode_page_token(page_token):
+        try:
+            kind, value, name = cursor
+            cursors[str(kind)] = (datetime.fromisoformat(value), str(name))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid page_token")
+    return cursors
+
+
+def _ordered(query, order_field: str, newest_first: bool, cursor: Optional[Tuple[datetime, str]], group: bool):
+    direction = firestore.Query.DESCENDING if newest_first else firestore.Query.ASCENDING
+    query = query.order_by(order_field, direction=direction).order_by(DOCUMENT_ID, direction=direction)
+    if cursor:
+        value, name = cursor
+        # Collection group cursors need the full document path
+        query = query.start_after({order_field: value, DOCUMENT_ID: db.document(name) if group else name})
+    return query
+
+
+async def list_feed(
+    collection: str,
+    doc_id: str,
+    subcollection: str,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Page:
+    """
+    Read one page of a document's comments or activity, in time order.
+
+    Args:
+        collection: Collection of the parent document (``tasks``, ``stories``, ``sprints``)
+        doc_id: ID of the parent document
+        subcollection: ``comments`` or ``activity``
+        limit: Page size; ``None`` returns the whole feed
+        page_token: Token returned with the previous page
+        newest_first: Return the latest entries first
+
+    Returns:
+        The entries of the page and the token of the next page (None on the last page)
+
+    Raises:
+        ValueError: If the page token is invalid
+    """
+    order_field = FEED_ORDER_FIELDS[subcollection]
+    feed_ref = db.collection(collection).document(doc_id).collection(subcollection)
+    cursor = _decode_cursor(page_token) if page_token else None
+    query = _ordered(feed_ref, order_field, newest_first, cursor, group=False)
+    if limit is not None:
+        query = query.limit(limit)
+    items = [(doc.to_dict() or {}) | {"id": doc.id} async for doc in query.stream()]
+
+    next_page_token = None
+    if limit is not None and len(items) == limit:
+        next_page_token = encode_page_token([items[-1][order_field].isoformat(), items[-1]["id"]])
+    return items, next_page_token
+
+
+async def recent_activity(
+    limit: int = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    kinds: Iterable[str] = tuple(FEED_ORDER_FIELDS),
+) -> Page:
+    """
+    The latest comments and activity entries across the whole board, newest first.
+
+    Each kind is read with a single collection group query of at most
+    ``limit`` entries, resuming after the last entry of that kind already
+    returned; the results are merged by time, so one page costs one query
+    per kind however many tasks, stories and sprints there are.
+
+    Args:
+        limit: Page size
+        page_token: Token returned with the previous page
+        kinds: Subcollections to include (``activity``, ``comments``)
+
+    Returns:
+        Entries with ``kind``, ``entity_type``, ``entity_id`` and ``at`` added,
+        and the token of the next page (None on the last page)
+
+    Raises:
+        ValueError: If a kind is unknown or the page token is invalid
+    """
+    kinds = list(dict.fromkeys(kinds))
+    for kind in kinds:
+        if kind not in FEED_ORDER_FIELDS:
+            raise ValueError(f"Unknown feed kind '{kind}'")
+
+    cursors = _decode_group_cursors(page_token) if page_token else {}
+
+    async def read(kind: str) -> List[Dict[str, Any]]:
+        order_field = FEED_ORDER_FIELDS[kind]
+        query = _ordered(db.collection_group(kind), order_field, True, cursors.get(kind), group=True).limit(limit)
+        entries = []
+        async for doc in query.stream():
+            data = doc.to_dict() or {}
+            entity_type, entity_id = doc.reference.path.split("/")[:2]
+            entries.append(data | {
+                "id": doc.id,
+                "kind": kind,
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "at": data.get(order_field),
+                "path": doc.reference.path,
+            })
+        return entries
+
+    merged = [entry for entries in await asyncio.gather(*(read(kind) for kind in kinds)) for entry in entries]
+    merged.sort(key=lambda entry: (entry["at"], entry["path"]), reverse=True)
+    items = merged[:limit]
+
+    # Newest first, so the last entry of each kind on the page is its cursor
+    for item in items:
+        cursors[item["kind"]] = (item["at"], item.pop("path"))
+    next_page_token = None
+    if len(items) == limit:
+        next_page_token = encode_page_token([[kind, at.isoformat(), path] for kind, (at, path) in cursors.items()])
+    return items, next_page_token
@@ -1,10 +1,68 @@
-from google.cloud import firestore
-from dotenv import load_dotenv
 import os
+import threading
+from typing import Any, Callable, Optional
 
-load_dotenv()
-print("GOOGLE_APPLICATION_CREDENTIALScc:", os.getenv("GOOGLE_APPLICATION_CREDENTIALS"))
-db = firestore.Client()
+from firestore.instrumentation import InstrumentedClient
+
+
+def storage_backend() -> str:
+    """``firestore`` (default) or ``sqlite`` for self-hosted deployments and offline load tests."""
+    return os.getenv("STORAGE_BACKEND", "firestore").lower()
+
+
+def create_client():
+    """Build the storage client; see firestore/repository.py for the interface it provides."""
+    # Scripts that don't start from api.py still pick up the .env file
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    backend = storage_backend()
+    if backend == "sqlite":
+        from firestore.sqlite_backend import SQLiteClient
+
+        return SQLiteClient(os.getenv("SQLITE_DB_PATH", "scrum_master.db"))
+    if backend != "firestore":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+    from google.cloud import firestore
+
+    # Async client so the FastAPI handlers never block the event loop on a Firestore RPC
+    return firestore.AsyncClient()
+
+
+class ClientFactory:
+    """
+    One storage client per process, created on first use.
+
+    Nothing is opened at import, so a gunicorn master that preloads the app
+    never holds a gRPC channel or SQLite connection its workers would inherit
+    across ``fork``. A process that finds a client made by its parent builds
+    its own instead of reusing the parent's.
+    """
+
+    def __init__(self, create: Callable[[], Any]):
+        self._create = create
+        self._client: Optional[Any] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> Any:
+        pid = os.getpid()
+        if self._client is None or self._pid != pid:
+            with self._lock:
+                if self._client is None or self._pid != pid:
+                    self._client = self._create()
+                    self._pid = pid
+        return self._client
+
+    @property
+    def created(self) -> bool:
+        return self._client is not None and self._pid == os.getpid()
+
+
+client_factory = ClientFactory(create_client)
+
+# Every operation made through db is attributed to the current request (see firestore/instrumentation.py)
+db = InstrumentedClient(client_factory)
 
 def get_collection_ref(name: str):
     return db.collection(name)
@@ -0,0 +1,272 @@
+"""
+Per-request accounting of storage operations.
+
+``firestore_client.db`` is wrapped in ``InstrumentedClient``: every document
+read, query, write and batch commit made through it is added to the
+``StorageStats`` of the current context. ``track_storage()`` opens a new
+context; the ``log_requests`` middleware in ``api.py`` opens one per HTTP
+request, so work done by the handler (including tasks it gathers) is
+attributed to that request. Reads and writes are counted the way Firestore
+bills them: one read per document returned (one for an empty query), one
+write per document written.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+
+class StorageStats:
+    """Storage operations attributed to one unit of work, normally one HTTP request."""
+
+    def __init__(self):
+        self.rpcs = 0
+        self.reads = 0
+        self.writes = 0
+        self.seconds = 0.0
+
+    def record(self, reads: int = 0, writes: int = 0, seconds: float = 0.0) -> None:
+        self.rpcs += 1
+        self.reads += reads
+        self.writes += writes
+        self.seconds += seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"rpcs": self.rpcs, "reads": self.reads, "writes": self.writes, "seconds": self.seconds}
+
+
+_current_stats: contextvars.ContextVar[Optional[StorageStats]] = contextvars.ContextVar(
+    "storage_stats", default=None
+)
+
+
+def current_stats() -> Optional[StorageStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_storage() -> Iterator[StorageStats]:
+    """Attribute the storage operations made inside the block to a fresh ``StorageStats``."""
+    stats = StorageStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _record(started: float, reads: int = 0, writes: int = 0) -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(reads, writes, time.perf_counter() - started)
+
+
+def _unwrap(value: Any) -> Any:
+    """Hand the wrapped client its own objects back."""
+    if isinstance(value, _Proxy):
+        return value.wrapped
+    if isinstance(value, dict):
+        return {key: _unwrap(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+
+class _Proxy:
+    def __init__(self, wrapped: Any):
+        self.wrapped = wrapped
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.wrapped, name)
+
+
+class InstrumentedQuery(_Proxy):
+    def where(self, *args, **kwargs) -> "InstrumentedQuery":
+        return InstrumentedQuery(self.wrapped.where(*args, **kwargs))
+
+    def order_by(self, *args, **kwargs) -> "InstrumentedQuery":
+        return InstrumentedQuery(self.wrapped.order_by(*args, **kwargs))
+
+    def start_after(self, document_fields_or_snapshot: Any) -> "InstrumentedQuery":
+        return InstrumentedQuery(self.wrapped.start_after(_unwrap(document_fields_or_snapshot)))
+
+    def limit(self, count: int) -> "InstrumentedQuery":
+        return InstrumentedQuery(self.wrapped.limit(count))
+
+    def select(self, field_paths) -> "InstrumentedQuery":
+        return InstrumentedQuery(self.wrapped.select(field_paths))
+
+    async def stream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        # Only the time spent waiting on storage counts, not the consumer's work between documents
+        elapsed = 0.0
+        count = 0
+        iterator = self.wrapped.stream(*args, **kwargs).__aiter__()
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    snapshot = await iterator.__anext__()
+                except StopAsyncIteration:
+                    elapsed += time.perf_counter() - started
+                    break
+                elapsed += time.perf_counter() - started
+                count += 1
+                yield snapshot
+        finally:
+            stats = _current_stats.get()
+            if stats is not None:
+                stats.record(reads=max(1, count), seconds=elapsed)
+
+    async def get(self, *args, **kwargs) -> list:
+        return [snapshot async for snapshot in self.stream(*args, **kwargs)]
+
+
+class InstrumentedCollectionReference(InstrumentedQuery):
+    def document(self, *args, **kwargs) -> "InstrumentedDocumentReference":
+        return InstrumentedDocumentReference(self.wrapped.document(*args, **kwargs))
+
+    async def add(self, document_data: dict, *args, **kwargs) -> Tuple[Any, "InstrumentedDocumentReference"]:
+        started = time.perf_counter()
+        update_time, reference = await self.wrapped.add(document_data, *args, **kwargs)
+        _record(started, writes=1)
+        return update_time, InstrumentedDocumentReference(reference)
+
+
+class InstrumentedDocumentReference(_Proxy):
+    def __eq__(self, other: Any) -> bool:
+        return self.wrapped == _unwrap(other)
+
+    def __hash__(self) -> int:
+        return hash(self.wrapped)
+
+    def collection(self, collection_id: str) -> InstrumentedCollectionReference:
+        return InstrumentedCollectionReference(self.wrapped.collection(collection_id))
+
+    async def get(self, *args, **kwargs) -> Any:
+        started = time.perf_counter()
+        snapshot = await self.wrapped.get(*args, **kwargs)
+        _record(started, reads=1)
+        return snapshot
+
+    async def _write(self, method: str, *args, **kwargs) -> Any:
+        started = time.perf_counter()
+        result = await getattr(self.wrapped, method)(*args, **kwargs)
+        _record(started, writes=1)
+        return result
+
+    async def create(self, *args, **kwargs) -> Any:
+        return await self._write("create", *args, **kwargs)
+
+    async def set(self, *args, **kwargs) -> Any:
+        return await self._write("set", *args, **kwargs)
+
+    async def update(self, *args, **kwargs) -> Any:
+        return await self._write("update", *args, **kwargs)
+
+    async def delete(self, *args, **kwargs) -> Any:
+        return await self._write("delete", *args, **kwargs)
+
+
+class InstrumentedWriteBatch(_Proxy):
+    def __init__(self, wrapped: Any):
+        super().__init__(wrapped)
+        self._writes = 0
+
+    def _stage(self, method: str, reference: Any, *args, **kwargs) -> None:
+        getattr(self.wrapped, method)(_unwrap(reference), *args, **kwargs)
+        self._writes += 1
+
+    def create(self, reference: Any, *args, **kwargs) -> None:
+        self._stage("create", reference, *args, **kwargs)
+
+    def set(self, reference: Any, *args, **kwargs) -> None:
+        self._stage("set", reference, *args, **kwargs)
+
+    def update(self, reference: Any, *args, **kwargs) -> None:
+        self._stage("update", reference, *args, **kwargs)
+
+    def delete(self, reference: Any, *args, **kwargs) -> None:
+        self._stage("delete", reference, *args, **kwargs)
+
+    async def commit(self, *args, **kwargs) -> list:
+        started = time.perf_counter()
+        try:
+            return await self.wrapped.commit(*args, **kwargs)
+        finally:
+            _record(started, writes=self._writes)
+
+
+class InstrumentedClient(_Proxy):
+    """
+    Wraps a storage client (see ``firestore/repository.py``) and counts what goes through it.
+
+    Takes a factory rather than the client, so the client is only created
+    when the first operation needs it.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+
+    @property
+    def wrapped(self) -> Any:
+        return self._factory()
+
+    def collection(self, *args, **kwargs) -> InstrumentedCollectionReference:
+        return InstrumentedCollectionReference(self.wrapped.collection(*args, **kwargs))
+
+    def document(self, *args, **kwargs) -> InstrumentedDocumentReference:
+        return InstrumentedDocumentReference(self.wrapped.document(*args, **kwargs))
+
+    def collection_group(self, collection_id: str) -> InstrumentedQuery:
+        return InstrumentedQuery(self.wrapped.collection_group(collection_id))
+
+    def batch(self) -> InstrumentedWriteBatch:
+        return InstrumentedWriteBatch(self.wrapped.batch())
+
+    async def get_all(self, references, *args, **kwargs) -> AsyncIterator[Any]:
+        references = [_unwrap(reference) for reference in references]
+        started = time.perf_counter()
+        snapshots = [snapshot async for snapshot in self.wrapped.get_all(references, *args, **kwargs)]
+        _record(started, reads=len(references))
+        for snapshot in snapshots:
+            yield snapshot
+
+
+class RouteMetrics:
+    """Running per-route totals of requests and the storage work they caused."""
+
+    COUNTERS = ("requests", "rpcs", "reads", "writes", "storage_seconds", "request_seconds")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def observe(self, method: str, route: str, stats: StorageStats, request_seconds: float) -> None:
+        with self._lock:
+            totals = self._routes.setdefault((method, route), dict.fromkeys(self.COUNTERS, 0))
+            totals["requests"] += 1
+            totals["rpcs"] += stats.rpcs
+            totals["reads"] += stats.reads
+            totals["writes"] += stats.writes
+            totals["storage_seconds"] += stats.seconds
+            totals["request_seconds"] += request_seconds
+
+    def snapshot(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        with self._lock:
+            return {key: dict(totals) for key, totals in self._routes.items()}
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition of the totals, labelled by method and route template."""
+        routes = self.snapshot()
+        lines = []
+        for counter in self.COUNTERS:
+            name = f"http_{counter}_total" if counter in ("requests", "request_seconds") else f"firestore_{counter}_total"
+            lines.append(f"# TYPE {name} counter")
+            for (method, route), totals in sorted(routes.items()):
+                lines.append(f'{name}{{method="{method}",route="{route}"}} {totals[counter]}')
+        return "\n".join(lines) + "\n"
+
+
+# Shared per-process route totals, filled by the request middleware
+route_metrics = RouteMetrics()
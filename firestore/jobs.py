@@ -0,0 +1,199 @@
+"""
+Persisted state of background agent jobs (see controllers/job_controller.py).
+
+A job document holds its ``kind``, the request ``payload`` and ``options``,
+its ``status`` (``queued``, ``running``, ``succeeded``, ``failed``), the
+``progress`` its handler reports while it runs and, once finished, its
+``result`` or ``error``. A worker owns a running job for as long
+as its lease (``lease_expires_at``) is renewed; a job whose lease ran out,
+because the worker holding it died or stalled, is queued work again. A claim
+records the ``worker`` and a fresh ``claim`` token, and every later write of
+that claim (lease renewals, progress, the outcome) goes through its ``Lease``
+and is preconditioned on the job's update time. Once another worker has
+taken the job over, those writes fail with ``LeaseLost`` instead of
+overwriting the new claim, so two workers never both finish a job.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from google.api_core.exceptions import FailedPrecondition, NotFound
+from google.cloud import firestore
+from google.cloud.firestore import FieldFilter
+
+from firestore.batching import get_documents
+from firestore.firestore_client import db
+from firestore.pagination import DEFAULT_PAGE_SIZE, Page, list_page
+
+COLLECTION = "jobs"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Fields list_jobs can filter on server-side, with their Firestore operator
+JOB_FILTERS = {
+    "status": "==",
+    "kind": "==",
+}
+
+# (job, update time of its document)
+Claimable = Tuple[Dict[str, Any], datetime]
+
+
+class LeaseLost(Exception):
+    """The job was claimed by another worker (or deleted) after this worker's lease ran out."""
+
+
+class Lease:
+    """
+    One worker's claim on a running job.
+
+    Writes through the lease are serialized and each is preconditioned on
+    the update time of the previous one, starting from the claim's.
+    """
+
+    def __init__(self, job_id: str, worker: str, claim: str, update_time: datetime):
+        self.job_id = job_id
+        self.worker = worker
+        self.claim = claim
+        self.update_time = update_time
+        self.lost = False
+        self._lock = asyncio.Lock()
+
+    async def update(self, fields: Dict[str, Any]) -> None:
+        """
+        Write to the job if this claim still holds it.
+
+        Raises:
+            LeaseLost: If the job was written by anyone else since this claim's last write
+        """
+        async with self._lock:
+            if self.lost:
+                raise LeaseLost(self.job_id)
+            try:
+                result = await db.collection(COLLECTION).document(self.job_id).update(
+                    fields, option=db.write_option(last_update_time=self.update_time)
+                )
+            except (FailedPrecondition, NotFound):
+                self.lost = True
+                raise LeaseLost(self.job_id)
+            self.update_time = result.update_time
+
+
+async def create_job(kind: str, payload: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> str:
+    """Queue a job and return its ID."""
+    doc_ref = db.collection(COLLECTION).document()
+    await doc_ref.set({
+        "kind": kind,
+        "payload": payload,
+        "options": options or {},
+        "status": QUEUED,
+        "attempts": 0,
+        "created_at": datetime.now(timezone.utc),
+    })
+    return doc_ref.id
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    doc = await db.collection(COLLECTION).document(job_id).get()
+    if not doc.exists:
+        return None
+    return doc.to_dict() | {"id": doc.id}
+
+
+async def get_jobs(job_ids: Iterable[str]) -> List[Dict[str, Any]]:
+    """The given jobs that exist, in order, read with batched multi-gets."""
+    return await get_documents(COLLECTION, job_ids)
+
+
+async def list_jobs(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Page:
+    """List one page of jobs; ``limit=None`` opts into a full scan."""
+    return await list_page(db.collection(COLLECTION), filters, JOB_FILTERS, limit, page_token)
+
+
+async def claimable_jobs(kind: str, limit: int) -> List[Claimable]:
+    """
+    The oldest jobs of a kind that a worker may claim.
+
+    These are queued jobs, then running jobs whose lease has expired.
+    """
+    now = datetime.now(timezone.utc)
+    jobs = db.collection(COLLECTION).where(filter=FieldFilter("kind", "==", kind))
+    queries = (
+        jobs.where(filter=FieldFilter("status", "==", QUEUED)).order_by("created_at"),
+        jobs.where(filter=FieldFilter("status", "==", RUNNING))
+        .where(filter=FieldFilter("lease_expires_at", "<", now))
+        .order_by("lease_expires_at"),
+    )
+    claimable: List[Claimable] = []
+    for query in queries:
+        async for doc in query.limit(limit - len(claimable)).stream():
+            claimable.append((doc.to_dict() | {"id": doc.id}, doc.update_time))
+        if len(claimable) >= limit:
+            break
+    return claimable
+
+
+async def claim_job(job_id: str, update_time: datetime, worker: str, lease_seconds: float) -> Optional[Lease]:
+    """
+    Take a job found by ``claimable_jobs``.
+
+    Returns:
+        The claim's lease, or None if another worker changed the job first
+    """
+    now = datetime.now(timezone.utc)
+    claim = uuid.uuid4().hex
+    try:
+        result = await db.collection(COLLECTION).document(job_id).update(
+            {
+                "status": RUNNING,
+                "worker": worker,
+                "claim": claim,
+                "started_at": now,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "attempts": firestore.Increment(1),
+            },
+            option=db.write_option(last_update_time=update_time),
+        )
+    except (FailedPrecondition, NotFound):
+        return None
+    return Lease(job_id, worker, claim, result.update_time)
+
+
+async def renew_lease(lease: Lease, lease_seconds: float) -> None:
+    await lease.update({
+        "lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds),
+    })
+
+
+async def report_progress(lease: Lease, progress: Dict[str, Any]) -> None:
+    """Record how far a running job has got, for ``GET /jobs/{job_id}``."""
+    await lease.update({"progress": progress})
+
+
+async def release_job(lease: Lease) -> None:
+    """Hand a running job back to the queue, e.g. when its worker shuts down."""
+    await lease.update({
+        "status": QUEUED,
+        "worker": firestore.DELETE_FIELD,
+        "claim": firestore.DELETE_FIELD,
+        "lease_expires_at": firestore.DELETE_FIELD,
+    })
+
+
+async def finish_job(lease: Lease, result: Any = None, error: Optional[str] = None) -> None:
+    """Record the outcome of a job; an ``error`` marks it failed."""
+    await lease.update({
+        "status": FAILED if error is not None else SUCCEEDED,
+        "result": result,
+        "error": error,
+        "finished_at": datetime.now(timezone.utc),
+        "lease_expires_at": firestore.DELETE_FIELD,
+    })
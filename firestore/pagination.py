@@ -0,0 +1,171 @@
+import base64
+import binascii
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from google.cloud.firestore import FieldFilter
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Results are ordered by document ID: it is unique and immutable, so a cursor
+# taken from the last document of a page is stable across writes.
+DOCUMENT_ID = "__name__"
+
+# Routes whose body is a bare list return the next page token in this header
+NEXT_PAGE_TOKEN_HEADER = "X-Next-Page-Token"
+
+Page = Tuple[List[dict], Optional[str]]
+
+
+def encode_page_token(cursor: List[Any]) -> str:
+    """Encode the cursor values of the last document of a page as an opaque token."""
+    raw = json.dumps(cursor, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_page_token(page_token: str) -> List[Any]:
+    """Decode a token produced by ``encode_page_token``."""
+    try:
+        padded = page_token + "=" * (-len(page_token) % 4)
+        cursor = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid page_token")
+    if not isinstance(cursor, list) or not cursor:
+        raise ValueError("Invalid page_token")
+    return cursor
+
+
+def apply_filters(query, filters: Optional[Dict[str, Any]], allowed: Dict[str, str]):
+    """
+    Add server-side ``where`` clauses to ``query``.
+
+    Args:
+        query: Collection reference or query to filter
+        filters: Field -> value; ``None`` values are ignored
+        allowed: Field -> Firestore operator for the fields that may be filtered on
+
+    Raises:
+        ValueError: If a filter targets a field that isn't in ``allowed``
+    """
+    for field, value in (filters or {}).items():
+        if value is None:
+            continue
+        if field not in allowed:
+            raise ValueError(f"Filtering on '{field}' is not supported")
+        query = query.where(filter=FieldFilter(field, allowed[field], value))
+    return query
+
+
+def page_query(
+    collection_ref,
+    filters: Optional[Dict[str, Any]] = None,
+    allowed_filters: Optional[Dict[str, str]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+):
+    """Build the filtered, ID-ordered query ``list_page`` and ``stream_page`` read."""
+    query = apply_filters(collection_ref, filters, allowed_filters or {})
+    query = query.order_by(DOCUMENT_ID)
+    if page_token:
+        last_id = decode_page_token(page_token)[0]
+        query = query.start_after({DOCUMENT_ID: last_id})
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+async def list_page(
+    collection_ref,
+    filters: Optional[Dict[str, Any]] = None,
+    allowed_filters: Optional[Dict[str, str]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Page:
+    """
+    Read one page of a collection ordered by document ID.
+
+    Args:
+        collection_ref: Collection to read
+        filters: Equality/array filters, validated against ``allowed_filters``
+        allowed_filters: Field -> operator map of filterable fields
+        limit: Page size; ``None`` opts into a full scan of the matching documents
+        page_token: Token returned with the previous page
+
+    Returns:
+        The documents of the page and the token of the next page (None on the last page)
+    """
+    query = page_query(collection_ref, filters, allowed_filters, limit, page_token)
+    items = [(doc.to_dict() or {}) | {"id": doc.id} async for doc in query.stream()]
+
+    next_page_token = None
+    if limit is not None and len(items) == limit:
+        next_page_token = encode_page_token([items[-1]["id"]])
+    return items, next_page_token
+
+
+def stream_page(
+    collection_ref,
+    filters: Optional[Dict[str, Any]] = None,
+    allowed_filters: Optional[Dict[str, str]] = None,
+    page_token: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """
+    Iterate over every matching document of a collection, ordered by document ID.
+
+    Documents are yielded as the query stream delivers them, so memory stays
+    flat however many match. The filters and token are validated before this
+    returns, so a bad request fails before a response has started.
+
+    Raises:
+        ValueError: If a filter isn't allowed or the page token is invalid
+    """
+    query = page_query(collection_ref, filters, allowed_filters, None, page_token)
+
+    async def documents() -> AsyncIterator[dict]:
+        async for doc in query.stream():
+            yield (doc.to_dict() or {}) | {"id": doc.id}
+
+    return documents()
+
+
+def _matches(document: dict, field: str, op: str, value: Any) -> bool:
+    if op == "array_contains":
+        candidate = document.get(field)
+        return isinstance(candidate, list) and value in candidate
+    return document.get(field) == value
+
+
+def page_in_memory(
+    documents: List[dict],
+    filters: Optional[Dict[str, Any]] = None,
+    allowed_filters: Optional[Dict[str, str]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Page:
+    """
+    Apply the ``list_page`` filter/order/cursor contract to documents already in memory.
+
+    Tokens are interchangeable with the ones ``list_page`` returns, so a
+    client can keep paging when reads switch between Firestore and a replica.
+    """
+    allowed_filters = allowed_filters or {}
+    active = {field: value for field, value in (filters or {}).items() if value is not None}
+    for field in active:
+        if field not in allowed_filters:
+            raise ValueError(f"Filtering on '{field}' is not supported")
+
+    last_id = decode_page_token(page_token)[0] if page_token else None
+    items = sorted(
+        (
+            doc for doc in documents
+            if (last_id is None or doc["id"] > last_id)
+            and all(_matches(doc, field, allowed_filters[field], value) for field, value in active.items())
+        ),
+        key=lambda doc: doc["id"],
+    )
+    if limit is None:
+        return items, None
+    items = items[:limit]
+    next_page_token = encode_page_token([items[-1]["id"]]) if len(items) == limit else None
+    return items, next_page_token
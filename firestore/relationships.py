@@ -1,8 +1,28 @@
 # from firebase_admin import firestore
-from typing import List, Dict, Optional
+import asyncio
+import re
+from typing import Awaitable, List, Dict, Optional, Tuple
 from datetime import datetime, timezone
 from firestore.firestore_client import db
+from firestore.batching import ReadStats, get_document, get_documents
+from firestore.bulk import WriteUnit, bulk_commit
+from firestore.dependency_graph import META_FIELDS, dependency_graph
+from firestore.cache import entity_cache
+from firestore.rollups import (
+    ROLLUP_FIELD,
+    bulk_rollups,
+    combine_updates,
+    commit_with_rollups,
+    existing_parents,
+    invalidate_parents,
+    merge_deltas,
+    rollup_deltas,
+    rollup_map,
+    rollup_writes,
+    tracked_fields,
+)
 from google.cloud import firestore
+from google.api_core.exceptions import Conflict, FailedPrecondition, NotFound
 
 # Type definitions for better code clarity
 EpicId = str
@@ -17,251 +37,433 @@ class EntityNotFoundError(Exception):
     """Raised when a referenced entity (epic, story, or task) is not found."""
     pass
 
+async def _commit_preconditioned(commit: Awaitable, labels: Dict[str, str]) -> None:
+    """
+    Await a commit of updates that must land in one atomic round trip.
+    
+    ``update`` writes carry an implicit "document exists" precondition, so a
+    missing document fails the whole commit and nothing is half-written.
+    
+    Args:
+        commit: The pending commit
+        labels: Document path -> human readable name, used in the error
+        
+    Raises:
+        EntityNotFoundError: If one of the updated documents doesn't exist
+    """
+    try:
+        await commit
+    except NotFound as e:
+        message = str(e)
+        for path, label in labels.items():
+            if re.search(re.escape(path) + r"(?![\w-])", message):
+                raise EntityNotFoundError(f"{label} does not exist") from e
+        raise EntityNotFoundError(" or ".join(labels.values()) + " does not exist") from e
+
 # ---------- Epic-Story Relationships ----------
 
-def link_story_to_epic(story_id: StoryId, epic_id: EpicId) -> None:
+async def link_story_to_epic(story_id: StoryId, epic_id: EpicId, story: Optional[Dict] = None) -> None:
     """
     Link a story to an epic (bidirectional relationship).
     
+    With ``story`` the link is a single commit round trip, and every caller
+    in the app passes it (it has just written or loaded the story). Called
+    by ID alone, the story's status, points and current parents are read
+    first, because the epic's rollup can't be moved without them: two
+    round trips. The same holds for ``story`` or ``task`` on the unlink and
+    task-to-story functions below.
+    
     Args:
         story_id: ID of the story to link
         epic_id: ID of the epic to link to
+        story: The story's current data, if the caller already has it
         
     Raises:
         EntityNotFoundError: If either story or epic doesn't exist
     """
-    # Verify both documents exist
-    story_doc = db.collection("stories").document(story_id).get()
-    epic_doc = db.collection("epics").document(epic_id).get()
-    
-    if not story_doc.exists:
-        raise EntityNotFoundError(f"Story {story_id} does not exist")
-    if not epic_doc.exists:
-        raise EntityNotFoundError(f"Epic {epic_id} does not exist")
-    
     # Get references
     epic_ref = db.collection("epics").document(epic_id)
     story_ref = db.collection("stories").document(story_id)
     
-    # Update both documents
-    epic_ref.update({
-        "stories": firestore.ArrayUnion([story_id])
-    })
-    
-    story_ref.update({
-        "epic_id": epic_id,
-        "updated_at": datetime.now(timezone.utc)
+    # Update both documents and move the story's rollup contribution in one
+    # commit; the update preconditions double as the existence checks
+    def link(before):
+        writes = [
+            ("update", story_ref, {"epic_id": epic_id, "updated_at": datetime.now(timezone.utc)}),
+            ("update", epic_ref, {"stories": firestore.ArrayUnion([story_id])}),
+        ]
+        return writes, None if before is None else before | {"epic_id": epic_id}
+    
+    await _commit_preconditioned(commit_with_rollups("stories", story_id, link, story is None, story), {
+        story_ref.path: f"Story {story_id}",
+        epic_ref.path: f"Epic {epic_id}",
     })
+    entity_cache.invalidate("epics", epic_id)
+    entity_cache.invalidate("stories", story_id)
 
-def unlink_story_from_epic(story_id: StoryId, epic_id: EpicId) -> None:
+async def unlink_story_from_epic(story_id: StoryId, epic_id: EpicId, story: Optional[Dict] = None) -> None:
     """
     Remove the link between a story and its epic.
     
     Args:
         story_id: ID of the story to unlink
         epic_id: ID of the epic to unlink from
+        story: The story's current data, if the caller already has it
+            (saves reading it, see ``link_story_to_epic``)
+        
+    Raises:
+        EntityNotFoundError: If either story or epic doesn't exist
     """
     # Get references
     epic_ref = db.collection("epics").document(epic_id)
     story_ref = db.collection("stories").document(story_id)
     
-    # Update both documents
-    epic_ref.update({
-        "stories": firestore.ArrayRemove([story_id])
-    })
-    
-    story_ref.update({
-        "epic_id": firestore.DELETE_FIELD,
-        "updated_at": datetime.now(timezone.utc)
+    # Update both documents and drop the story's rollup contribution in one commit
+    def unlink(before):
+        writes = [
+            ("update", story_ref, {"epic_id": firestore.DELETE_FIELD, "updated_at": datetime.now(timezone.utc)}),
+            ("update", epic_ref, {"stories": firestore.ArrayRemove([story_id])}),
+        ]
+        return writes, None if before is None else {key: value for key, value in before.items() if key != "epic_id"}
+    
+    await _commit_preconditioned(commit_with_rollups("stories", story_id, unlink, story is None, story), {
+        story_ref.path: f"Story {story_id}",
+        epic_ref.path: f"Epic {epic_id}",
     })
+    entity_cache.invalidate("epics", epic_id)
+    entity_cache.invalidate("stories", story_id)
 
-def get_epic_stories(epic_id: EpicId) -> List[Dict]:
+async def get_epic_stories(
+    epic_id: EpicId,
+    fields: Optional[List[str]] = None,
+    stats: Optional[ReadStats] = None,
+) -> List[Dict]:
     """
     Get all stories associated with an epic.
     
+    The epic is read once and its stories are resolved with batched
+    multi-gets, so the number of RPCs doesn't grow with the number of stories.
+    
     Args:
         epic_id: ID of the epic
+        fields: Only return these story fields (plus ``id``) when given
+        stats: Optional counter updated with the RPCs issued
         
     Returns:
         List of story documents with their IDs
     """
-    epic = db.collection("epics").document(epic_id).get()
-    if not epic.exists:
+    epic = await get_document("epics", epic_id, field_paths=["stories"], stats=stats)
+    if not epic:
         return []
     
-    epic_data = epic.to_dict()
-    story_ids = epic_data.get("stories", [])
-    
-    stories = []
-    for story_id in story_ids:
-        story = db.collection("stories").document(story_id).get()
-        if story.exists:
-            story_data = story.to_dict()
-            story_data["id"] = story.id
-            stories.append(story_data)
-    return stories
+    story_ids = epic.get("stories", [])
+    return await get_documents("stories", story_ids, field_paths=fields, stats=stats)
 
-def bulk_link_stories_to_epic(story_ids: List[StoryId], epic_id: EpicId) -> None:
+async def bulk_link_stories_to_epic(story_ids: List[StoryId], epic_id: EpicId) -> List[Dict]:
     """
-    Link multiple stories to an epic in a single batch operation.
+    Link multiple stories to an epic with auto-chunked, parallel batch commits.
+    
+    Existence is checked with one batched multi-get. Every batch links its
+    stories and adds them to the epic's ``stories`` array atomically, so any
+    number of stories can be linked without hitting the 500-write limit.
     
     Args:
         story_ids: List of story IDs to link
         epic_id: ID of the epic to link to
+        
+    Returns:
+        One ``{"id", "success", "error"}`` result per story
+        
+    Raises:
+        EntityNotFoundError: If the epic doesn't exist
     """
-    # Verify epic exists
-    epic_doc = db.collection("epics").document(epic_id).get()
-    if not epic_doc.exists:
+    # Verify the epic and all stories exist
+    epic_doc, existing_stories = await asyncio.gather(
+        get_document("epics", epic_id, field_paths=["title"]),
+        get_documents("stories", story_ids, field_paths=tracked_fields("stories")),
+    )
+    if not epic_doc:
         raise EntityNotFoundError(f"Epic {epic_id} does not exist")
+    existing = {story.pop("id"): story for story in existing_stories}
     
-    # Verify all stories exist
+    # One unit per story: set its epic ID
+    epic_ref = db.collection("epics").document(epic_id)
     stories_ref = db.collection("stories")
-    for story_id in story_ids:
-        if not stories_ref.document(story_id).get().exists:
-            raise EntityNotFoundError(f"Story {story_id} does not exist")
+    current_time = datetime.now(timezone.utc)
+    units = [
+        WriteUnit(story_id, [("update", stories_ref.document(story_id), {
+            "epic_id": epic_id,
+            "updated_at": current_time
+        })])
+        for story_id in dict.fromkeys(story_ids)
+        if story_id in existing
+    ]
+    
+    # Each batch also adds its stories to the epic and moves their rollup
+    # contributions from their previous epic
+    shared_rollups, _, parents = await bulk_rollups("stories", {
+        unit.key: (existing[unit.key], existing[unit.key] | {"epic_id": epic_id}) for unit in units
+    })
+    def add_to_epic(batch_units: List[WriteUnit]):
+        return combine_updates(
+            [("update", epic_ref, {"stories": firestore.ArrayUnion([unit.key for unit in batch_units])})]
+            + shared_rollups(batch_units)
+        )
     
-    # Create batch operation
-    batch = db.batch()
+    results = {
+        result["id"]: result
+        for result in await bulk_commit(
+            units, shared_writes=add_to_epic, shared_write_count=len(parents | {("epics", epic_id)})
+        )
+    }
+    invalidate_parents(parents)
+    entity_cache.invalidate("epics", epic_id)
+    entity_cache.invalidate("stories", *story_ids)
     
-    # Update epic with all story IDs
-    epic_ref = db.collection("epics").document(epic_id)
-    batch.update(epic_ref, {
-        "stories": firestore.ArrayUnion(story_ids)
-    })
+    return [
+        results.get(story_id) or {
+            "id": story_id,
+            "success": False,
+            "error": f"Story {story_id} does not exist"
+        }
+        for story_id in story_ids
+    ]
+
+async def bulk_create_epics_with_stories(epics: Dict[EpicId, Tuple[Dict, List[Dict]]]) -> Dict[EpicId, Dict]:
+    """
+    Create epics together with their stories, already linked both ways, in
+    auto-chunked, parallel batch commits.
+    
+    Each epic is written in the same commit as its stories: the epic with
+    its ``stories`` array and ``rollup`` filled in, the stories with its
+    ``epic_id``. An epic therefore never shows up without its stories, and
+    any number of epics costs a handful of batches instead of a create, a
+    bulk create and a bulk link per epic. An epic with more stories than
+    one commit can hold (about 500) is reported as failed and not created;
+    the other epics are still written.
     
-    # Update all stories with epic ID
+    Args:
+        epics: Epic ID (e.g. ``db.collection("epics").document().id``) ->
+            (epic data, data of its stories)
+        
+    Returns:
+        Epic ID -> ``{"success", "error", "stories"}`` with the created
+        stories (ID and data)
+    """
     current_time = datetime.now(timezone.utc)
-    for story_id in story_ids:
-        story_ref = stories_ref.document(story_id)
-        batch.update(story_ref, {
-            "epic_id": epic_id,
-            "updated_at": current_time
-        })
+    epics_ref = db.collection("epics")
+    stories_ref = db.collection("stories")
     
-    # Execute the batch
-    batch.commit()
+    planned = {}
+    for epic_id, (epic_data, stories_data) in epics.items():
+        stories = []
+        for story_data in stories_data:
+            story_ref = stories_ref.document()
+            stories.append((story_ref, {**story_data, "epic_id": epic_id, "created_at": current_time}))
+        deltas = {}
+        for _, data in stories:
+            merge_deltas(deltas, rollup_deltas("stories", None, data))
+        planned[epic_id] = (epic_data, stories, deltas)
+    
+    # Stories may also count towards existing parents, e.g. a sprint
+    other_parents = {
+        parent for _, _, deltas in planned.values() for parent in deltas
+        if not (parent[0] == "epics" and parent[1] in epics)
+    }
+    existing = await existing_parents(other_parents)
+    
+    units = []
+    for epic_id, (epic_data, stories, deltas) in planned.items():
+        epic_rollup = deltas.pop(("epics", epic_id), {})
+        writes = [("create", epics_ref.document(epic_id), {
+            **epic_data,
+            "stories": [story_ref.id for story_ref, _ in stories],
+            ROLLUP_FIELD: rollup_map(epic_rollup),
+        })]
+        writes += [("create", story_ref, data) for story_ref, data in stories]
+        writes += rollup_writes({parent: delta for parent, delta in deltas.items() if parent in existing})
+        units.append(WriteUnit(epic_id, writes))
+    
+    results = await bulk_commit(units)
+    invalidate_parents(existing)
+    
+    return {
+        result["id"]: {
+            "success": result["success"],
+            "error": result["error"],
+            "stories": [{"id": story_ref.id, **data} for story_ref, data in planned[result["id"]][1]],
+        }
+        for result in results
+    }
 
 # ---------- Story-Task Relationships ----------
 
-def link_task_to_story(task_id: TaskId, story_id: StoryId) -> None:
+async def link_task_to_story(task_id: TaskId, story_id: StoryId, task: Optional[Dict] = None) -> None:
     """
     Link a task to a story (bidirectional relationship).
     
     Args:
         task_id: ID of the task to link
         story_id: ID of the story to link to
+        task: The task's current data, if the caller already has it
+            (saves reading it, see ``link_story_to_epic``)
         
     Raises:
         EntityNotFoundError: If either task or story doesn't exist
     """
-    # Verify both documents exist
-    story_doc = db.collection("stories").document(story_id).get()
-    task_doc = db.collection("tasks").document(task_id).get()
-    
-    if not story_doc.exists:
-        raise EntityNotFoundError(f"Story {story_id} does not exist")
-    if not task_doc.exists:
-        raise EntityNotFoundError(f"Task {task_id} does not exist")
-    
     # Get references
     story_ref = db.collection("stories").document(story_id)
     task_ref = db.collection("tasks").document(task_id)
     
-    # Update both documents
-    story_ref.update({
-        "tasks": firestore.ArrayUnion([task_id]),
-        "updated_at": datetime.now(timezone.utc)
-    })
-    
-    task_ref.update({
-        "story_id": story_id,
-        "updated_at": datetime.now(timezone.utc)
+    # Update both documents and move the task's rollup contribution in one
+    # commit; the update preconditions double as the existence checks
+    def link(before):
+        current_time = datetime.now(timezone.utc)
+        writes = [
+            ("update", story_ref, {"tasks": firestore.ArrayUnion([task_id]), "updated_at": current_time}),
+            ("update", task_ref, {"story_id": story_id, "updated_at": current_time}),
+        ]
+        return writes, None if before is None else before | {"story_id": story_id}
+    
+    await _commit_preconditioned(commit_with_rollups("tasks", task_id, link, task is None, task), {
+        story_ref.path: f"Story {story_id}",
+        task_ref.path: f"Task {task_id}",
     })
+    entity_cache.invalidate("stories", story_id)
+    entity_cache.invalidate("tasks", task_id)
 
-def unlink_task_from_story(task_id: TaskId, story_id: StoryId) -> None:
+async def unlink_task_from_story(task_id: TaskId, story_id: StoryId, task: Optional[Dict] = None) -> None:
     """
     Remove the link between a task and its story.
     
     Args:
         task_id: ID of the task to unlink
         story_id: ID of the story to unlink from
+        task: The task's current data, if the caller already has it
+            (saves reading it, see ``link_story_to_epic``)
+        
+    Raises:
+        EntityNotFoundError: If either task or story doesn't exist
     """
     # Get references
     story_ref = db.collection("stories").document(story_id)
     task_ref = db.collection("tasks").document(task_id)
     
-    # Update both documents
-    story_ref.update({
-        "tasks": firestore.ArrayRemove([task_id]),
-        "updated_at": datetime.now(timezone.utc)
-    })
-    
-    task_ref.update({
-        "story_id": firestore.DELETE_FIELD,
-        "updated_at": datetime.now(timezone.utc)
+    # Update both documents and drop the task's rollup contribution in one commit
+    def unlink(before):
+        current_time = datetime.now(timezone.utc)
+        writes = [
+            ("update", story_ref, {"tasks": firestore.ArrayRemove([task_id]), "updated_at": current_time}),
+            ("update", task_ref, {"story_id": firestore.DELETE_FIELD, "updated_at": current_time}),
+        ]
+        return writes, None if before is None else {key: value for key, value in before.items() if key != "story_id"}
+    
+    await _commit_preconditioned(commit_with_rollups("tasks", task_id, unlink, task is None, task), {
+        story_ref.path: f"Story {story_id}",
+        task_ref.path: f"Task {task_id}",
     })
+    entity_cache.invalidate("stories", story_id)
+    entity_cache.invalidate("tasks", task_id)
 
-def get_story_tasks(story_id: StoryId) -> List[Dict]:
+async def get_story_tasks(
+    story_id: StoryId,
+    fields: Optional[List[str]] = None,
+    stats: Optional[ReadStats] = None,
+) -> List[Dict]:
     """
     Get all tasks associated with a story.
     
     Args:
         story_id: ID of the story
+        fields: Only return these task fields (plus ``id``) when given
+        stats: Optional counter updated with the RPCs issued
         
     Returns:
         List of task documents with their IDs
     """
-    story = db.collection("stories").document(story_id).get()
-    if not story.exists:
+    story = await get_document("stories", story_id, field_paths=["tasks"], stats=stats)
+    if not story:
         return []
     
-    story_data = story.to_dict()
-    task_ids = story_data.get("tasks", [])
-    
-    tasks = []
-    for task_id in task_ids:
-        task = db.collection("tasks").document(task_id).get()
-        if task.exists:
-            task_data = task.to_dict()
-            task_data["id"] = task.id
-            tasks.append(task_data)
-    return tasks
+    task_ids = story.get("tasks", [])
+    return await get_documents("tasks", task_ids, field_paths=fields, stats=stats)
+
+# Levels below an epic: (collection of the level, field of the parent holding its IDs)
+EPIC_TREE_LEVELS = (("stories", "stories"), ("tasks", "tasks"))
+
+async def get_epic_tree(
+    epic_id: EpicId,
+    depth: int = len(EPIC_TREE_LEVELS),
+    fields: Optional[List[str]] = None,
+    stats: Optional[ReadStats] = None,
+) -> Optional[Dict]:
+    """
+    Load an epic with its stories and their tasks, nested.
+    
+    The hierarchy is walked breadth-first: every level is resolved with one
+    batched multi-get over the IDs collected from the level above, so the
+    round trips grow with ``depth`` rather than with the number of nodes.
+    
+    Args:
+        epic_id: ID of the epic
+        depth: Levels to load below the epic (0 = epic only, 1 = stories,
+            2 = stories and tasks)
+        fields: Only return these fields (plus ``id``) of every node when given
+        stats: Optional counter updated with the RPCs issued
+        
+    Returns:
+        The epic with ``stories`` replaced by the story documents, each with
+        ``tasks`` replaced by the task documents, or None if it doesn't exist.
+        Children that no longer exist are left out.
+    """
+    depth = max(0, min(depth, len(EPIC_TREE_LEVELS)))
+    
+    def projection(level: int) -> Optional[List[str]]:
+        # The ID list pointing at the next level is needed to walk down to it
+        if fields is None:
+            return None
+        if level < depth:
+            return list(dict.fromkeys([*fields, EPIC_TREE_LEVELS[level][1]]))
+        return list(fields)
+    
+    root = await get_document("epics", epic_id, field_paths=projection(0), stats=stats)
+    if root is None:
+        return None
+    
+    parents = [root]
+    for level, (collection, link_field) in enumerate(EPIC_TREE_LEVELS[:depth], start=1):
+        child_ids = [child_id for parent in parents for child_id in parent.get(link_field, [])]
+        children = await get_documents(collection, child_ids, field_paths=projection(level), stats=stats)
+        by_id = {child["id"]: child for child in children}
+        for parent in parents:
+            parent[link_field] = [by_id[child_id] for child_id in parent.get(link_field, []) if child_id in by_id]
+        parents = children
+    return root
 
 # ---------- Task Dependencies ----------
 
-def has_circular_dependency(task_id: TaskId, depends_on_task_id: TaskId, visited: Optional[set] = None) -> bool:
+# Attempts made when another worker changes the dependency graph between our
+# freshness check and our commit
+DEPENDENCY_WRITE_ATTEMPTS = 3
+
+async def has_circular_dependency(task_id: TaskId, depends_on_task_id: TaskId) -> bool:
     """
-    Check if adding a dependency would create a circular reference.
+    Check if making a task depend on another would create a circular reference.
+    
+    Answered from the in-memory dependency graph with an iterative walk, so
+    deep chains cost no extra reads and never hit the recursion limit.
     
     Args:
-        task_id: ID of the task to check
+        task_id: ID of the task that would get the dependency
         depends_on_task_id: ID of the task that would be added as a dependency
-        visited: Set of already visited task IDs (used for recursion)
         
     Returns:
         True if adding the dependency would create a circular reference
     """
-    if visited is None:
-        visited = set()
-    
-    if task_id in visited:
-        return True
-    
-    visited.add(task_id)
-    task = db.collection("tasks").document(task_id).get()
-    if not task.exists:
-        return False
-    
-    task_data = task.to_dict()
-    dependencies = task_data.get("dependencies", [])
-    
-    for dep_id in dependencies:
-        if has_circular_dependency(dep_id, depends_on_task_id, visited):
-            return True
-    
-    return False
+    await dependency_graph.ensure_fresh()
+    return dependency_graph.reaches(depends_on_task_id, task_id)
 
-def add_task_dependency(task_id: TaskId, depends_on_task_id: TaskId) -> None:
+async def add_task_dependency(task_id: TaskId, depends_on_task_id: TaskId) -> None:
     """
     Make a task dependent on another task.
     
@@ -273,29 +475,47 @@ def add_task_dependency(task_id: TaskId, depends_on_task_id: TaskId) -> None:
         CircularDependencyError: If adding this dependency would create a circular reference
         EntityNotFoundError: If either task doesn't exist
     """
-    # Check if tasks exist
-    task = db.collection("tasks").document(task_id).get()
-    depends_on_task = db.collection("tasks").document(depends_on_task_id).get()
-    
-    if not task.exists:
-        raise EntityNotFoundError(f"Task {task_id} does not exist")
-    if not depends_on_task.exists:
-        raise EntityNotFoundError(f"Task {depends_on_task_id} does not exist")
-    
-    # Check for circular dependencies
-    if has_circular_dependency(depends_on_task_id, task_id):
-        raise CircularDependencyError(
-            f"Adding dependency from {task_id} to {depends_on_task_id} would create a circular reference"
-        )
-    
-    # Add the dependency
     task_ref = db.collection("tasks").document(task_id)
-    task_ref.update({
-        "dependencies": firestore.ArrayUnion([depends_on_task_id]),
-        "updated_at": datetime.now(timezone.utc)
-    })
+    depends_on_ref = db.collection("tasks").document(depends_on_task_id)
+    
+    for _ in range(DEPENDENCY_WRITE_ATTEMPTS):
+        # Existence of both tasks and freshness of the graph index in one round trip
+        snapshots = {
+            snap.reference.path: snap
+            async for snap in db.get_all([task_ref, depends_on_ref, dependency_graph.meta_ref], field_paths=META_FIELDS)
+        }
+        if not snapshots[task_ref.path].exists:
+            raise EntityNotFoundError(f"Task {task_id} does not exist")
+        if not snapshots[depends_on_ref.path].exists:
+            raise EntityNotFoundError(f"Task {depends_on_task_id} does not exist")
+        await dependency_graph.ensure_fresh(snapshots[dependency_graph.meta_ref.path])
+        
+        # Check for circular dependencies
+        if dependency_graph.reaches(depends_on_task_id, task_id):
+            raise CircularDependencyError(
+                f"Adding dependency from {task_id} to {depends_on_task_id} would create a circular reference"
+            )
+        
+        # Add the dependency together with the graph version bump
+        batch = db.batch()
+        batch.update(task_ref, {
+            "dependencies": firestore.ArrayUnion([depends_on_task_id]),
+            "updated_at": datetime.now(timezone.utc)
+        })
+        token = dependency_graph.stage_version_bump(batch, [task_id])
+        try:
+            results = await batch.commit()
+        except (FailedPrecondition, Conflict):
+            # The graph changed under us; the next freshness check catches up and we re-check
+            continue
+        dependency_graph.add_edge(task_id, depends_on_task_id)
+        entity_cache.invalidate("tasks", task_id)
+        dependency_graph.commit_version(token, results[-1].update_time)
+        return
+    
+    raise Conflict(f"Task dependency graph kept changing while adding {task_id} -> {depends_on_task_id}")
 
-def remove_task_dependency(task_id: TaskId, depends_on_task_id: TaskId) -> None:
+async def remove_task_dependency(task_id: TaskId, depends_on_task_id: TaskId) -> None:
     """
     Remove a dependency between tasks.
     
@@ -304,51 +524,69 @@ def remove_task_dependency(task_id: TaskId, depends_on_task_id: TaskId) -> None:
         depends_on_task_id: ID of the task that is depended upon
     """
     task_ref = db.collection("tasks").document(task_id)
-    task_ref.update({
-        "dependencies": firestore.ArrayRemove([depends_on_task_id]),
-        "updated_at": datetime.now(timezone.utc)
-    })
+    
+    for _ in range(DEPENDENCY_WRITE_ATTEMPTS):
+        await dependency_graph.ensure_fresh()
+        batch = db.batch()
+        batch.update(task_ref, {
+            "dependencies": firestore.ArrayRemove([depends_on_task_id]),
+            "updated_at": datetime.now(timezone.utc)
+        })
+        token = dependency_graph.stage_version_bump(batch, [task_id])
+        try:
+            results = await batch.commit()
+        except (FailedPrecondition, Conflict):
+            continue
+        dependency_graph.remove_edge(task_id, depends_on_task_id)
+        entity_cache.invalidate("tasks", task_id)
+        dependency_graph.commit_version(token, results[-1].update_time)
+        return
+    
+    raise Conflict(f"Task dependency graph kept changing while removing {task_id} -> {depends_on_task_id}")
 
-def get_task_dependencies(task_id: TaskId) -> List[Dict]:
+async def get_task_dependencies(
+    task_id: TaskId,
+    fields: Optional[List[str]] = None,
+    stats: Optional[ReadStats] = None,
+) -> List[Dict]:
     """
     Get all dependencies for a task.
     
+    Dependency IDs come from the in-memory graph; only the dependency
+    documents themselves are fetched, with batched multi-gets.
+    
     Args:
         task_id: ID of the task
+        fields: Only return these task fields (plus ``id``) when given
+        stats: Optional counter updated with the RPCs issued
         
     Returns:
         List of task documents that this task depends on
     """
-    task = db.collection("tasks").document(task_id).get()
-    if not task.exists:
-        return []
-    
-    task_data = task.to_dict()
-    dependency_ids = task_data.get("dependencies", [])
-    
-    dependencies = []
-    for dep_id in dependency_ids:
-        dep = db.collection("tasks").document(dep_id).get()
-        if dep.exists:
-            dep_data = dep.to_dict()
-            dep_data["id"] = dep.id
-            dependencies.append(dep_data)
-    return dependencies
+    await dependency_graph.ensure_fresh()
+    if stats is not None:
+        stats.rpcs += 1
+    return await get_documents("tasks", dependency_graph.dependencies(task_id), field_paths=fields, stats=stats)
 
-def get_dependent_tasks(task_id: TaskId) -> List[Dict]:
+async def get_dependent_tasks(
+    task_id: TaskId,
+    fields: Optional[List[str]] = None,
+    stats: Optional[ReadStats] = None,
+) -> List[Dict]:
     """
     Get all tasks that depend on this task.
     
+    Answered from the reverse adjacency list of the in-memory graph.
+    
     Args:
         task_id: ID of the task
+        fields: Only return these task fields (plus ``id``) when given
+        stats: Optional counter updated with the RPCs issued
         
     Returns:
         List of task documents that depend on this task
     """
-    # Query for tasks that have this task in their dependencies array
-    dependent_tasks = db.collection("tasks").where("dependencies", "array_contains", task_id).stream()
-    
-    return [
-        task.to_dict() | {"id": task.id}
-        for task in dependent_tasks
-    ] 
\ No newline at end of file
+    await dependency_graph.ensure_fresh()
+    if stats is not None:
+        stats.rpcs += 1
+    return await get_documents("tasks", dependency_graph.dependents(task_id), field_paths=fields, stats=stats)
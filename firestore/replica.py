@@ -0,0 +1,162 @@
+import copy
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from firestore.pagination import DEFAULT_PAGE_SIZE, Page, page_in_memory
+
+logger = logging.getLogger(__name__)
+
+# Collections the board polls; these are the ones worth mirroring
+BOARD_COLLECTIONS = ("tasks", "stories", "epics", "sprints")
+
+
+class CollectionReplica:
+    """In-memory copy of one collection, fed by a Firestore snapshot listener."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._docs: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.synced = False
+        self.watch = None
+        self.last_snapshot_at: Optional[float] = None
+        self.read_time = None
+        self.changes_applied = 0
+
+    def on_snapshot(self, snapshots, changes, read_time) -> None:
+        """Listener callback: apply the change deltas of one snapshot."""
+        with self._lock:
+            for change in changes:
+                doc = change.document
+                if change.type.name == "REMOVED":
+                    self._docs.pop(doc.id, None)
+                else:
+                    self._docs[doc.id] = (doc.to_dict() or {}) | {"id": doc.id}
+            self.changes_applied += len(changes)
+            self.synced = True
+            self.last_snapshot_at = time.time()
+            self.read_time = read_time
+
+    @property
+    def ready(self) -> bool:
+        """Synced at least once and the listener stream is still alive."""
+        return self.synced and self.watch is not None and self.watch.is_active
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            return copy.deepcopy(doc) if doc is not None else None
+
+    def documents(self) -> List[dict]:
+        with self._lock:
+            return list(self._docs.values())
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "synced": self.synced,
+            "listener_active": bool(self.watch is not None and self.watch.is_active),
+            "documents": len(self._docs),
+            "changes_applied": self.changes_applied,
+            "read_time": self.read_time.isoformat() if self.read_time else None,
+            "seconds_since_last_snapshot": (
+                round(time.time() - self.last_snapshot_at, 3) if self.last_snapshot_at else None
+            ),
+        }
+
+
+class BoardReplica:
+    """
+    Live replica of the board collections.
+
+    When enabled (BOARD_REPLICA_ENABLED=1) a snapshot listener is attached to
+    each board collection at startup. Listeners only run on the synchronous
+    client, so the replica owns one; change deltas are applied on the
+    listener threads. Once a collection has synced, the list and get helpers
+    in ``firestore/*.py`` serve it from memory, so polling the board costs no
+    Firestore reads. If a listener dies, reads fall back to Firestore.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("BOARD_REPLICA_ENABLED", "").lower() in ("1", "true", "yes")
+        self._replicas: Dict[str, CollectionReplica] = {}
+        self._client = None
+
+    def start(self) -> None:
+        if not self.enabled or self._replicas:
+            return
+        from google.cloud import firestore
+        from firestore.firestore_client import storage_backend
+
+        backend = storage_backend()
+        if backend != "firestore":
+            # Local backends answer reads in-process already; there is nothing to listen to
+            logger.warning(f"Board replica needs the Firestore backend, not starting it on '{backend}'")
+            return
+
+        self._client = firestore.Client()
+        for name in BOARD_COLLECTIONS:
+            replica = CollectionReplica(name)
+            replica.watch = self._client.collection(name).on_snapshot(replica.on_snapshot)
+            self._replicas[name] = replica
+        logger.info(f"Board replica listening on {', '.join(BOARD_COLLECTIONS)}")
+
+    def stop(self) -> None:
+        for replica in self._replicas.values():
+            if replica.watch is not None:
+                replica.watch.unsubscribe()
+        self._replicas = {}
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def is_ready(self, collection: str) -> bool:
+        replica = self._replicas.get(collection)
+        return replica is not None and replica.ready
+
+    def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        return self._replicas[collection].get(doc_id)
+
+    def list_page(
+        self,
+        collection: str,
+        filters: Optional[Dict[str, Any]] = None,
+        allowed_filters: Optional[Dict[str, str]] = None,
+        limit: Optional[int] = DEFAULT_PAGE_SIZE,
+        page_token: Optional[str] = None,
+    ) -> Page:
+        """Same contract as ``pagination.list_page``, answered from the replica."""
+        documents = self._replicas[collection].documents()
+        items, next_page_token = page_in_memory(documents, filters, allowed_filters or {}, limit, page_token)
+        return copy.deepcopy(items), next_page_token
+
+    def stream(
+        self,
+        collection: str,
+        filters: Optional[Dict[str, Any]] = None,
+        allowed_filters: Optional[Dict[str, str]] = None,
+        page_token: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """Same contract as ``pagination.stream_page``; documents are copied one at a time."""
+        documents = self._replicas[collection].documents()
+        items, _ = page_in_memory(documents, filters, allowed_filters or {}, None, page_token)
+
+        async def copies() -> AsyncIterator[dict]:
+            for item in items:
+                yield copy.deepcopy(item)
+
+        return copies()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ready": bool(self._replicas) and all(r.ready for r in self._replicas.values()),
+            "collections": {name: replica.status() for name, replica in self._replicas.items()},
+        }
+
+
+# Shared per-process replica
+board_replica = BoardReplica()
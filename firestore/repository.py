@@ -0,0 +1,104 @@
+"""
+Storage interface of the data layer.
+
+The modules under ``firestore/`` only talk to storage through the shared
+``db`` object from ``firestore/firestore_client.py``, and only use the subset
+of the async Firestore client described here: document CRUD, subcollections,
+``ArrayUnion``/``ArrayRemove``/``Increment``/``DELETE_FIELD`` transforms,
+preconditioned batches and filtered, ordered, cursor-paginated queries.
+
+``google.cloud.firestore.AsyncClient`` satisfies these protocols as-is. Any
+other backend (see ``firestore/sqlite_backend.py``) must implement them with
+the same semantics, including raising ``google.api_core.exceptions.NotFound``
+when updating a missing document, ``AlreadyExists`` when creating an existing
+one and ``FailedPrecondition`` when a write option doesn't hold.
+"""
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Protocol, Tuple
+
+
+class DocumentSnapshot(Protocol):
+    id: str
+    exists: bool
+    reference: "DocumentReference"
+    create_time: Optional[datetime]
+    update_time: Optional[datetime]
+
+    def to_dict(self) -> Optional[Dict[str, Any]]: ...
+
+    def get(self, field_path: str) -> Any: ...
+
+
+class WriteResult(Protocol):
+    update_time: datetime
+
+
+class Query(Protocol):
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None, value: Any = None, *, filter: Any = None) -> "Query": ...
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "Query": ...
+
+    def start_after(self, document_fields_or_snapshot: Any) -> "Query": ...
+
+    def limit(self, count: int) -> "Query": ...
+
+    def select(self, field_paths: Iterable[str]) -> "Query": ...
+
+    def stream(self) -> AsyncIterator[DocumentSnapshot]: ...
+
+    async def get(self) -> List[DocumentSnapshot]: ...
+
+
+class CollectionReference(Query, Protocol):
+    id: str
+    parent: Optional["DocumentReference"]
+
+    def document(self, document_id: Optional[str] = None) -> "DocumentReference": ...
+
+    async def add(self, document_data: Dict[str, Any]) -> Tuple[Any, "DocumentReference"]: ...
+
+
+class DocumentReference(Protocol):
+    id: str
+    path: str
+    parent: CollectionReference
+
+    def collection(self, collection_id: str) -> CollectionReference: ...
+
+    async def get(self, field_paths: Optional[Iterable[str]] = None) -> DocumentSnapshot: ...
+
+    async def create(self, document_data: Dict[str, Any]) -> WriteResult: ...
+
+    async def set(self, document_data: Dict[str, Any], merge: bool = False) -> WriteResult: ...
+
+    async def update(self, field_updates: Dict[str, Any], option: Any = None) -> WriteResult: ...
+
+    async def delete(self, option: Any = None) -> Any: ...
+
+
+class WriteBatch(Protocol):
+    def create(self, reference: DocumentReference, document_data: Dict[str, Any]) -> None: ...
+
+    def set(self, reference: DocumentReference, document_data: Dict[str, Any], merge: bool = False) -> None: ...
+
+    def update(self, reference: DocumentReference, field_updates: Dict[str, Any], option: Any = None) -> None: ...
+
+    def delete(self, reference: DocumentReference, option: Any = None) -> None: ...
+
+    async def commit(self) -> List[WriteResult]: ...
+
+
+class DocumentStore(Protocol):
+    """The client object exposed as ``firestore.firestore_client.db``."""
+
+    def collection(self, *collection_path: str) -> CollectionReference: ...
+
+    def document(self, *document_path: str) -> DocumentReference: ...
+
+    def collection_group(self, collection_id: str) -> Query: ...
+
+    def get_all(self, references: List[DocumentReference], field_paths: Optional[Iterable[str]] = None) -> AsyncIterator[DocumentSnapshot]: ...
+
+    def batch(self) -> WriteBatch: ...
+
+    def write_option(self, **kwargs) -> Any: ...
@@ -0,0 +1,332 @@
+"""
+Denormalized progress aggregates on epics, stories and sprints.
+
+Each parent document carries a ``rollup`` map, kept in step with its
+children by ``Increment`` transforms committed in the same batch as the
+write that changed the child:
+
+- stories, epics and sprints: ``task_count``, ``tasks_by_status.<status>``,
+  ``task_points`` and ``completed_task_points`` of their tasks
+- epics and sprints: ``story_count``, ``stories_by_status.<status>``,
+  ``story_points`` and ``completed_story_points`` of their stories
+
+so a dashboard gets the progress of an epic or sprint from a single read.
+Run ``python -m firestore.rollups`` once to backfill existing data, or after
+writing to the collections outside of ``firestore/*.py``.
+"""
+import asyncio
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from google.api_core.exceptions import Conflict, FailedPrecondition, NotFound
+from google.cloud import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from firestore.bulk import Write, WriteUnit, bulk_commit
+from firestore.cache import entity_cache
+from firestore.firestore_client import db
+
+ROLLUP_FIELD = "rollup"
+# Statuses whose points count as completed
+DONE_STATUSES = frozenset({"done", "completed", "closed"})
+# Times a write is retried when its document changed between the read and the commit
+ROLLUP_WRITE_ATTEMPTS = 3
+
+# Child collection -> (reference field, parent collection) pairs it rolls up into
+ROLLUP_PARENTS = {
+    "tasks": (("story_id", "stories"), ("epic_id", "epics"), ("sprint_id", "sprints")),
+    "stories": (("epic_id", "epics"), ("sprint_id", "sprints")),
+}
+# Child collection -> field holding its points
+POINTS_FIELDS = {"tasks": "sprint_points", "stories": "story_points"}
+# Child collection -> names of the count, by-status, points and completed points rollups it feeds
+ROLLUP_NAMES = {
+    "tasks": ("task_count", "tasks_by_status", "task_points", "completed_task_points"),
+    "stories": ("story_count", "stories_by_status", "story_points", "completed_story_points"),
+}
+
+# (collection, document ID)
+Parent = Tuple[str, str]
+# Path under ``rollup`` -> amount
+Delta = Dict[Tuple[str, ...], float]
+
+
+def tracked_fields(collection: str) -> List[str]:
+    """Fields of a child document its rollup contribution depends on."""
+    return ["status", POINTS_FIELDS[collection]] + [field for field, _ in ROLLUP_PARENTS[collection]]
+
+
+def contribution(collection: str, document: Optional[dict]) -> Delta:
+    """What one child document adds to the rollups of each of its parents."""
+    if document is None:
+        return {}
+    count, by_status, points, completed = ROLLUP_NAMES[collection]
+    status = str(document.get("status") or "none")
+    value = document.get(POINTS_FIELDS[collection])
+    amount = value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+    result: Delta = {(count,): 1, (by_status, status): 1}
+    if amount:
+        result[(points,)] = amount
+        if status.lower() in DONE_STATUSES:
+            result[(completed,)] = amount
+    return result
+
+
+def merge_deltas(into: Dict[Parent, Delta], deltas: Dict[Parent, Delta]) -> Dict[Parent, Delta]:
+    for parent, delta in deltas.items():
+        target = into.setdefault(parent, {})
+        for key, amount in delta.items():
+            target[key] = target.get(key, 0) + amount
+    return into
+
+
+def rollup_deltas(collection: str, before: Optional[dict], after: Optional[dict]) -> Dict[Parent, Delta]:
+    """
+    Increments that move a child's contribution from its old state to its new one.
+
+    Args:
+        collection: Child collection (``tasks`` or ``stories``)
+        before: Child document before the write, None when it is created
+        after: Child document after the write, None when it is deleted
+
+    Returns:
+        Parent -> non-zero increments; a re-parented child is subtracted
+        from its old parents and added to the new ones
+    """
+    deltas: Dict[Parent, Delta] = {}
+    for document, sign in ((before, -1), (after, 1)):
+        signed = {key: sign * amount for key, amount in contribution(collection, document).items()}
+        for field, parent_collection in ROLLUP_PARENTS[collection]:
+            parent_id = (document or {}).get(field)
+            if parent_id and isinstance(parent_id, str):
+                merge_deltas(deltas, {(parent_collection, parent_id): signed})
+    return {
+        parent: {key: amount for key, amount in delta.items() if amount}
+        for parent, delta in deltas.items()
+        if any(delta.values())
+    }
+
+
+def apply_updates(collection: str, before: Optional[dict], updates: Dict[str, Any]) -> Optional[dict]:
+    """The tracked fields of a child after ``updates`` are applied to ``before``."""
+    if before is None:
+        return None
+    after = dict(before)
+    for field in tracked_fields(collection):
+        if field not in updates:
+            continue
+        if updates[field] is firestore.DELETE_FIELD:
+            after.pop(field, None)
+        else:
+            after[field] = updates[field]
+    return after
+
+
+def rollup_writes(deltas: Dict[Parent, Delta], skip: Iterable[Parent] = ()) -> List[Write]:
+    """One ``update`` of ``Increment`` transforms per parent."""
+    skip = set(skip)
+    return [
+        ("update", db.collection(parent_collection).document(parent_id), {
+            FieldPath(ROLLUP_FIELD, *key).to_api_repr(): firestore.Increment(amount)
+            for key, amount in delta.items()
+        })
+        for (parent_collection, parent_id), delta in deltas.items()
+        if (parent_collection, parent_id) not in skip
+    ]
+
+
+def rollup_map(delta: Delta) -> Dict[str, Any]:
+    """The ``rollup`` field of a new parent document, from the increments of its children."""
+    rollup: Dict[str, Any] = {}
+    for key, amount in delta.items():
+        target = rollup
+        for part in key[:-1]:
+            target = target.setdefault(part, {})
+        target[key[-1]] = amount
+    return rollup
+
+
+def combine_updates(writes: List[Write]) -> List[Write]:
+    """Fold updates of the same document into one write; a batch writes each document once."""
+    combined: List[Write] = []
+    updates: Dict[str, dict] = {}
+    for operation, reference, data in writes:
+        if operation == "update" and reference.path in updates:
+            updates[reference.path].update(data)
+            continue
+        if operation == "update":
+            data = dict(data)
+            updates[reference.path] = data
+        combined.append((operation, reference, data))
+    return combined
+
+
+def invalidate_parents(parents: Iterable[Parent]) -> None:
+    for parent_collection, parent_id in parents:
+        entity_cache.invalidate(parent_collection, parent_id)
+
+
+def _missing_parent(error: NotFound, candidates: Iterable[Parent]) -> Optional[Parent]:
+    message = str(error)
+    for parent_collection, parent_id in candidates:
+        if re.search(re.escape(f"{parent_collection}/{parent_id}") + r"(?![\w-])", message):
+            return parent_collection, parent_id
+    return None
+
+
+async def existing_parents(parents: Iterable[Parent]) -> Set[Parent]:
+    """Which of ``parents`` exist, in one multi-get."""
+    by_path = {f"{collection}/{doc_id}": (collection, doc_id) for collection, doc_id in parents}
+    if not by_path:
+        return set()
+    references = [db.collection(collection).document(doc_id) for collection, doc_id in by_path.values()]
+    return {
+        by_path[snapshot.reference.path]
+        async for snapshot in db.get_all(references, field_paths=["created_at"])
+        if snapshot.exists
+    }
+
+
+async def commit_with_rollups(
+    collection: str,
+    doc_id: str,
+    change: Callable[[Optional[dict]], Tuple[List[Write], Optional[dict]]],
+    read_before: bool = True,
+    before: Optional[dict] = None,
+    stage: Optional[Callable[[Any], None]] = None,
+) -> List[Any]:
+    """
+    Commit a write to one child document together with its rollup increments.
+
+    The child's tracked fields are read first and the write is preconditioned
+    on that read, so a concurrent change can't make the increments drift; on
+    a conflict the read and the commit are retried. A caller that already
+    knows them (e.g. it just wrote the child) can pass them instead and save
+    that round trip, at the price of the precondition. Increments for a
+    parent that no longer exists are dropped rather than failing the write.
+
+    Args:
+        collection: Child collection (``tasks`` or ``stories``)
+        doc_id: ID of the child document
+        change: Given the child's tracked fields before the write (None if it
+            doesn't exist), returns the writes to commit and the tracked
+            fields after them (None if the child is deleted)
+        read_before: False for creates, whose document can't exist yet, and
+            when ``before`` is given
+        before: The child's tracked fields, when ``read_before`` is False
+        stage: Adds writes of its own (e.g. a preconditioned version bump)
+            to the batch of each attempt, after all the others
+
+    Returns:
+        The write results of the commit, in batch order
+
+    Raises:
+        NotFound: If a document updated by ``change`` doesn't exist
+    """
+    reference = db.collection(collection).document(doc_id)
+    missing: Set[Parent] = set()
+    conflicts = 0
+    known = before
+    while True:
+        before, option = known, None
+        if read_before:
+            snapshot = await reference.get(field_paths=tracked_fields(collection))
+            if snapshot.exists:
+                before = snapshot.to_dict()
+                option = db.write_option(last_update_time=snapshot.update_time)
+
+        writes, after = change(before)
+        deltas = rollup_deltas(collection, before, after)
+        targeted = {written.path for _, written, _ in writes}
+
+        batch = db.batch()
+        for operation, written, data in combine_updates(writes + rollup_writes(deltas, skip=missing)):
+            precondition = {"option": option} if option is not None and written.path == reference.path else {}
+            if operation == "delete":
+                batch.delete(written, **precondition)
+            elif operation == "update":
+                batch.update(written, data, **precondition)
+            else:
+                getattr(batch, operation)(written, data)
+        if stage is not None:
+            stage(batch)
+        try:
+            results = await batch.commit()
+        except NotFound as e:
+            parent = _missing_parent(
+                e, [p for p in deltas if p not in missing and f"{p[0]}/{p[1]}" not in targeted]
+            )
+            if parent is None:
+                raise
+            missing.add(parent)
+            continue
+        except (FailedPrecondition, Conflict):
+            conflicts += 1
+            if conflicts >= ROLLUP_WRITE_ATTEMPTS:
+                raise
+            continue
+        invalidate_parents(deltas)
+        return results
+
+
+async def bulk_rollups(
+    collection: str,
+    changes: Dict[str, Tuple[Optional[dict], Optional[dict]]],
+) -> Tuple[Callable[[List[WriteUnit]], List[Write]], int, Set[Parent]]:
+    """
+    Rollup increments for a ``bulk_commit`` whose units are keyed by child ID.
+
+    Args:
+        collection: Child collection
+        changes: Child ID -> (tracked fields before, after)
+
+    Returns:
+        A ``shared_writes`` callback summing the increments of the units in
+        each batch (parents that don't exist are left out), the number of
+        writes it adds at most, and the parents it may touch
+    """
+    per_child = {key: rollup_deltas(collection, before, after) for key, (before, after) in changes.items()}
+    parents = {parent for deltas in per_child.values() for parent in deltas}
+    existing = await existing_parents(parents)
+
+    def shared_writes(batch_units: List[WriteUnit]) -> List[Write]:
+        total: Dict[Parent, Delta] = {}
+        for unit in batch_units:
+            merge_deltas(total, per_child.get(unit.key, {}))
+        total = {parent: delta for parent, delta in total.items() if parent in existing and any(delta.values())}
+        return rollup_writes(total)
+
+    return shared_writes, len(existing), existing
+
+
+async def recompute_rollups() -> Dict[str, int]:
+    """
+    Rebuild every rollup from the child documents.
+
+    Returns:
+        Number of documents rewritten per parent collection
+    """
+    totals: Dict[Parent, Delta] = {}
+    for collection in ROLLUP_PARENTS:
+        query = db.collection(collection).select(tracked_fields(collection))
+        async for snapshot in query.stream():
+            merge_deltas(totals, rollup_deltas(collection, None, snapshot.to_dict()))
+
+    parent_collections = sorted({parent for parents in ROLLUP_PARENTS.values() for _, parent in parents})
+    units = []
+    counts = {}
+    for parent_collection in parent_collections:
+        counts[parent_collection] = 0
+        async for snapshot in db.collection(parent_collection).select([]).stream():
+            rollup = rollup_map(totals.get((parent_collection, snapshot.id), {}))
+            reference = db.collection(parent_collection).document(snapshot.id)
+            units.append(WriteUnit(reference.path, [("update", reference, {ROLLUP_FIELD: rollup})]))
+            counts[parent_collection] += 1
+    await bulk_commit(units)
+    entity_cache.clear()
+    return counts
+
+
+if __name__ == "__main__":
+    print(asyncio.run(recompute_rollups()))
@@ -1,54 +1,97 @@
 from firestore.firestore_client import db
+from firestore.cache import entity_cache
+from firestore.replica import board_replica
+from firestore.activity_writer import activity_writer
+from firestore.feeds import list_feed
+from firestore.pagination import DEFAULT_PAGE_SIZE, Page, list_page, stream_page
 from datetime import datetime, timezone
-from typing import List
-
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-print("GOOGLE_APPLICATION_CREDENTIALS: sprint", os.getenv("GOOGLE_APPLICATION_CREDENTIALS"))
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 SPRINT_COLLECTION = "sprints"
 
+# Fields list_sprints can filter on server-side, with their Firestore operator
+SPRINT_FILTERS = {
+    "status": "==",
+    "team_id": "==",
+}
+
 # ---------- SPRINT CRUD ----------
 
-def create_sprint(data: dict) -> str:
+async def create_sprint(data: dict) -> str:
     data["created_at"] = datetime.now(timezone.utc)
-    doc_ref = db.collection(SPRINT_COLLECTION).add(data)
+    doc_ref = await db.collection(SPRINT_COLLECTION).add(data)
     return doc_ref[1].id
 
-def get_sprint(sprint_id: str):
-    doc = db.collection(SPRINT_COLLECTION).document(sprint_id).get()
-    return doc.to_dict() | {"id": doc.id} if doc.exists else None
+async def get_sprint(sprint_id: str):
+    if board_replica.is_ready(SPRINT_COLLECTION):
+        return board_replica.get(SPRINT_COLLECTION, sprint_id)
+    cached = entity_cache.get(SPRINT_COLLECTION, sprint_id)
+    if cached is not None:
+        return cached
+    generation = entity_cache.generation()
+    doc = await db.collection(SPRINT_COLLECTION).document(sprint_id).get()
+    if not doc.exists:
+        return None
+    result = doc.to_dict() | {"id": doc.id}
+    entity_cache.set(SPRINT_COLLECTION, sprint_id, result, generation)
+    return result
 
-def update_sprint(sprint_id: str, updates: dict):
+async def update_sprint(sprint_id: str, updates: dict):
     updates["updated_at"] = datetime.now(timezone.utc)
-    db.collection(SPRINT_COLLECTION).document(sprint_id).update(updates)
+    await db.collection(SPRINT_COLLECTION).document(sprint_id).update(updates)
+    entity_cache.invalidate(SPRINT_COLLECTION, sprint_id)
 
-def delete_sprint(sprint_id: str):
-    db.collection(SPRINT_COLLECTION).document(sprint_id).delete()
+async def delete_sprint(sprint_id: str):
+    await db.collection(SPRINT_COLLECTION).document(sprint_id).delete()
+    entity_cache.invalidate(SPRINT_COLLECTION, sprint_id)
 
-def list_sprints() -> List[dict]:
-    return [doc.to_dict() | {"id": doc.id} for doc in db.collection(SPRINT_COLLECTION).stream()]
+async def list_sprints(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Page:
+    """List one page of sprints; ``limit=None`` opts into a full scan."""
+    if board_replica.is_ready(SPRINT_COLLECTION):
+        return board_replica.list_page(SPRINT_COLLECTION, filters, SPRINT_FILTERS, limit, page_token)
+    return await list_page(db.collection(SPRINT_COLLECTION), filters, SPRINT_FILTERS, limit, page_token)
+
+def stream_sprints(
+    filters: Optional[Dict[str, Any]] = None,
+    page_token: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Every matching sprint, yielded one at a time for NDJSON exports."""
+    if board_replica.is_ready(SPRINT_COLLECTION):
+        return board_replica.stream(SPRINT_COLLECTION, filters, SPRINT_FILTERS, page_token)
+    return stream_page(db.collection(SPRINT_COLLECTION), filters, SPRINT_FILTERS, page_token)
 
 # ---------- COMMENTS ----------
 
-def add_comment(sprint_id: str, comment: dict) -> str:
+async def add_comment(sprint_id: str, comment: dict) -> str:
     comment["created_at"] = datetime.now(timezone.utc)
-    doc_ref = db.collection(SPRINT_COLLECTION).document(sprint_id).collection("comments").add(comment)
+    doc_ref = await db.collection(SPRINT_COLLECTION).document(sprint_id).collection("comments").add(comment)
     return doc_ref[1].id
 
-def get_comments(sprint_id: str) -> List[dict]:
-    comments_ref = db.collection(SPRINT_COLLECTION).document(sprint_id).collection("comments")
-    return [doc.to_dict() | {"id": doc.id} for doc in comments_ref.stream()]
+async def get_comments(
+    sprint_id: str,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Page:
+    """One page of the sprint's comments, oldest first unless ``newest_first``; ``limit=None`` returns all."""
+    return await list_feed(SPRINT_COLLECTION, sprint_id, "comments", limit, page_token, newest_first)
 
 # ---------- ACTIVITY LOG ----------
 
-def log_activity(sprint_id: str, activity: dict) -> str:
+async def log_activity(sprint_id: str, activity: dict) -> str:
     activity["timestamp"] = datetime.now(timezone.utc)
-    doc_ref = db.collection(SPRINT_COLLECTION).document(sprint_id).collection("activity").add(activity)
-    return doc_ref[1].id
+    # Queued and written in batches when write-behind is enabled
+    return await activity_writer.add(db.collection(SPRINT_COLLECTION).document(sprint_id).collection("activity"), activity)
 
-def get_activity_log(sprint_id: str) -> List[dict]:
-    activity_ref = db.collection(SPRINT_COLLECTION).document(sprint_id).collection("activity")
-    return [doc.to_dict() | {"id": doc.id} for doc in activity_ref.order_by("timestamp").stream()]
+async def get_activity_log(
+    sprint_id: str,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Page:
+    """One page of the sprint's activity log, oldest first unless ``newest_first``; ``limit=None`` returns all."""
+    return await list_feed(SPRINT_COLLECTION, sprint_id, "activity", limit, page_token, newest_first)
@@ -0,0 +1,642 @@
+"""
+Local SQLite implementation of the storage interface in ``firestore/repository.py``.
+
+Documents live in a single ``documents`` table keyed by their full path
+(``tasks/abc``, ``tasks/abc/comments/xyz``) with the fields stored as JSON.
+The relationship and board filter fields get expression indexes, so linking,
+tree reads and filtered list queries are index lookups rather than scans.
+Batches commit in one SQLite transaction, which gives the same all-or-nothing
+behaviour as a Firestore batch, and update times are strictly increasing so
+``last_update_time`` preconditions work as they do on Firestore. The time is
+taken inside the commit's transaction from a clock row in the database, so
+it also increases across the processes sharing the file. Every
+statement runs on the client's own worker thread, so a write waiting on
+another process's lock (up to ``busy_timeout``) never blocks the event loop.
+
+Select it with ``STORAGE_BACKEND=sqlite`` (``SQLITE_DB_PATH`` picks the file,
+``:memory:`` keeps everything in the process).
+"""
+import asyncio
+import copy
+import json
+import re
+import secrets
+import sqlite3
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.field_path import parse_field_path
+
+DOCUMENT_ID = "__name__"
+
+# Fields the routes filter on and the relationship fields used to walk the board
+INDEXED_FIELDS = ("epic_id", "story_id", "sprint_id", "status", "priority", "assignee", "team_id", "timestamp")
+
+_TIMESTAMP_TAG = "__ts__:"
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    collection_id TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    create_time TEXT NOT NULL,
+    update_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_parent ON documents(parent, doc_id);
+CREATE INDEX IF NOT EXISTS idx_documents_group ON documents(collection_id, path);
+CREATE TABLE IF NOT EXISTS clock (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    last_time TEXT NOT NULL
+);
+INSERT OR IGNORE INTO clock (id, last_time) SELECT 0, MAX(update_time) FROM documents HAVING COUNT(*) > 0;
+"""
+
+_COMPARISONS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def _format_time(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime(_TIMESTAMP_FORMAT)
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.strptime(value, _TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def _encode(value: Any) -> Any:
+    """Make a document value JSON-safe; timestamps keep a sortable tagged form."""
+    if isinstance(value, datetime):
+        return _TIMESTAMP_TAG + _format_time(value)
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, SQLiteDocumentReference):
+        return value.path
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith(_TIMESTAMP_TAG):
+        return _parse_time(value[len(_TIMESTAMP_TAG):])
+    if isinstance(value, dict):
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _field_parts(field_path: Any) -> List[str]:
+    if hasattr(field_path, "parts"):
+        return list(field_path.parts)
+    return parse_field_path(field_path)
+
+
+def _json_path(field_path: Any) -> str:
+    """SQL literal of the JSON path for a field; matches the expression indexes for plain names."""
+    segments = []
+    for part in _field_parts(field_path):
+        if _IDENTIFIER.match(part):
+            segments.append(f".{part}")
+        else:
+            segments.append('."' + part.replace('"', '""') + '"')
+    return "'$" + "".join(segments).replace("'", "''") + "'"
+
+
+def _lookup(data: Optional[dict], parts: List[str]) -> Tuple[bool, Any]:
+    current: Any = data
+    for part in parts:
+        if not isinstance(current, dict) or part not in current:
+            return False, None
+        current = current[part]
+    return True, current
+
+
+def _transform(current: Any, value: Any, now: datetime) -> Any:
+    """Resolve the stored value of a field once ``value`` (possibly a transform) is written."""
+    if value is transforms.SERVER_TIMESTAMP:
+        return now
+    if isinstance(value, transforms.ArrayUnion):
+        merged = list(current) if isinstance(current, list) else []
+        for item in value.values:
+            if item not in merged:
+                merged.append(copy.deepcopy(item))
+        return merged
+    if isinstance(value, transforms.ArrayRemove):
+        if not isinstance(current, list):
+            return []
+        return [item for item in current if item not in value.values]
+    if isinstance(value, transforms.Increment):
+        base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+        return base + value.value
+    if isinstance(value, transforms.Maximum):
+        base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else None
+        return value.value if base is None else max(base, value.value)
+    if isinstance(value, transforms.Minimum):
+        base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else None
+        return value.value if base is None else min(base, value.value)
+    if isinstance(value, dict):
+        return {
+            key: _transform(None, item, now)
+            for key, item in value.items()
+            if item is not transforms.DELETE_FIELD
+        }
+    return copy.deepcopy(value)
+
+
+def _assign(target: dict, parts: List[str], value: Any, now: datetime) -> None:
+    parent = target
+    for part in parts[:-1]:
+        child = parent.get(part)
+        if not isinstance(child, dict):
+            child = {}
+            parent[part] = child
+        parent = child
+    if value is transforms.DELETE_FIELD:
+        parent.pop(parts[-1], None)
+    else:
+        parent[parts[-1]] = _transform(parent.get(parts[-1]), value, now)
+
+
+def _merge(target: dict, data: dict, now: datetime) -> None:
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value, now)
+        else:
+            _assign(target, [key], value, now)
+
+
+def _project(data: dict, field_paths: Optional[Iterable[str]]) -> dict:
+    if field_paths is None:
+        return data
+    projected: dict = {}
+    for field_path in field_paths:
+        parts = _field_parts(field_path)
+        found, value = _lookup(data, parts)
+        if found:
+            parent = projected
+            for part in parts[:-1]:
+                parent = parent.setdefault(part, {})
+            parent[parts[-1]] = value
+    return projected
+
+
+class SQLiteWriteOption:
+    """Precondition returned by ``SQLiteClient.write_option``."""
+
+    def __init__(self, last_update_time: Optional[datetime] = None, exists: Optional[bool] = None):
+        self.last_update_time = last_update_time
+        self.exists = exists
+
+
+class SQLiteWriteResult:
+    def __init__(self, update_time: datetime):
+        self.update_time = update_time
+
+
+class SQLiteDocumentSnapshot:
+    def __init__(self, reference: "SQLiteDocumentReference", data: Optional[dict],
+                 create_time: Optional[datetime] = None, update_time: Optional[datetime] = None):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data)
+
+    def get(self, field_path: str) -> Any:
+        found, value = _lookup(self._data, _field_parts(field_path))
+        if not found:
+            raise KeyError(f"'{field_path}' is not contained in the data")
+        return copy.deepcopy(value)
+
+
+class SQLiteQuery:
+    """Filtered, ordered, cursor-paginated read over one collection or a collection group."""
+
+    def __init__(self, client: "SQLiteClient", collection_id: str, parent_path: Optional[str] = None,
+                 all_descendants: bool = False, filters: Tuple = (), orders: Tuple = (),
+                 cursor: Any = None, limit_count: Optional[int] = None,
+                 projection: Optional[List[str]] = None):
+        self._client = client
+        self._collection_id = collection_id
+        self._parent_path = parent_path
+        self._all_descendants = all_descendants
+        self._filters = filters
+        self._orders = orders
+        self._cursor = cursor
+        self._limit = limit_count
+        self._projection = projection
+
+    def _copy(self, **changes) -> "SQLiteQuery":
+        state = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "cursor": self._cursor,
+            "limit_count": self._limit,
+            "projection": self._projection,
+        }
+        state.update(changes)
+        return SQLiteQuery(self._client, self._collection_id, self._parent_path, self._all_descendants, **state)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None,
+              value: Any = None, *, filter: Any = None) -> "SQLiteQuery":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string not in _COMPARISONS and op_string not in ("array_contains", "array_contains_any", "in", "not-in"):
+            raise ValueError(f"Unsupported operator: {op_string}")
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "SQLiteQuery":
+        return self._copy(orders=self._orders + ((field_path, direction.upper() == "DESCENDING"),))
+
+    def start_after(self, document_fields_or_snapshot: Any) -> "SQLiteQuery":
+        return self._copy(cursor=document_fields_or_snapshot)
+
+    def limit(self, count: int) -> "SQLiteQuery":
+        return self._copy(limit_count=count)
+
+    def select(self, field_paths: Iterable[str]) -> "SQLiteQuery":
+        return self._copy(projection=list(field_paths))
+
+    async def stream(self) -> AsyncIterator[SQLiteDocumentSnapshot]:
+        for snapshot in await self._client._call(self._run):
+            yield snapshot
+
+    async def get(self) -> List[SQLiteDocumentSnapshot]:
+        return await self._client._call(self._run)
+
+    def _key_sql(self, field_path: str) -> str:
+        if field_path == DOCUMENT_ID:
+            return "path" if self._all_descendants else "doc_id"
+        return f"json_extract(data, {_json_path(field_path)})"
+
+    def _key_value(self, field_path: str, value: Any) -> Any:
+        if field_path == DOCUMENT_ID:
+            if hasattr(value, "path"):
+                value = value.path
+            return value if self._all_descendants else str(value).rsplit("/", 1)[-1]
+        return _encode(value)
+
+    def _cursor_values(self, orders: List[Tuple[str, bool]]) -> List[Any]:
+        cursor = self._cursor
+        if isinstance(cursor, SQLiteDocumentSnapshot):
+            values = []
+            for field_path, _ in orders:
+                values.append(cursor.reference if field_path == DOCUMENT_ID else cursor.get(field_path))
+            return values
+        if isinstance(cursor, dict):
+            values = []
+            for field_path, _ in orders:
+                if field_path not in cursor:
+                    break
+                values.append(cursor[field_path])
+            return values
+        return list(cursor)
+
+    def _run(self) -> List[SQLiteDocumentSnapshot]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if self._all_descendants:
+            clauses.append("collection_id = ?")
+            params.append(self._collection_id)
+        else:
+            clauses.append("parent = ?")
+            params.append(f"{self._parent_path}/{self._collection_id}" if self._parent_path else self._collection_id)
+
+        for field_path, op, value in self._filters:
+            key = self._key_sql(field_path)
+            if op in _COMPARISONS:
+                clauses.append(f"{key} {_COMPARISONS[op]} ?")
+                params.append(self._key_value(field_path, value))
+            elif op in ("in", "not-in"):
+                marks = ", ".join("?" for _ in value)
+                clauses.append(f"{key} {'IN' if op == 'in' else 'NOT IN'} ({marks})")
+                params.extend(self._key_value(field_path, item) for item in value)
+            else:
+                candidates = [value] if op == "array_contains" else list(value)
+                marks = ", ".join("?" for _ in candidates)
+                clauses.append(
+                    f"EXISTS (SELECT 1 FROM json_each(data, {_json_path(field_path)}) WHERE value IN ({marks}))"
+                )
+                params.extend(_encode(item) for item in candidates)
+
+        orders = list(self._orders)
+        if not any(field_path == DOCUMENT_ID for field_path, _ in orders):
+            orders.append((DOCUMENT_ID, orders[-1][1] if orders else False))
+        for field_path, _ in orders:
+            if field_path != DOCUMENT_ID:
+                clauses.append(f"json_type(data, {_json_path(field_path)}) IS NOT NULL")
+
+        if self._cursor is not None:
+            values = self._cursor_values(orders)
+            alternatives = []
+            for index, value in enumerate(values):
+                terms = []
+                for field_path, _ in orders[:index]:
+                    terms.append(f"{self._key_sql(field_path)} = ?")
+                params_prefix = [self._key_value(f, v) for (f, _), v in zip(orders[:index], values[:index])]
+                field_path, descending = orders[index]
+                terms.append(f"{self._key_sql(field_path)} {'<' if descending else '>'} ?")
+                alternatives.append("(" + " AND ".join(terms) + ")")
+                params.extend(params_prefix + [self._key_value(field_path, value)])
+            if alternatives:
+                clauses.append("(" + " OR ".join(alternatives) + ")")
+
+        order_sql = ", ".join(
+            f"{self._key_sql(field_path)} {'DESC' if descending else 'ASC'}" for field_path, descending in orders
+        )
+        sql = (
+            "SELECT path, data, create_time, update_time FROM documents "
+            f"WHERE {' AND '.join(clauses)} ORDER BY {order_sql}"
+        )
+        if self._limit is not None:
+            sql += " LIMIT ?"
+            params.append(self._limit)
+
+        rows = self._client._fetch(sql, params)
+        # Like Firestore, a query that matches nothing is still billed one read
+        self._client._record(reads=max(1, len(rows)))
+        return [self._client._snapshot(row, self._projection) for row in rows]
+
+
+class SQLiteCollectionReference(SQLiteQuery):
+    def __init__(self, client: "SQLiteClient", path: str):
+        parent_path, _, collection_id = path.rpartition("/")
+        super().__init__(client, collection_id, parent_path or None)
+        self.path = path
+        self.id = collection_id
+
+    @property
+    def parent(self) -> Optional["SQLiteDocumentReference"]:
+        return SQLiteDocumentReference(self._client, self._parent_path) if self._parent_path else None
+
+    def document(self, document_id: Optional[str] = None) -> "SQLiteDocumentReference":
+        if document_id is None:
+            document_id = "".join(secrets.choice(_AUTO_ID_CHARS) for _ in range(20))
+        return SQLiteDocumentReference(self._client, f"{self.path}/{document_id}")
+
+    async def add(self, document_data: dict, document_id: Optional[str] = None):
+        reference = self.document(document_id)
+        result = await reference.create(document_data)
+        return result.update_time, reference
+
+
+class SQLiteDocumentReference:
+    def __init__(self, client: "SQLiteClient", path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, SQLiteDocumentReference) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+    @property
+    def parent(self) -> SQLiteCollectionReference:
+        return SQLiteCollectionReference(self._client, self.path.rsplit("/", 1)[0])
+
+    def collection(self, collection_id: str) -> SQLiteCollectionReference:
+        return SQLiteCollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    async def get(self, field_paths: Optional[Iterable[str]] = None, transaction: Any = None) -> SQLiteDocumentSnapshot:
+        return (await self._client._call(self._client._get_snapshots, [self], field_paths))[0]
+
+    async def create(self, document_data: dict) -> SQLiteWriteResult:
+        batch = self._client.batch()
+        batch.create(self, document_data)
+        return (await batch.commit())[0]
+
+    async def set(self, document_data: dict, merge: bool = False) -> SQLiteWriteResult:
+        batch = self._client.batch()
+        batch.set(self, document_data, merge=merge)
+        return (await batch.commit())[0]
+
+    async def update(self, field_updates: dict, option: Optional[SQLiteWriteOption] = None) -> SQLiteWriteResult:
+        batch = self._client.batch()
+        batch.update(self, field_updates, option=option)
+        return (await batch.commit())[0]
+
+    async def delete(self, option: Optional[SQLiteWriteOption] = None) -> datetime:
+        batch = self._client.batch()
+        batch.delete(self, option=option)
+        return (await batch.commit())[0].update_time
+
+
+class SQLiteWriteBatch:
+    """Writes applied together in one SQLite transaction on ``commit``."""
+
+    def __init__(self, client: "SQLiteClient"):
+        self._client = client
+        self._writes: List[Tuple[str, SQLiteDocumentReference, Any, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._writes)
+
+    def create(self, reference: SQLiteDocumentReference, document_data: dict) -> None:
+        self._writes.append(("create", reference, document_data, None))
+
+    def set(self, reference: SQLiteDocumentReference, document_data: dict, merge: bool = False) -> None:
+        self._writes.append(("set", reference, document_data, merge))
+
+    def update(self, reference: SQLiteDocumentReference, field_updates: dict,
+               option: Optional[SQLiteWriteOption] = None) -> None:
+        self._writes.append(("update", reference, field_updates, option))
+
+    def delete(self, reference: SQLiteDocumentReference, option: Optional[SQLiteWriteOption] = None) -> None:
+        self._writes.append(("delete", reference, None, option))
+
+    async def commit(self) -> List[SQLiteWriteResult]:
+        writes, self._writes = self._writes, []
+        return await self._client._call(self._client._commit, writes)
+
+
+class SQLiteClient:
+    """Drop-in for the subset of ``firestore.AsyncClient`` the data layer uses."""
+
+    def __init__(self, database: str = ":memory:"):
+        self.database = database
+        self._lock = threading.RLock()
+        # One thread, so statements still run one at a time and in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-storage")
+        self._conn = sqlite3.connect(database, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA busy_timeout = 5000")
+        if database != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        for field in INDEXED_FIELDS:
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_documents_{field} "
+                f"ON documents(parent, json_extract(data, '$.{field}'))"
+            )
+        # Firestore-equivalent operation counts: round trips, billed document reads and writes
+        self.usage = {"rpcs": 0, "reads": 0, "writes": 0}
+
+    def collection(self, *collection_path: str) -> SQLiteCollectionReference:
+        return SQLiteCollectionReference(self, "/".join(collection_path))
+
+    def document(self, *document_path: str) -> SQLiteDocumentReference:
+        return SQLiteDocumentReference(self, "/".join(document_path))
+
+    def collection_group(self, collection_id: str) -> SQLiteQuery:
+        return SQLiteQuery(self, collection_id, all_descendants=True)
+
+    def batch(self) -> SQLiteWriteBatch:
+        return SQLiteWriteBatch(self)
+
+    @staticmethod
+    def write_option(**kwargs) -> SQLiteWriteOption:
+        return SQLiteWriteOption(**kwargs)
+
+    async def get_all(self, references: List[SQLiteDocumentReference],
+                      field_paths: Optional[Iterable[str]] = None,
+                      transaction: Any = None) -> AsyncIterator[SQLiteDocumentSnapshot]:
+        for snapshot in await self._call(self._get_snapshots, references, field_paths):
+            yield snapshot
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+    async def _call(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _record(self, reads: int = 0, writes: int = 0) -> None:
+        with self._lock:
+            self.usage["rpcs"] += 1
+            self.usage["reads"] += reads
+            self.usage["writes"] += writes
+
+    def _fetch(self, sql: str, params: List[Any]) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _snapshot(self, row: tuple, field_paths: Optional[Iterable[str]] = None) -> SQLiteDocumentSnapshot:
+        path, data, create_time, update_time = row
+        return SQLiteDocumentSnapshot(
+            SQLiteDocumentReference(self, path),
+            _project(_decode(json.loads(data)), field_paths),
+            _parse_time(create_time),
+            _parse_time(update_time),
+        )
+
+    def _get_snapshots(self, references: List[SQLiteDocumentReference],
+                       field_paths: Optional[Iterable[str]] = None) -> List[SQLiteDocumentSnapshot]:
+        field_paths = list(field_paths) if field_paths is not None else None
+        paths = list(dict.fromkeys(reference.path for reference in references))
+        rows: Dict[str, tuple] = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            marks = ", ".join("?" for _ in chunk)
+            for row in self._fetch(
+                f"SELECT path, data, create_time, update_time FROM documents WHERE path IN ({marks})", chunk
+            ):
+                rows[row[0]] = row
+        self._record(reads=len(references))
+        return [
+            self._snapshot(rows[reference.path], field_paths) if reference.path in rows
+            else SQLiteDocumentSnapshot(reference, None)
+            for reference in references
+        ]
+
+    def _next_time(self) -> datetime:
+        """A time after every earlier commit to the file, by any process; call inside the write transaction."""
+        now = datetime.now(timezone.utc)
+        row = self._conn.execute("SELECT last_time FROM clock WHERE id = 0").fetchone()
+        if row is not None:
+            last = _parse_time(row[0])
+            if now <= last:
+                now = last + timedelta(microseconds=1)
+        self._conn.execute(
+            "INSERT INTO clock (id, last_time) VALUES (0, ?) ON CONFLICT(id) DO UPDATE SET last_time = excluded.last_time",
+            (_format_time(now),),
+        )
+        return now
+
+    @staticmethod
+    def _check_option(reference: SQLiteDocumentReference, row: Optional[tuple], option: Any) -> None:
+        if not isinstance(option, SQLiteWriteOption):
+            return
+        if option.exists is not None and option.exists != (row is not None):
+            raise FailedPrecondition(f"Document {'does not exist' if row is None else 'already exists'}: {reference.path}")
+        if option.last_update_time is not None:
+            if row is None or row[2] != _format_time(option.last_update_time):
+                raise FailedPrecondition(f"Document was modified since the given update time: {reference.path}")
+
+    def _commit(self, writes: List[Tuple[str, SQLiteDocumentReference, Any, Any]]) -> List[SQLiteWriteResult]:
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = self._next_time()
+                stamp = _format_time(now)
+                for operation, reference, data, option in writes:
+                    row = conn.execute(
+                        "SELECT data, create_time, update_time FROM documents WHERE path = ?", (reference.path,)
+                    ).fetchone()
+                    self._check_option(reference, row, option)
+
+                    if operation == "delete":
+                        conn.execute("DELETE FROM documents WHERE path = ?", (reference.path,))
+                        continue
+                    if operation == "create":
+                        if row is not None:
+                            raise AlreadyExists(f"Document already exists: {reference.path}")
+                        document = {}
+                        _merge(document, data, now)
+                    elif operation == "set":
+                        merge = option is True
+                        document = _decode(json.loads(row[0])) if row is not None and merge else {}
+                        if merge:
+                            _merge(document, data, now)
+                        else:
+                            for key, value in data.items():
+                                _assign(document, [key], value, now)
+                    else:
+                        if row is None:
+                            raise NotFound(f"No document to update: {reference.path}")
+                        document = _decode(json.loads(row[0]))
+                        for field_path, value in data.items():
+                            _assign(document, _field_parts(field_path), value, now)
+
+                    parent, _, doc_id = reference.path.rpartition("/")
+                    conn.execute(
+                        "INSERT INTO documents (path, parent, collection_id, doc_id, data, create_time, update_time) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(path) DO UPDATE SET data = excluded.data, update_time = excluded.update_time",
+                        (
+                            reference.path, parent, parent.rsplit("/", 1)[-1], doc_id,
+                            json.dumps(_encode(document)), row[1] if row is not None else stamp, stamp,
+                        ),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._record()
+                raise
+            self._record(writes=len(writes))
+        return [SQLiteWriteResult(now) for _ in writes]
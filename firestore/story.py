@@ -1,79 +1,141 @@
 from firestore.firestore_client import db
+from firestore.bulk import WriteUnit, bulk_commit
+from firestore.cache import entity_cache
+from firestore.replica import board_replica
+from firestore.activity_writer import activity_writer
+from firestore.feeds import list_feed
+from firestore.pagination import DEFAULT_PAGE_SIZE, Page, list_page, stream_page
+from firestore.rollups import apply_updates, bulk_rollups, commit_with_rollups, invalidate_parents
 from datetime import datetime, timezone
-from typing import List, Dict
+from typing import Any, AsyncIterator, List, Dict, Optional
 from google.cloud import firestore
 
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-print("GOOGLE_APPLICATION_CREDENTIALS: story", os.getenv("GOOGLE_APPLICATION_CREDENTIALS"))
-
 STORY_COLLECTION = "stories"
+
+# Fields list_stories can filter on server-side, with their Firestore operator
+STORY_FILTERS = {
+    "status": "==",
+    "sprint_id": "==",
+    "epic_id": "==",
+    "assignee": "==",
+    "priority": "==",
+}
 # ---------- STORY CRUD ----------
 
-def create_story(data: dict) -> str:
+async def create_story(data: dict) -> str:
     data["created_at"] = datetime.now(timezone.utc)
-    doc_ref = db.collection(STORY_COLLECTION).add(data)
-    return doc_ref[1].id
+    doc_ref = db.collection(STORY_COLLECTION).document()
+    # The parents' rollups are incremented in the same commit
+    await commit_with_rollups(
+        STORY_COLLECTION, doc_ref.id, lambda before: ([("create", doc_ref, data)], data), read_before=False
+    )
+    return doc_ref.id
 
-def bulk_create_stories(stories_data: List[Dict]) -> List[Dict[str, str]]:
+async def bulk_create_stories(stories_data: List[Dict]) -> List[Dict[str, Any]]:
     """
-    Create multiple stories in a batch operation.
-    Returns a list of dictionaries containing story IDs and their data.
+    Create multiple stories with auto-chunked, parallel batch commits.
+    Returns one dictionary per input story containing its ID and data; stories
+    that could not be written also carry an ``error`` message.
     """
-    batch = db.batch()
-    story_refs = []
+    units = []
+    created = []
     current_time = datetime.now(timezone.utc)
     
-    # Prepare all stories in the batch
+    # Prepare one create per story
     for story_data in stories_data:
         doc_ref = db.collection(STORY_COLLECTION).document()
         story_data["created_at"] = current_time
-        batch.set(doc_ref, story_data)
-        story_refs.append((doc_ref, story_data))
+        units.append(WriteUnit(doc_ref.id, [("create", doc_ref, story_data)]))
+        created.append({"id": doc_ref.id, **story_data})
     
-    # Commit the batch
-    batch.commit()
+    # Commit in chunks below the batch write limit; each batch also
+    # increments the rollups of the epics and sprints of its stories
+    shared_writes, shared_write_count, parents = await bulk_rollups(
+        STORY_COLLECTION, {unit.key: (None, unit.writes[0][2]) for unit in units}
+    )
+    results = await bulk_commit(units, shared_writes=shared_writes, shared_write_count=shared_write_count)
+    invalidate_parents(parents)
     
-    # Return the created stories with their IDs
-    return [{
-        "id": ref.id,
-        **data
-    } for ref, data in story_refs]
+    for story_data, result in zip(created, results):
+        if not result["success"]:
+            story_data["error"] = result["error"]
+    return created
 
-def get_story(story_id: str):
-    doc = db.collection(STORY_COLLECTION).document(story_id).get()
-    return doc.to_dict() | {"id": doc.id} if doc.exists else None
+async def get_story(story_id: str):
+    if board_replica.is_ready(STORY_COLLECTION):
+        return board_replica.get(STORY_COLLECTION, story_id)
+    cached = entity_cache.get(STORY_COLLECTION, story_id)
+    if cached is not None:
+        return cached
+    generation = entity_cache.generation()
+    doc = await db.collection(STORY_COLLECTION).document(story_id).get()
+    if not doc.exists:
+        return None
+    result = doc.to_dict() | {"id": doc.id}
+    entity_cache.set(STORY_COLLECTION, story_id, result, generation)
+    return result
 
-def update_story(story_id: str, updates: dict):
+async def update_story(story_id: str, updates: dict):
     updates["updated_at"] = datetime.now(timezone.utc)
-    db.collection(STORY_COLLECTION).document(story_id).update(updates)
+    doc_ref = db.collection(STORY_COLLECTION).document(story_id)
+    await commit_with_rollups(
+        STORY_COLLECTION, story_id,
+        lambda before: ([("update", doc_ref, updates)], apply_updates(STORY_COLLECTION, before, updates)),
+    )
+    entity_cache.invalidate(STORY_COLLECTION, story_id)
+
+async def delete_story(story_id: str):
+    doc_ref = db.collection(STORY_COLLECTION).document(story_id)
+    await commit_with_rollups(STORY_COLLECTION, story_id, lambda before: ([("delete", doc_ref, None)], None))
+    entity_cache.invalidate(STORY_COLLECTION, story_id)
 
-def delete_story(story_id: str):
-    db.collection(STORY_COLLECTION).document(story_id).delete()
+async def list_stories(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Page:
+    """List one page of stories; ``limit=None`` opts into a full scan."""
+    if board_replica.is_ready(STORY_COLLECTION):
+        return board_replica.list_page(STORY_COLLECTION, filters, STORY_FILTERS, limit, page_token)
+    return await list_page(db.collection(STORY_COLLECTION), filters, STORY_FILTERS, limit, page_token)
 
-def list_stories() -> List[dict]:
-    return [doc.to_dict() | {"id": doc.id} for doc in db.collection(STORY_COLLECTION).stream()]
+def stream_stories(
+    filters: Optional[Dict[str, Any]] = None,
+    page_token: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Every matching story, yielded one at a time for NDJSON exports."""
+    if board_replica.is_ready(STORY_COLLECTION):
+        return board_replica.stream(STORY_COLLECTION, filters, STORY_FILTERS, page_token)
+    return stream_page(db.collection(STORY_COLLECTION), filters, STORY_FILTERS, page_token)
 
 # ---------- COMMENTS ----------
 
-def add_comment(story_id: str, comment: dict) -> str:
+async def add_comment(story_id: str, comment: dict) -> str:
     comment["created_at"] = datetime.now(timezone.utc)
-    doc_ref = db.collection(STORY_COLLECTION).document(story_id).collection("comments").add(comment)
+    doc_ref = await db.collection(STORY_COLLECTION).document(story_id).collection("comments").add(comment)
     return doc_ref[1].id
 
-def get_comments(story_id: str) -> List[dict]:
-    comments_ref = db.collection(STORY_COLLECTION).document(story_id).collection("comments")
-    return [doc.to_dict() | {"id": doc.id} for doc in comments_ref.stream()]
+async def get_comments(
+    story_id: str,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Page:
+    """One page of the story's comments, oldest first unless ``newest_first``; ``limit=None`` returns all."""
+    return await list_feed(STORY_COLLECTION, story_id, "comments", limit, page_token, newest_first)
 
 # ---------- ACTIVITY LOG ----------
 
-def log_activity(story_id: str, activity: dict) -> str:
+async def log_activity(story_id: str, activity: dict) -> str:
     activity["timestamp"] = datetime.now(timezone.utc)
-    doc_ref = db.collection(STORY_COLLECTION).document(story_id).collection("activity").add(activity)
-    return doc_ref[1].id
+    # Queued and written in batches when write-behind is enabled
+    return await activity_writer.add(db.collection(STORY_COLLECTION).document(story_id).collection("activity"), activity)
 
-def get_activity_log(story_id: str) -> List[dict]:
-    activity_ref = db.collection(STORY_COLLECTION).document(story_id).collection("activity")
-    return [doc.to_dict() | {"id": doc.id} for doc in activity_ref.order_by("timestamp").stream()]
+async def get_activity_log(
+    story_id: str,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Page:
+    """One page of the story's activity log, oldest first unless ``newest_first``; ``limit=None`` returns all."""
+    return await list_feed(STORY_COLLECTION, story_id, "activity", limit, page_token, newest_first)
@@ -1,118 +1,240 @@
-from dotenv import load_dotenv
+import asyncio
 from firestore.firestore_client import db
+from firestore.batching import get_documents
+from firestore.bulk import WriteUnit, bulk_commit
+from firestore.cache import entity_cache
+from firestore.dependency_graph import dependency_graph
+from firestore.replica import board_replica
+from firestore.activity_writer import activity_writer
+from firestore.feeds import list_feed
+from firestore.pagination import DEFAULT_PAGE_SIZE, Page, list_page, stream_page
+from firestore.rollups import apply_updates, commit_with_rollups
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from google.api_core.exceptions import Conflict, FailedPrecondition, NotFound
 from google.cloud import firestore
 
-load_dotenv()
-
 TASK_COLLECTION = "tasks"
 DEVELOPER_COLLECTION = "developers"
 
+# Fields list_tasks can filter on server-side, with their Firestore operator
+TASK_FILTERS = {
+    "status": "==",
+    "sprint_id": "==",
+    "story_id": "==",
+    "epic_id": "==",
+    "assignees": "array_contains",
+    "priority": "==",
+}
+
 # ---------- TASK CRUD ----------
 
-def create_task(data: dict) -> str:
+async def create_task(data: dict) -> str:
     data["created_at"] = datetime.now(timezone.utc)
-    doc_ref = db.collection(TASK_COLLECTION).add(data)
-    return doc_ref[1].id
+    doc_ref = db.collection(TASK_COLLECTION).document()
+    # The parents' rollups are incremented in the same commit
+    await commit_with_rollups(
+        TASK_COLLECTION, doc_ref.id, lambda before: ([("create", doc_ref, data)], data), read_before=False
+    )
+    return doc_ref.id
+
+async def get_task(task_id: str):
+    if board_replica.is_ready(TASK_COLLECTION):
+        return board_replica.get(TASK_COLLECTION, task_id)
+    cached = entity_cache.get(TASK_COLLECTION, task_id)
+    if cached is not None:
+        return cached
+    generation = entity_cache.generation()
+    doc = await db.collection(TASK_COLLECTION).document(task_id).get()
+    if not doc.exists:
+        return None
+    result = doc.to_dict() | {"id": doc.id}
+    entity_cache.set(TASK_COLLECTION, task_id, result, generation)
+    return result
+
+async def update_task(task_id: str, updates: dict):
+    updates["updated_at"] = datetime.now(timezone.utc)
+    doc_ref = db.collection(TASK_COLLECTION).document(task_id)
+    await commit_with_rollups(
+        TASK_COLLECTION, task_id,
+        lambda before: ([("update", doc_ref, updates)], apply_updates(TASK_COLLECTION, before, updates)),
+    )
+    entity_cache.invalidate(TASK_COLLECTION, task_id)
 
-def get_task(task_id: str):
-    doc = db.collection(TASK_COLLECTION).document(task_id).get()
-    return doc.to_dict() | {"id": doc.id} if doc.exists else None
+# Commits tried before a delete gives up on a dependency graph that keeps changing
+DELETE_ATTEMPTS = 3
 
-def update_task(task_id: str, updates: dict):
-    updates["updated_at"] = datetime.now(timezone.utc)
-    db.collection(TASK_COLLECTION).document(task_id).update(updates)
+async def delete_task(task_id: str):
+    """
+    Delete a task and take it out of the dependency graph.
 
-def delete_task(task_id: str):
-    db.collection(TASK_COLLECTION).document(task_id).delete()
+    The tasks depending on it lose that dependency and the graph version is
+    bumped in the same commit as the delete, so no worker's index keeps the
+    deleted task's edges.
 
-def list_tasks() -> List[dict]:
-    return [doc.to_dict() | {"id": doc.id} for doc in db.collection(TASK_COLLECTION).stream()]
+    Raises:
+        Conflict: If the dependency graph kept changing under the delete
+    """
+    doc_ref = db.collection(TASK_COLLECTION).document(task_id)
+
+    for _ in range(DELETE_ATTEMPTS):
+        await dependency_graph.ensure_fresh()
+        dependents = dependency_graph.dependents(task_id)
+        dependencies = dependency_graph.dependencies(task_id)
+        tokens = []
+
+        def change(before):
+            now = datetime.now(timezone.utc)
+            writes = [("delete", doc_ref, None)]
+            for dependent_id in dependents:
+                writes.append(("update", db.collection(TASK_COLLECTION).document(dependent_id), {
+                    "dependencies": firestore.ArrayRemove([task_id]),
+                    "updated_at": now,
+                }))
+            return writes, None
+
+        def stage(batch):
+            tokens.append(dependency_graph.stage_version_bump(batch, [task_id, *dependents]))
+
+        try:
+            results = await commit_with_rollups(TASK_COLLECTION, task_id, change, stage=stage)
+        except (FailedPrecondition, Conflict, NotFound):
+            # Another worker changed the graph (or deleted a dependent); catch up and retry
+            continue
+        for dependent_id in dependents:
+            dependency_graph.remove_edge(dependent_id, task_id)
+            entity_cache.invalidate(TASK_COLLECTION, dependent_id)
+        for dependency_id in dependencies:
+            dependency_graph.remove_edge(task_id, dependency_id)
+        dependency_graph.commit_version(tokens[-1], results[-1].update_time)
+        entity_cache.invalidate(TASK_COLLECTION, task_id)
+        return
+
+    raise Conflict(f"Task dependency graph kept changing while deleting {task_id}")
+
+async def list_tasks(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+) -> Page:
+    """List one page of tasks; ``limit=None`` opts into a full scan."""
+    if board_replica.is_ready(TASK_COLLECTION):
+        return board_replica.list_page(TASK_COLLECTION, filters, TASK_FILTERS, limit, page_token)
+    return await list_page(db.collection(TASK_COLLECTION), filters, TASK_FILTERS, limit, page_token)
+
+def stream_tasks(
+    filters: Optional[Dict[str, Any]] = None,
+    page_token: Optional[str] = None,
+) -> AsyncIterator[dict]:
+    """Every matching task, yielded one at a time for NDJSON exports."""
+    if board_replica.is_ready(TASK_COLLECTION):
+        return board_replica.stream(TASK_COLLECTION, filters, TASK_FILTERS, page_token)
+    return stream_page(db.collection(TASK_COLLECTION), filters, TASK_FILTERS, page_token)
 
 # ---------- COMMENTS ----------
 
-def add_comment(task_id: str, comment: dict) -> str:
+async def add_comment(task_id: str, comment: dict) -> str:
     comment["created_at"] = datetime.now(timezone.utc)
-    doc_ref = db.collection(TASK_COLLECTION).document(task_id).collection("comments").add(comment)
+    doc_ref = await db.collection(TASK_COLLECTION).document(task_id).collection("comments").add(comment)
     return doc_ref[1].id
 
-def get_comments(task_id: str) -> List[dict]:
-    comments_ref = db.collection(TASK_COLLECTION).document(task_id).collection("comments")
-    return [doc.to_dict() | {"id": doc.id} for doc in comments_ref.stream()]
+async def get_comments(
+    task_id: str,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Page:
+    """One page of the task's comments, oldest first unless ``newest_first``; ``limit=None`` returns all."""
+    return await list_feed(TASK_COLLECTION, task_id, "comments", limit, page_token, newest_first)
 
 # ---------- ACTIVITY LOG ----------
 
-def log_activity(task_id: str, activity: dict) -> str:
+async def log_activity(task_id: str, activity: dict) -> str:
     activity["timestamp"] = datetime.now(timezone.utc)
-    doc_ref = db.collection(TASK_COLLECTION).document(task_id).collection("activity").add(activity)
-    return doc_ref[1].id
-
-def get_activity_log(task_id: str) -> List[dict]:
-    activity_ref = db.collection(TASK_COLLECTION).document(task_id).collection("activity")
-    return [doc.to_dict() | {"id": doc.id} for doc in activity_ref.order_by("timestamp").stream()]
+    # Queued and written in batches when write-behind is enabled
+    return await activity_writer.add(db.collection(TASK_COLLECTION).document(task_id).collection("activity"), activity)
+
+async def get_activity_log(
+    task_id: str,
+    limit: Optional[int] = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    newest_first: bool = False,
+) -> Page:
+    """One page of the task's activity log, oldest first unless ``newest_first``; ``limit=None`` returns all."""
+    return await list_feed(TASK_COLLECTION, task_id, "activity", limit, page_token, newest_first)
+
+async def bulk_assign_developers(
+    assignments: List[Tuple[str, List[str]]],
+    unassign: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Assign (or unassign) developers to many tasks at once.
+    
+    All tasks and developers are resolved with batched multi-gets, then every
+    (task, developers) pair is written with ``ArrayUnion``/``ArrayRemove`` on
+    the task's ``assignees`` and each developer's ``assigned_tasks``. Pairs
+    are committed in auto-chunked atomic batches, so concurrent assignments
+    never overwrite each other.
+    
+    Returns one ``{"task_id", "developer_ids", "success", "error"}`` result per pair.
+    """
+    task_ids = [task_id for task_id, _ in assignments]
+    developer_ids = [dev_id for _, dev_ids in assignments for dev_id in dev_ids]
+    tasks, developers = await asyncio.gather(
+        get_documents(TASK_COLLECTION, task_ids, field_paths=["status"]),
+        get_documents(DEVELOPER_COLLECTION, developer_ids, field_paths=["status"]),
+    )
+    existing_tasks = {task["id"] for task in tasks}
+    existing_developers = {developer["id"] for developer in developers}
+    
+    array_op = firestore.ArrayRemove if unassign else firestore.ArrayUnion
+    errors: Dict[int, str] = {}
+    units = []
+    for index, (task_id, dev_ids) in enumerate(assignments):
+        missing = [dev_id for dev_id in dev_ids if dev_id not in existing_developers]
+        if task_id not in existing_tasks:
+            errors[index] = f"Task with ID {task_id} not found"
+            continue
+        if missing:
+            errors[index] = f"Developer with ID {missing[0]} not found"
+            continue
+        if not dev_ids:
+            continue
+        writes = [("update", db.collection(TASK_COLLECTION).document(task_id), {"assignees": array_op(dev_ids)})]
+        writes += [
+            ("update", db.collection(DEVELOPER_COLLECTION).document(dev_id), {"assigned_tasks": array_op([task_id])})
+            for dev_id in dev_ids
+        ]
+        units.append(WriteUnit(str(index), writes))
+    
+    for result in await bulk_commit(units):
+        if not result["success"]:
+            errors[int(result["id"])] = result["error"]
+    
+    entity_cache.invalidate(TASK_COLLECTION, *task_ids)
+    entity_cache.invalidate(DEVELOPER_COLLECTION, *developer_ids)
+    return [
+        {
+            "task_id": task_id,
+            "developer_ids": dev_ids,
+            "success": index not in errors,
+            "error": errors.get(index),
+        }
+        for index, (task_id, dev_ids) in enumerate(assignments)
+    ]
 
 async def assign_developers_to_task(task_id: str, developer_ids: List[str]) -> None:
     """
     Assign developers to a task and update their assigned_tasks lists.
     """
-    # Get task reference
-    task_ref = db.collection(TASK_COLLECTION).document(task_id)
-    task_doc = task_ref.get()
-    if not task_doc.exists:
-        raise ValueError(f"Task with ID {task_id} not found")
-
-    # Start a batch
-    batch = db.batch()
-
-    # Update task's assignees
-    task_data = task_doc.to_dict()
-    current_assignees = set(task_data.get('assignees', []))
-    new_assignees = current_assignees.union(set(developer_ids))
-    batch.update(task_ref, {'assignees': list(new_assignees)})
-
-    # Update each developer's assigned_tasks
-    for dev_id in developer_ids:
-        dev_ref = db.collection(DEVELOPER_COLLECTION).document(dev_id)
-        dev_doc = dev_ref.get()
-        if not dev_doc.exists:
-            raise ValueError(f"Developer with ID {dev_id} not found")
-        
-        dev_data = dev_doc.to_dict()
-        current_tasks = set(dev_data.get('assigned_tasks', []))
-        current_tasks.add(task_id)
-        batch.update(dev_ref, {'assigned_tasks': list(current_tasks)})
-
-    # Commit the batch
-    batch.commit()
+    [result] = await bulk_assign_developers([(task_id, developer_ids)])
+    if not result["success"]:
+        raise ValueError(result["error"])
 
 async def unassign_developers_from_task(task_id: str, developer_ids: List[str]) -> None:
     """
     Remove developers from a task and update their assigned_tasks lists.
     """
-    # Get task reference
-    task_ref = db.collection(TASK_COLLECTION).document(task_id)
-    task_doc = task_ref.get()
-    if not task_doc.exists:
-        raise ValueError(f"Task with ID {task_id} not found")
-
-    # Start a batch
-    batch = db.batch()
-
-    # Update task's assignees
-    task_data = task_doc.to_dict()
-    current_assignees = set(task_data.get('assignees', []))
-    updated_assignees = current_assignees - set(developer_ids)
-    batch.update(task_ref, {'assignees': list(updated_assignees)})
-
-    # Update each developer's assigned_tasks
-    for dev_id in developer_ids:
-        dev_ref = db.collection(DEVELOPER_COLLECTION).document(dev_id)
-        dev_doc = dev_ref.get()
-        if not dev_doc.exists:
-            raise ValueError(f"Developer with ID {dev_id} not found")
-        
-        dev_data = dev_doc.to_dict()
-        current_tasks = set(dev_data.get('assigned_tasks', []))
-        current_tasks.discard(task_id)
-        batch.update(dev_ref, {'assigned_tasks': list(current_tasks)})
+    [result] = await bulk_assign_developers([(task_id, developer_ids)], unassign=True)
+    if not result["success"]:
+        raise ValueError(result["error"])
@@ -0,0 +1,266 @@
+"""
+Export and import of the whole board as gzip-compressed NDJSON.
+
+    python -m firestore.transfer export board.ndjson.gz
+    python -m firestore.transfer import board.ndjson.gz [--keep-ids]
+
+The archive starts with a header line followed by one line per document,
+``{"path": "tasks/<id>", "data": {...}}``; the ``comments`` and ``activity``
+subcollections are included with their full path. Export reads every
+collection with one query stream (subcollections with one collection group
+query each) and compresses as it goes, so memory doesn't grow with the board.
+
+Import reads the archive twice: once to learn which documents it holds, then
+to write them with chunked parallel batches. Unless ``keep_ids`` is set,
+every document gets a new ID and the relationship fields (``epic_id``,
+``stories``, ``assignees``, ``dependencies``, ...) are rewritten to match, so
+an archive can be loaded next to the board it came from. References to
+documents that aren't in the archive are kept as they are. Only the ID map
+and one window of documents are held in memory, and the archive is
+decompressed and decoded in a worker thread, off the event loop.
+"""
+import argparse
+import asyncio
+import gzip
+import itertools
+import json
+import secrets
+import string
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Set, Tuple
+
+from firestore.bulk import BATCH_WRITE_LIMIT, DEFAULT_CONCURRENCY, WriteUnit, bulk_commit
+from firestore.cache import entity_cache
+from firestore.dependency_graph import GRAPH_META_DOC, META_COLLECTION, dependency_graph
+from firestore.firestore_client import db
+
+EXPORT_FORMAT = "autonomous-scrum-master"
+EXPORT_VERSION = 1
+# Top-level collections of a board, referenced ones first
+EXPORT_COLLECTIONS = ("developers", "sprints", "epics", "stories", "tasks")
+# Subcollections kept under each exported document that has them
+EXPORT_SUBCOLLECTIONS = ("comments", "activity")
+# Collection -> field -> collection its IDs point at (a string or a list of IDs)
+REFERENCE_FIELDS = {
+    "developers": {"assigned_tasks": "tasks"},
+    "epics": {"stories": "stories"},
+    "stories": {"epic_id": "epics", "sprint_id": "sprints", "assignee": "developers", "tasks": "tasks"},
+    "tasks": {
+        "story_id": "stories",
+        "epic_id": "epics",
+        "sprint_id": "sprints",
+        "assignees": "developers",
+        "dependencies": "tasks",
+    },
+}
+# Documents written per bulk_commit call during an import, i.e. one full round of parallel batches
+IMPORT_WINDOW = BATCH_WRITE_LIMIT * DEFAULT_CONCURRENCY
+# Marks an encoded timestamp, which JSON has no type for
+TIMESTAMP_KEY = "__timestamp__"
+# Alphabet and length of Firestore's auto-generated document IDs
+AUTO_ID_CHARS = string.ascii_letters + string.digits
+AUTO_ID_LENGTH = 20
+
+# (collection, document ID)
+DocumentKey = Tuple[str, str]
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {TIMESTAMP_KEY: value.isoformat()}
+    raise TypeError(f"Cannot export a value of type {type(value).__name__}")
+
+
+def _decode(value: Dict[str, Any]) -> Any:
+    if len(value) == 1 and TIMESTAMP_KEY in value:
+        return datetime.fromisoformat(value[TIMESTAMP_KEY])
+    return value
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    return json.dumps(record, default=_encode, separators=(",", ":")).encode() + b"\n"
+
+
+def decode_record(line: bytes) -> Dict[str, Any]:
+    return json.loads(line, object_hook=_decode)
+
+
+async def export_records() -> AsyncIterator[Dict[str, Any]]:
+    """
+    The archive's lines, header first, read lazily from storage.
+
+    Returns:
+        An iterator over the header and one ``{"path", "data"}`` record per document
+    """
+    yield {
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_VERSION,
+        "exported_at": datetime.now(timezone.utc),
+        "collections": list(EXPORT_COLLECTIONS),
+    }
+    for collection in EXPORT_COLLECTIONS:
+        async for snapshot in db.collection(collection).stream():
+            yield {"path": f"{collection}/{snapshot.id}", "data": snapshot.to_dict() or {}}
+    for subcollection in EXPORT_SUBCOLLECTIONS:
+        async for snapshot in db.collection_group(subcollection).stream():
+            path = snapshot.reference.path
+            if path.split("/")[0] in EXPORT_COLLECTIONS:
+                yield {"path": path, "data": snapshot.to_dict() or {}}
+
+
+async def export_gzip_chunks() -> AsyncIterator[bytes]:
+    """The gzip-compressed archive, in chunks suitable for a streaming response."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    async for record in export_records():
+        chunk = compressor.compress(encode_record(record))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+async def export_board(destination: BinaryIO) -> int:
+    """
+    Write the archive to a binary file.
+
+    Returns:
+        Number of documents exported
+    """
+    count = -1  # The header isn't a document
+    with gzip.GzipFile(fileobj=destination, mode="wb") as archive:
+        async for record in export_records():
+            archive.write(encode_record(record))
+            count += 1
+    return count
+
+
+def _read_records(source: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Decode the archive's document records after checking its header."""
+    source.seek(0)
+    with gzip.GzipFile(fileobj=source, mode="rb") as archive:
+        lines = (line for line in archive if line.strip())
+        header = decode_record(next(lines, b"{}"))
+        if header.get("format") != EXPORT_FORMAT or header.get("version") != EXPORT_VERSION:
+            raise ValueError("Not an export archive of a supported version")
+        for line in lines:
+            record = decode_record(line)
+            if not isinstance(record.get("path"), str) or not isinstance(record.get("data"), dict):
+                raise ValueError(f"Malformed archive record: {line[:200]!r}")
+            yield record
+
+
+def _archive_documents(source: BinaryIO) -> Set[DocumentKey]:
+    """Keys of the top-level documents in the archive."""
+    present: Set[DocumentKey] = set()
+    for record in _read_records(source):
+        segments = record["path"].split("/")
+        if len(segments) == 2 and segments[0] in EXPORT_COLLECTIONS:
+            present.add((segments[0], segments[1]))
+    return present
+
+
+def _new_id() -> str:
+    # Same length and alphabet as Firestore's auto IDs
+    return "".join(secrets.choice(AUTO_ID_CHARS) for _ in range(AUTO_ID_LENGTH))
+
+
+def _remap_references(collection: str, data: Dict[str, Any], ids: Dict[DocumentKey, str]) -> Dict[str, Any]:
+    for field, target in REFERENCE_FIELDS.get(collection, {}).items():
+        value = data.get(field)
+        if isinstance(value, str):
+            data[field] = ids.get((target, value), value)
+        elif isinstance(value, list):
+            data[field] = [ids.get((target, item), item) if isinstance(item, str) else item for item in value]
+    return data
+
+
+async def import_board(source: BinaryIO, keep_ids: bool = False) -> Dict[str, Any]:
+    """
+    Load an archive written by ``export_board`` or ``GET /project/export``.
+
+    Args:
+        source: The gzip archive, opened in binary mode and seekable
+        keep_ids: Write documents under their original IDs (restoring a
+            backup, overwriting documents with the same ID) instead of new ones
+
+    Returns:
+        Documents written per collection, the number skipped because their
+        parent isn't in the archive, and the first errors of failed writes
+
+    Raises:
+        ValueError: If the archive isn't a supported export
+    """
+    # First pass: which documents the archive holds, and their new IDs
+    present = await asyncio.to_thread(_archive_documents, source)
+    ids = {key: key[1] if keep_ids else _new_id() for key in present}
+
+    written: Dict[str, int] = {}
+    skipped = 0
+    errors: List[str] = []
+
+    async def flush(window: List[WriteUnit]) -> None:
+        for result in await bulk_commit(window):
+            # Counted per collection or subcollection name
+            collection = result["id"].split("/")[-2]
+            if result["success"]:
+                written[collection] = written.get(collection, 0) + 1
+            elif len(errors) < 10:
+                errors.append(f"{result['id']}: {result['error']}")
+
+    # Second pass: rewrite and write the documents, one window at a time;
+    # like the first pass, decompressing and decoding runs in a worker thread
+    records = _read_records(source)
+    try:
+        while True:
+            chunk = await asyncio.to_thread(list, itertools.islice(records, IMPORT_WINDOW))
+            if not chunk:
+                break
+            window: List[WriteUnit] = []
+            for record in chunk:
+                segments = record["path"].split("/")
+                key = tuple(segments[:2])
+                if key not in present or not (
+                    len(segments) == 2 or len(segments) == 4 and segments[2] in EXPORT_SUBCOLLECTIONS
+                ):
+                    skipped += 1
+                    continue
+                reference = db.collection(key[0]).document(ids[key])
+                data = record["data"]
+                if len(segments) == 2:
+                    data = _remap_references(key[0], data, ids)
+                else:
+                    reference = reference.collection(segments[2]).document(segments[3])
+                window.append(WriteUnit(reference.path, [("set", reference, data)]))
+            if window:
+                await flush(window)
+    finally:
+        records.close()
+
+    entity_cache.clear()
+    # Other workers reload their dependency graph when its version changes
+    await db.collection(META_COLLECTION).document(GRAPH_META_DOC).set({"version": uuid.uuid4().hex})
+    dependency_graph.invalidate()
+    return {"written": written, "skipped": skipped, "errors": errors}
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write the board to a gzip NDJSON archive")
+    export_parser.add_argument("path")
+    import_parser = commands.add_parser("import", help="Load a gzip NDJSON archive")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--keep-ids", action="store_true", help="Keep the original document IDs")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        with open(args.path, "wb") as f:
+            print(f"Exported {await export_board(f)} documents to {args.path}")
+    else:
+        with open(args.path, "rb") as f:
+            print(json.dumps(await import_board(f, keep_ids=args.keep_ids), indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,23 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from firestore.feeds import FEED_ORDER_FIELDS, recent_activity
+from firestore.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter(prefix="/activity", tags=["Activity"])
+
+@router.get("/recent")
+async def get_recent_activity(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    kind: Optional[List[str]] = Query(None, description="activity and/or comments; both when omitted"),
+):
+    """Latest activity and comments across every task, story and sprint, newest first."""
+    try:
+        entries, next_page_token = await recent_activity(limit, page_token, kind or tuple(FEED_ORDER_FIELDS))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"entries": entries, "next_page_token": next_page_token}
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Dict, Optional
 from models.developer import DeveloperBase, DeveloperCreate, DeveloperUpdate
+from firestore.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_PAGE_TOKEN_HEADER
+from routes.streaming import ndjson_response
 from firestore.developer import (
     create_developer,
     get_developer,
     update_developer,
     delete_developer,
-    list_developers
+    list_developers,
+    stream_developers
 )
 
 router = APIRouter(prefix="/developers", tags=["Developers"])
@@ -15,7 +18,7 @@ router = APIRouter(prefix="/developers", tags=["Developers"])
 async def create_new_developer(developer: DeveloperCreate):
     """Create a new developer profile."""
     try:
-        developer_id = create_developer(developer.model_dump())
+        developer_id = await create_developer(developer.model_dump())
         return {"id": developer_id, "message": "Developer profile created successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -23,7 +26,7 @@ async def create_new_developer(developer: DeveloperCreate):
 @router.get("/{developer_id}", response_model=Dict)
 async def get_developer_by_id(developer_id: str):
     """Get a developer profile by ID."""
-    developer = get_developer(developer_id)
+    developer = await get_developer(developer_id)
     if not developer:
         raise HTTPException(status_code=404, detail="Developer not found")
     return developer
@@ -32,7 +35,7 @@ async def get_developer_by_id(developer_id: str):
 async def update_developer_by_id(developer_id: str, developer_update: DeveloperUpdate):
     """Update an existing developer profile."""
     try:
-        update_developer(developer_id, developer_update.model_dump(exclude_unset=True))
+        await update_developer(developer_id, developer_update.model_dump(exclude_unset=True))
         return {"message": "Developer profile updated successfully"}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -43,7 +46,7 @@ async def update_developer_by_id(developer_id: str, developer_update: DeveloperU
 async def delete_developer_by_id(developer_id: str):
     """Delete a developer profile."""
     try:
-        delete_developer(developer_id)
+        await delete_developer(developer_id)
         return {"message": "Developer profile deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -51,9 +54,26 @@ async def delete_developer_by_id(developer_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=List[Dict])
-async def get_all_developers():
-    """Get all developer profiles."""
+async def get_all_developers(
+    response: Response,
+    status: Optional[str] = None,
+    experience_level: Optional[str] = None,
+    skill: Optional[str] = Query(None, description="Skill the developer must have"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    full_scan: bool = Query(False, description="Return every matching document instead of one page"),
+    stream: bool = Query(False, description="Stream every matching document as NDJSON; limit is ignored"),
+):
+    """Get one page of developer profiles, or stream all of them as NDJSON."""
+    filters = {"status": status, "experience_level": experience_level, "skills": skill}
     try:
-        return list_developers()
+        if stream:
+            return ndjson_response(stream_developers(filters, page_token))
+        developers, next_page_token = await list_developers(filters, None if full_scan else limit, page_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    if next_page_token:
+        response.headers[NEXT_PAGE_TOKEN_HEADER] = next_page_token
+    return developers 
\ No newline at end of file
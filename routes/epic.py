@@ -1,32 +1,54 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Query
+from typing import List, Optional
 from controllers.epic_controller import (
-    decompose_epic_logic,
+    create_and_decompose_epic_logic,
+    decompose_epics_batch_logic,
+    stream_decompose_epic_logic,
     create_epic_logic,
     get_epic_logic,
+    get_epic_tree_logic,
     update_epic_logic,
-    list_epics_logic
+    list_epics_logic,
+    stream_epics_logic
 )
 from models.epic import EpicCreate, EpicUpdate, EpicDecompose
-import json
+from firestore.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from firestore.relationships import EPIC_TREE_LEVELS
+from routes.streaming import event_stream_response, ndjson_response
 
 router = APIRouter(prefix="/epic", tags=["Epic Decomposer"])
 
 @router.post("/decompose")
-async def decompose_epic(payload: EpicDecompose):
-    # First create the epic and get its ID
-    epic_result = await create_epic_logic(payload.model_dump())
-    epic_id = epic_result["id"]
-    
-    # Decompose the epic into stories
-    stories_result = await decompose_epic_logic(json.dumps({
-        **payload.model_dump(),
-        "epic_id": epic_id
-    }))
-    
-    return {
-        "epic_id": epic_id,
-        "stories": stories_result
-    }
+async def decompose_epic(
+    payload: EpicDecompose,
+    bypass_cache: bool = Query(False, description="Run the agent without reading or storing a cached result"),
+    refresh_cache: bool = Query(False, description="Run the agent even if a result is cached, and cache the new one"),
+):
+    return await create_and_decompose_epic_logic(
+        payload.model_dump(), bypass_cache=bypass_cache, refresh_cache=refresh_cache
+    )
+
+@router.post("/decompose/batch")
+async def decompose_epics_batch(
+    payloads: List[EpicDecompose],
+    bypass_cache: bool = Query(False, description="Run the agent without reading or storing a cached result"),
+    refresh_cache: bool = Query(False, description="Run the agent even if a result is cached, and cache the new one"),
+):
+    """Decompose many epics concurrently; returns the epic and stories, or the error, of each."""
+    return await decompose_epics_batch_logic(
+        [payload.model_dump() for payload in payloads], bypass_cache=bypass_cache, refresh_cache=refresh_cache
+    )
+
+@router.post("/decompose/stream")
+async def decompose_epic_stream(
+    payload: EpicDecompose,
+    bypass_cache: bool = Query(False, description="Run the agent without reading or storing a cached result"),
+    refresh_cache: bool = Query(False, description="Run the agent even if a result is cached, and cache the new one"),
+):
+    """Server-sent events: ``epic``, then each ``story`` as soon as it is stored and linked, then ``done`` (or ``error``)."""
+    return event_stream_response(
+        stream_decompose_epic_logic(payload.model_dump(), bypass_cache=bypass_cache, refresh_cache=refresh_cache)
+    )
 
 @router.post("/")
 async def create_epic(epic_data: EpicCreate):
@@ -36,10 +58,30 @@ async def create_epic(epic_data: EpicCreate):
 async def get_epic(epic_id: str):
     return await get_epic_logic(epic_id)
 
+@router.get("/{epic_id}/tree")
+async def get_epic_tree(
+    epic_id: str,
+    depth: int = Query(len(EPIC_TREE_LEVELS), ge=0, le=len(EPIC_TREE_LEVELS), description="0 = epic, 1 = stories, 2 = tasks"),
+    fields: Optional[List[str]] = Query(None, description="Fields to return for every node, repeated or comma-separated"),
+):
+    selected = [name.strip() for value in fields for name in value.split(",") if name.strip()] if fields else None
+    return await get_epic_tree_logic(epic_id, depth, selected or None)
+
 @router.put("/{epic_id}")
 async def update_epic(epic_id: str, updates: EpicUpdate):
     return await update_epic_logic(epic_id, updates.model_dump(exclude_unset=True))
 
 @router.get("/")
-async def list_epics():
-    return await list_epics_logic()
+async def list_epics(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    owner: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    full_scan: bool = Query(False, description="Return every matching document instead of one page"),
+    stream: bool = Query(False, description="Stream every matching document as NDJSON; limit is ignored"),
+):
+    filters = {"status": status, "priority": priority, "owner": owner}
+    if stream:
+        return ndjson_response(stream_epics_logic(filters, page_token))
+    return await list_epics_logic(filters, None if full_scan else limit, page_token)
@@ -0,0 +1,58 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Query
+
+from controllers.job_controller import enqueue_job_logic, get_job_logic, list_jobs_logic
+from firestore.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from models.epic import EpicDecompose
+from models.sprint import SprintPlan
+from models.user_story import StoryDecompose
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+def _options(bypass_cache: bool, refresh_cache: bool) -> dict:
+    return {"bypass_cache": bypass_cache, "refresh_cache": refresh_cache}
+
+@router.post("/epic/decompose", status_code=202)
+async def enqueue_epic_decompose(
+    payload: EpicDecompose,
+    bypass_cache: bool = Query(False, description="Run the agent without reading or storing a cached result"),
+    refresh_cache: bool = Query(False, description="Run the agent even if a result is cached, and cache the new one"),
+):
+    """Queue the work of ``POST /epic/decompose``; poll ``GET /jobs/{job_id}`` for its result."""
+    return await enqueue_job_logic("epic_decompose", payload.model_dump(), _options(bypass_cache, refresh_cache))
+
+@router.post("/user_story/decompose", status_code=202)
+async def enqueue_user_story_decompose(
+    payload: StoryDecompose,
+    bypass_cache: bool = Query(False, description="Run the agent without reading or storing a cached result"),
+    refresh_cache: bool = Query(False, description="Run the agent even if a result is cached, and cache the new one"),
+):
+    """Queue the work of ``POST /user_story/decompose``; poll ``GET /jobs/{job_id}`` for its result."""
+    return await enqueue_job_logic("story_decompose", payload.model_dump(), _options(bypass_cache, refresh_cache))
+
+@router.post("/sprint/plan", status_code=202)
+async def enqueue_sprint_plan(
+    payload: SprintPlan,
+    bypass_cache: bool = Query(False, description="Run the agent without reading or storing a cached result"),
+    refresh_cache: bool = Query(False, description="Run the agent even if a result is cached, and cache the new one"),
+):
+    """Queue the work of ``POST /sprint/plan``; poll ``GET /jobs/{job_id}`` for its result."""
+    return await enqueue_job_logic("sprint_plan", payload.model_dump(), _options(bypass_cache, refresh_cache))
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Status of one job, with its progress while it runs and its result or error once it has finished."""
+    return await get_job_logic(job_id)
+
+@router.get("/")
+async def list_jobs(
+    status: Optional[str] = None,
+    kind: Optional[str] = None,
+    ids: Optional[List[str]] = Query(None, description="Only these jobs, repeated or comma-separated; ignores the other filters"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+):
+    filters = {"status": status, "kind": kind}
+    selected = [job_id.strip() for value in ids for job_id in value.split(",") if job_id.strip()] if ids else None
+    return await list_jobs_logic(filters, selected, limit, page_token)
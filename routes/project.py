@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+
+from firestore.transfer import export_gzip_chunks, import_board
+from routes.streaming import gzip_response
+
+router = APIRouter(prefix="/project", tags=["Project Transfer"])
+
+@router.get("/export")
+async def export_project():
+    """Download every epic, story, task, sprint and developer, with comments and activity, as gzip NDJSON."""
+    filename = f"board-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.ndjson.gz"
+    return gzip_response(export_gzip_chunks(), filename)
+
+@router.post("/import")
+async def import_project(
+    file: UploadFile = File(..., description="Archive produced by GET /project/export"),
+    keep_ids: bool = Query(False, description="Keep the original document IDs instead of assigning new ones"),
+):
+    """Load an exported archive; relationship fields are rewritten to the new IDs."""
+    try:
+        return await import_board(file.file, keep_ids=keep_ids)
+    except (ValueError, OSError, EOFError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid archive: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
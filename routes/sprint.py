@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Query
+from typing import Optional
 from controllers.sprint_controller import (
     plan_sprint_logic,
     create_sprint_logic,
@@ -6,18 +7,26 @@ from controllers.sprint_controller import (
     update_sprint_logic,
     delete_sprint_logic,
     list_sprints_logic,
+    stream_sprints_logic,
     add_sprint_comment_logic,
     get_sprint_comments_logic,
     log_sprint_activity_logic,
     get_sprint_activity_log_logic
 )
+from firestore.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from routes.streaming import ndjson_response
 from models.sprint import SprintCreate, SprintUpdate, SprintComment, SprintActivity, SprintPlan
+import json
 
 router = APIRouter(prefix="/sprint", tags=["Sprint Planner"])
 
 @router.post("/plan")
-async def plan_sprint(payload: SprintPlan):
-    result = await plan_sprint_logic(payload.model_dump())
+async def plan_sprint(
+    payload: SprintPlan,
+    bypass_cache: bool = Query(False, description="Run the agent without reading or storing a cached result"),
+    refresh_cache: bool = Query(False, description="Run the agent even if a result is cached, and cache the new one"),
+):
+    result = await plan_sprint_logic(json.dumps(payload.model_dump()), bypass_cache=bypass_cache, refresh_cache=refresh_cache)
     return {"response": result}
 
 @router.post("/")
@@ -37,21 +46,41 @@ async def delete_sprint(sprint_id: str):
     return await delete_sprint_logic(sprint_id)
 
 @router.get("/")
-async def list_sprints():
-    return await list_sprints_logic()
+async def list_sprints(
+    status: Optional[str] = None,
+    team_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    full_scan: bool = Query(False, description="Return every matching document instead of one page"),
+    stream: bool = Query(False, description="Stream every matching document as NDJSON; limit is ignored"),
+):
+    filters = {"status": status, "team_id": team_id}
+    if stream:
+        return ndjson_response(stream_sprints_logic(filters, page_token))
+    return await list_sprints_logic(filters, None if full_scan else limit, page_token)
 
 @router.post("/{sprint_id}/comments")
 async def add_sprint_comment(sprint_id: str, comment: SprintComment):
     return await add_sprint_comment_logic(sprint_id, comment.model_dump())
 
 @router.get("/{sprint_id}/comments")
-async def get_sprint_comments(sprint_id: str):
-    return await get_sprint_comments_logic(sprint_id)
+async def get_sprint_comments(
+    sprint_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    newest_first: bool = Query(False, description="Return the latest entries first"),
+):
+    return await get_sprint_comments_logic(sprint_id, limit, page_token, newest_first)
 
 @router.post("/{sprint_id}/activity")
 async def log_sprint_activity(sprint_id: str, activity: SprintActivity):
     return await log_sprint_activity_logic(sprint_id, activity.model_dump())
 
 @router.get("/{sprint_id}/activity")
-async def get_sprint_activity_log(sprint_id: str):
-    return await get_sprint_activity_log_logic(sprint_id)
+async def get_sprint_activity_log(
+    sprint_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    newest_first: bool = Query(False, description="Return the latest entries first"),
+):
+    return await get_sprint_activity_log_logic(sprint_id, limit, page_token, newest_first)
@@ -0,0 +1,52 @@
+import json
+from typing import Any, AsyncIterator, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sse_starlette.sse import EventSourceResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+GZIP_MEDIA_TYPE = "application/gzip"
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+# Responses whose body is read from (or written to) storage while it is sent
+STREAMED_MEDIA_TYPES = (NDJSON_MEDIA_TYPE, GZIP_MEDIA_TYPE, EVENT_STREAM_MEDIA_TYPE)
+
+
+def ndjson_response(documents: AsyncIterator[dict]) -> StreamingResponse:
+    """
+    Send documents as newline-delimited JSON while they are read.
+
+    Each document is encoded and written as soon as the storage stream
+    yields it, so the first bytes go out after the first read and a worker
+    holds one document at a time however large the export is.
+    """
+    async def lines() -> AsyncIterator[str]:
+        async for document in documents:
+            yield json.dumps(jsonable_encoder(document), separators=(",", ":")) + "\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def gzip_response(chunks: AsyncIterator[bytes], filename: str) -> StreamingResponse:
+    """Send an already compressed body as a file download while it is produced."""
+    return StreamingResponse(
+        chunks,
+        media_type=GZIP_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def event_stream_response(events: AsyncIterator[Dict[str, Any]]) -> EventSourceResponse:
+    """
+    Send ``{"event": name, "data": value}`` items as server-sent events while they are produced.
+
+    Each value is sent as one line of JSON.
+    """
+    async def encoded() -> AsyncIterator[Dict[str, str]]:
+        async for event in events:
+            yield {
+                "event": event["event"],
+                "data": json.dumps(jsonable_encoder(event["data"]), separators=(",", ":")),
+            }
+
+    return EventSourceResponse(encoded())
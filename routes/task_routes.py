@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from typing import List, Optional, Dict
 from models.task import TaskBase, TaskCreate, TaskUpdate, CommentBase, ActivityBase
 from firestore.task import (
@@ -7,13 +7,17 @@ from firestore.task import (
     update_task,
     delete_task,
     list_tasks,
+    stream_tasks,
     add_comment,
     get_comments,
     log_activity,
     get_activity_log,
     assign_developers_to_task,
-    unassign_developers_from_task
+    unassign_developers_from_task,
+    bulk_assign_developers
 )
+from firestore.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_PAGE_TOKEN_HEADER
+from routes.streaming import ndjson_response
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
@@ -22,18 +26,25 @@ router = APIRouter(prefix="/tasks", tags=["Tasks"])
 class DeveloperAssignment(BaseModel):
     developer_ids: List[str]
 
+class TaskAssignment(BaseModel):
+    task_id: str
+    developer_ids: List[str]
+
+class BulkDeveloperAssignment(BaseModel):
+    assignments: List[TaskAssignment]
+
 # Task CRUD routes
 @router.post("/", response_model=dict)
 async def create_new_task(task: TaskCreate):
     try:
-        task_id = create_task(task.model_dump())
+        task_id = await create_task(task.model_dump())
         return {"id": task_id, "message": "Task created successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{task_id}", response_model=dict)
 async def get_task_by_id(task_id: str):
-    task = get_task(task_id)
+    task = await get_task(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
@@ -41,7 +52,7 @@ async def get_task_by_id(task_id: str):
 @router.put("/{task_id}")
 async def update_task_by_id(task_id: str, task_update: TaskUpdate):
     try:
-        update_task(task_id, task_update.model_dump(exclude_unset=True))
+        await update_task(task_id, task_update.model_dump(exclude_unset=True))
         return {"message": "Task updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -49,49 +60,98 @@ async def update_task_by_id(task_id: str, task_update: TaskUpdate):
 @router.delete("/{task_id}")
 async def delete_task_by_id(task_id: str):
     try:
-        delete_task(task_id)
+        await delete_task(task_id)
         return {"message": "Task deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=List[dict])
-async def get_all_tasks():
+async def get_all_tasks(
+    response: Response,
+    status: Optional[str] = None,
+    sprint_id: Optional[str] = None,
+    story_id: Optional[str] = None,
+    epic_id: Optional[str] = None,
+    assignee: Optional[str] = Query(None, description="Developer ID that must be among the task's assignees"),
+    priority: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    full_scan: bool = Query(False, description="Return every matching document instead of one page"),
+    stream: bool = Query(False, description="Stream every matching document as NDJSON; limit is ignored"),
+):
+    filters = {
+        "status": status,
+        "sprint_id": sprint_id,
+        "story_id": story_id,
+        "epic_id": epic_id,
+        "assignees": assignee,
+        "priority": priority,
+    }
     try:
-        return list_tasks()
+        if stream:
+            return ndjson_response(stream_tasks(filters, page_token))
+        tasks, next_page_token = await list_tasks(filters, None if full_scan else limit, page_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if next_page_token:
+        response.headers[NEXT_PAGE_TOKEN_HEADER] = next_page_token
+    return tasks
 
 # Comment routes
 @router.post("/{task_id}/comments", response_model=dict)
 async def create_comment(task_id: str, comment: CommentBase):
     try:
-        comment_id = add_comment(task_id, comment.model_dump())
+        comment_id = await add_comment(task_id, comment.model_dump())
         return {"id": comment_id, "message": "Comment added successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{task_id}/comments", response_model=List[dict])
-async def get_task_comments(task_id: str):
+async def get_task_comments(
+    task_id: str,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    newest_first: bool = Query(False, description="Return the latest entries first"),
+):
     try:
-        return get_comments(task_id)
+        entries, next_page_token = await get_comments(task_id, limit, page_token, newest_first)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if next_page_token:
+        response.headers[NEXT_PAGE_TOKEN_HEADER] = next_page_token
+    return entries
 
 # Activity log routes
 @router.post("/{task_id}/activity", response_model=dict)
 async def create_activity_log(task_id: str, activity: ActivityBase):
     try:
-        activity_id = log_activity(task_id, activity.model_dump())
+        activity_id = await log_activity(task_id, activity.model_dump())
         return {"id": activity_id, "message": "Activity logged successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{task_id}/activity", response_model=List[dict])
-async def get_task_activity_log(task_id: str):
+async def get_task_activity_log(
+    task_id: str,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    newest_first: bool = Query(False, description="Return the latest entries first"),
+):
     try:
-        return get_activity_log(task_id)
+        entries, next_page_token = await get_activity_log(task_id, limit, page_token, newest_first)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if next_page_token:
+        response.headers[NEXT_PAGE_TOKEN_HEADER] = next_page_token
+    return entries
 
 # Developer assignment routes
 @router.post("/{task_id}/assign", response_model=Dict[str, str])
@@ -114,4 +174,27 @@ async def unassign_developers(task_id: str, assignment: DeveloperAssignment):
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+@router.post("/bulk-assign", response_model=Dict[str, List[dict]])
+async def bulk_assign(payload: BulkDeveloperAssignment):
+    """Assign developers to many tasks in a handful of batched round trips."""
+    try:
+        results = await bulk_assign_developers(
+            [(item.task_id, item.developer_ids) for item in payload.assignments]
+        )
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk-unassign", response_model=Dict[str, List[dict]])
+async def bulk_unassign(payload: BulkDeveloperAssignment):
+    """Unassign developers from many tasks in a handful of batched round trips."""
+    try:
+        results = await bulk_assign_developers(
+            [(item.task_id, item.developer_ids) for item in payload.assignments],
+            unassign=True
+        )
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Query
+from typing import Optional
 from controllers.story_controller import (
     decompose_user_story_logic,
+    stream_decompose_user_story_logic,
     create_story_logic,
     get_story_logic,
     update_story_logic,
     delete_story_logic,
     list_stories_logic,
+    stream_stories_logic,
     add_comment_logic,
     get_comments_logic,
     log_activity_logic,
     get_activity_log_logic
 )
+from firestore.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from routes.streaming import event_stream_response, ndjson_response
 from models.user_story import (
     UserStoryCreate,
     UserStoryUpdate,
@@ -18,14 +23,31 @@ from models.user_story import (
     StoryActivity,
     StoryDecompose
 )
+import json
 
 router = APIRouter(prefix="/user_story", tags=["User Story Decomposer"])
 
 @router.post("/decompose")
-async def decompose_user_story(payload: StoryDecompose):
-    result = await decompose_user_story_logic(payload.model_dump())
+async def decompose_user_story(
+    payload: StoryDecompose,
+    bypass_cache: bool = Query(False, description="Run the agent without reading or storing a cached result"),
+    refresh_cache: bool = Query(False, description="Run the agent even if a result is cached, and cache the new one"),
+):
+    result = await decompose_user_story_logic(json.dumps(payload.model_dump()), bypass_cache=bypass_cache, refresh_cache=refresh_cache)
     return {"response": result}
 
+@router.post("/decompose/stream")
+async def decompose_user_story_stream(
+    payload: StoryDecompose,
+    story_id: Optional[str] = Query(None, description="Create the tasks under this story as they arrive"),
+    bypass_cache: bool = Query(False, description="Run the agent without reading or storing a cached result"),
+    refresh_cache: bool = Query(False, description="Run the agent even if a result is cached, and cache the new one"),
+):
+    """Server-sent events: each ``task`` as soon as the agent has written it (and it is stored), then ``done`` (or ``error``)."""
+    return event_stream_response(stream_decompose_user_story_logic(
+        json.dumps(payload.model_dump()), story_id, bypass_cache=bypass_cache, refresh_cache=refresh_cache
+    ))
+
 @router.post("/")
 async def create_user_story(story_data: UserStoryCreate):
     return await create_story_logic(story_data.model_dump())
@@ -43,21 +65,50 @@ async def delete_user_story(story_id: str):
     return await delete_story_logic(story_id)
 
 @router.get("/")
-async def list_user_stories():
-    return await list_stories_logic()
+async def list_user_stories(
+    status: Optional[str] = None,
+    sprint_id: Optional[str] = None,
+    epic_id: Optional[str] = None,
+    assignee: Optional[str] = None,
+    priority: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    full_scan: bool = Query(False, description="Return every matching document instead of one page"),
+    stream: bool = Query(False, description="Stream every matching document as NDJSON; limit is ignored"),
+):
+    filters = {
+        "status": status,
+        "sprint_id": sprint_id,
+        "epic_id": epic_id,
+        "assignee": assignee,
+        "priority": priority,
+    }
+    if stream:
+        return ndjson_response(stream_stories_logic(filters, page_token))
+    return await list_stories_logic(filters, None if full_scan else limit, page_token)
 
 @router.post("/{story_id}/comments")
 async def add_story_comment(story_id: str, comment: StoryComment):
     return await add_comment_logic(story_id, comment.model_dump())
 
 @router.get("/{story_id}/comments")
-async def get_story_comments(story_id: str):
-    return await get_comments_logic(story_id)
+async def get_story_comments(
+    story_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    newest_first: bool = Query(False, description="Return the latest entries first"),
+):
+    return await get_comments_logic(story_id, limit, page_token, newest_first)
 
 @router.post("/{story_id}/activity")
 async def log_story_activity(story_id: str, activity: StoryActivity):
     return await log_activity_logic(story_id, activity.model_dump())
 
 @router.get("/{story_id}/activity")
-async def get_story_activity_log(story_id: str):
-    return await get_activity_log_logic(story_id)
+async def get_story_activity_log(
+    story_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+    newest_first: bool = Query(False, description="Return the latest entries first"),
+):
+    return await get_activity_log_logic(story_id, limit, page_token, newest_first)
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from bench.run import configure_environment
+
+# Before any test module imports the app, so nothing reaches live Firestore
+configure_environment()
+
+
+@pytest.fixture
+def sqlite_db():
+    """A fresh in-memory SQLite backend behind ``firestore_client.db``, as the benchmark uses."""
+    from firestore.firestore_client import client_factory, db
+
+    client_factory._client = None
+    yield db
+    client_factory._client = None
+
+
+class StubRuntime:
+    """Streams a canned answer in small pieces, like an ``AgentRuntime`` in SSE mode."""
+
+    def __init__(self, answer: dict, chunk_size: int = 7):
+        self.text = json.dumps(answer)
+        self.chunk_size = chunk_size
+        self.runs = 0
+
+    async def stream(self, text, bypass_cache=False, refresh_cache=False):
+        self.runs += 1
+        for i in range(0, len(self.text), self.chunk_size):
+            yield self.text[i:i + self.chunk_size]
+
+
+@pytest.fixture
+def stub_runtime():
+    """Builds a ``StubRuntime`` answering with the given document."""
+    return StubRuntime
@@ -0,0 +1,42 @@
+import asyncio
+
+from firestore import task
+from firestore.activity_writer import ActivityWriter
+from firestore.firestore_client import db
+from firestore.instrumentation import track_storage
+
+
+def test_write_behind_batches_round_trips_but_not_billed_writes(sqlite_db):
+    writer = ActivityWriter(enabled=True, flush_size=1000, flush_interval_seconds=60)
+
+    async def scenario():
+        task_ids = [await task.create_task({"title": f"Task {i}"}) for i in range(2)]
+        writer.start()
+        with track_storage() as stats:
+            for i in range(40):
+                activity_ref = db.collection("tasks").document(task_ids[i % 2]).collection("activity")
+                await writer.add(activity_ref, {"action": f"edit {i}", "timestamp": i})
+            queued_rpcs = stats.rpcs
+            await writer.stop()
+        logs = [(await task.get_activity_log(task_id, limit=None))[0] for task_id in task_ids]
+        return queued_rpcs, stats, logs
+
+    queued_rpcs, stats, logs = asyncio.run(scenario())
+    assert queued_rpcs == 0
+    assert (stats.rpcs, stats.writes) == (1, 40)
+    assert [len(log) for log in logs] == [20, 20]
+    assert writer.stats()["written"] == 40
+
+
+def test_entries_are_written_directly_until_the_writer_starts(sqlite_db):
+    writer = ActivityWriter(enabled=True)
+
+    async def scenario():
+        task_id = await task.create_task({"title": "Task"})
+        with track_storage() as stats:
+            entry_id = await writer.add(db.collection("tasks").document(task_id).collection("activity"), {"timestamp": 0})
+        return stats.rpcs, entry_id, (await task.get_activity_log(task_id))[0]
+
+    rpcs, entry_id, log = asyncio.run(scenario())
+    assert rpcs == 1
+    assert [entry["id"] for entry in log] == [entry_id]
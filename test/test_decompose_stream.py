@@ -0,0 +1,69 @@
+import asyncio
+
+from controllers import epic_controller, story_controller
+from firestore import epic, relationships, story
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+def test_epic_stream_sends_each_story_and_all_of_them_when_done(sqlite_db, monkeypatch, stub_runtime):
+    answer = {"stories": [{"title": f"Story {i}", "description": f"Do {i}"} for i in range(3)]}
+    monkeypatch.setattr(epic_controller, "runtime", stub_runtime(answer))
+
+    events = asyncio.run(_collect(epic_controller.stream_decompose_epic_logic({"title": "Epic", "description": "x"})))
+
+    assert [event["event"] for event in events] == ["epic", "story", "story", "story", "done"]
+    epic_id = events[0]["data"]["epic_id"]
+    stories = [event["data"] for event in events[1:-1]]
+    assert [s["title"] for s in stories] == ["Story 0", "Story 1", "Story 2"]
+    assert events[-1]["data"] == {"epic_id": epic_id, "stories": stories}
+    linked = asyncio.run(relationships.get_epic_stories(epic_id))
+    assert sorted(s["id"] for s in linked) == sorted(s["id"] for s in stories)
+
+
+def test_story_stream_sends_each_task_and_all_of_them_when_done(sqlite_db, monkeypatch, stub_runtime):
+    answer = {"tasks": [{"title": f"Task {i}", "estimate_hours": i} for i in range(2)]}
+    monkeypatch.setattr(story_controller, "runtime", stub_runtime(answer))
+    story_id = asyncio.run(story.create_story({"title": "Story", "description": "x"}))
+
+    events = asyncio.run(_collect(story_controller.stream_decompose_user_story_logic("{}", story_id=story_id)))
+
+    assert [event["event"] for event in events] == ["task", "task", "done"]
+    tasks = [event["data"] for event in events[:-1]]
+    assert all(t["story_id"] == story_id and t["id"] for t in tasks)
+    assert events[-1]["data"] == {"story_id": story_id, "tasks": tasks}
+
+
+def test_story_stream_without_a_story_sends_the_parsed_tasks(sqlite_db, monkeypatch, stub_runtime):
+    answer = {"tasks": [{"title": "Only task"}]}
+    monkeypatch.setattr(story_controller, "runtime", stub_runtime(answer))
+
+    events = asyncio.run(_collect(story_controller.stream_decompose_user_story_logic("{}")))
+
+    assert events == [
+        {"event": "task", "data": {"title": "Only task"}},
+        {"event": "done", "data": {"story_id": None, "tasks": [{"title": "Only task"}]}},
+    ]
+
+
+def test_epic_stream_without_stories_leaves_no_epic_behind(sqlite_db, monkeypatch, stub_runtime):
+    monkeypatch.setattr(epic_controller, "runtime", stub_runtime({"stories": []}))
+
+    events = asyncio.run(_collect(epic_controller.stream_decompose_epic_logic({"title": "Epic", "description": "x"})))
+
+    assert [event["event"] for event in events] == ["epic", "error"]
+    assert asyncio.run(epic.get_epic(events[0]["data"]["epic_id"])) is None
+
+
+def test_epic_stream_ignores_brackets_in_prose_before_the_answer(sqlite_db, monkeypatch, stub_runtime):
+    runtime = stub_runtime({"stories": [{"title": "Story 0"}, {"title": "Story 1"}]})
+    runtime.text = "Here are the stories [2 of them]:\n```json\n" + runtime.text + "\n```"
+    monkeypatch.setattr(epic_controller, "runtime", runtime)
+
+    events = asyncio.run(_collect(epic_controller.stream_decompose_epic_logic({"title": "Epic", "description": "x"})))
+
+    assert [event["event"] for event in events] == ["epic", "story", "story", "done"]
+    epic_id = events[0]["data"]["epic_id"]
+    assert asyncio.run(epic.get_epic(epic_id))["stories"] == [event["data"]["id"] for event in events[1:3]]
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from firestore import dependency_graph as dependency_graph_module, relationships, task
+from firestore.dependency_graph import DependencyGraph, dependency_graph
+from firestore.instrumentation import track_storage
+
+
+@pytest.fixture
+def graph_db(sqlite_db):
+    # The shared index may still hold another test's graph
+    dependency_graph.invalidate()
+    yield sqlite_db
+    dependency_graph.invalidate()
+
+
+async def _chain() -> list:
+    """Three tasks where each depends on the next one."""
+    ids = [await task.create_task({"title": f"Task {i}", "status": "todo"}) for i in range(3)]
+    await relationships.add_task_dependency(ids[0], ids[1])
+    await relationships.add_task_dependency(ids[1], ids[2])
+    return ids
+
+
+def test_deleting_a_task_drops_its_edges(graph_db):
+    async def scenario():
+        first, middle, last = await _chain()
+        await task.delete_task(middle)
+        # Without the middle task the chain is broken, so this is no longer a cycle
+        await relationships.add_task_dependency(last, first)
+        return (
+            await relationships.get_dependent_tasks(last),
+            await relationships.get_task_dependencies(first),
+            (await task.get_task(first))["dependencies"],
+        )
+
+    dependents_of_last, dependencies_of_first, stored = asyncio.run(scenario())
+    assert dependents_of_last == []
+    assert dependencies_of_first == []
+    assert stored == []
+
+
+def test_deleting_a_task_refreshes_other_workers_indexes(graph_db):
+    other_worker = DependencyGraph()
+
+    async def scenario():
+        first, middle, last = await _chain()
+        await other_worker.ensure_fresh()
+        before = other_worker.dependents(last)
+        await task.delete_task(middle)
+        await other_worker.ensure_fresh()
+        return before, other_worker.dependents(last), other_worker.reaches(first, last), middle
+
+    before, after, reaches, middle = asyncio.run(scenario())
+    assert before == [middle]
+    assert after == []
+    assert not reaches
+
+
+def test_other_workers_reread_only_the_tasks_that_changed(graph_db):
+    other_worker = DependencyGraph()
+
+    async def scenario():
+        ids = [await task.create_task({"title": f"Task {i}", "status": "todo"}) for i in range(20)]
+        await relationships.add_task_dependency(ids[0], ids[1])
+        await other_worker.ensure_fresh()
+        await relationships.add_task_dependency(ids[2], ids[3])
+        await relationships.remove_task_dependency(ids[0], ids[1])
+        with track_storage() as stats:
+            await other_worker.ensure_fresh()
+        return ids, stats, other_worker.dependencies(ids[0]), other_worker.dependents(ids[3])
+
+    ids, stats, first_dependencies, dependents = asyncio.run(scenario())
+    # The meta document, then tasks 0 and 2 in one multi-get
+    assert (stats.rpcs, stats.reads) == (2, 3)
+    assert first_dependencies == []
+    assert dependents == [ids[2]]
+
+
+def test_a_worker_behind_the_change_log_reloads_everything(graph_db, monkeypatch):
+    monkeypatch.setattr(dependency_graph_module, "CHANGE_LOG_SIZE", 1)
+    other_worker = DependencyGraph()
+
+    async def scenario():
+        ids = [await task.create_task({"title": f"Task {i}", "status": "todo"}) for i in range(4)]
+        await relationships.add_task_dependency(ids[0], ids[1])
+        await other_worker.ensure_fresh()
+        await relationships.add_task_dependency(ids[1], ids[2])
+        await relationships.add_task_dependency(ids[2], ids[3])
+        with track_storage() as stats:
+            await other_worker.ensure_fresh()
+        return ids, stats, other_worker.reaches(ids[0], ids[3])
+
+    ids, stats, reaches = asyncio.run(scenario())
+    # The meta document, then every task
+    assert (stats.rpcs, stats.reads) == (2, 1 + len(ids))
+    assert reaches
@@ -0,0 +1,68 @@
+import time
+
+from firestore.cache import EntityCache
+
+
+def test_entries_expire_after_the_ttl():
+    cache = EntityCache(ttl_seconds=0.05)
+    cache.set("tasks", "t1", {"title": "x"}, cache.generation())
+
+    fresh = cache.get("tasks", "t1")
+    time.sleep(0.06)
+
+    assert fresh == {"title": "x"}
+    assert cache.get("tasks", "t1") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_the_least_recently_used_entry_is_evicted():
+    cache = EntityCache(max_size=2)
+    for doc_id in ("a", "b"):
+        cache.set("tasks", doc_id, {"id": doc_id}, cache.generation())
+    cache.get("tasks", "a")
+    cache.set("tasks", "c", {"id": "c"}, cache.generation())
+
+    assert [cache.get("tasks", doc_id) for doc_id in ("a", "b", "c")] == [{"id": "a"}, None, {"id": "c"}]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_callers_get_copies():
+    cache = EntityCache()
+    value = {"tags": ["a"]}
+    cache.set("tasks", "t1", value, cache.generation())
+    value["tags"].append("b")
+    cache.get("tasks", "t1")["tags"].append("c")
+
+    assert cache.get("tasks", "t1") == {"tags": ["a"]}
+
+
+def test_a_read_that_started_before_an_invalidation_is_not_cached():
+    cache = EntityCache()
+    generation = cache.generation()
+    # A write lands while the read is in flight
+    cache.invalidate("tasks", "t1")
+    cache.set("tasks", "t1", {"status": "stale"}, generation)
+    cache.set("tasks", "t2", {"status": "unrelated"}, generation)
+
+    assert cache.get("tasks", "t1") is None
+    assert cache.get("tasks", "t2") == {"status": "unrelated"}
+    assert cache.stats()["stale_sets"] == 1
+
+    cache.set("tasks", "t1", {"status": "fresh"}, cache.generation())
+    assert cache.get("tasks", "t1") == {"status": "fresh"}
+
+
+def test_reads_older_than_forgotten_invalidations_are_not_cached():
+    cache = EntityCache(max_size=1)
+    generation = cache.generation()
+    cache.invalidate("tasks", "t1")
+    # Only the latest invalidation is remembered per key now
+    cache.invalidate("tasks", "t2")
+    cache.set("tasks", "t1", {"status": "stale"}, generation)
+
+    assert cache.get("tasks", "t1") is None
+
+    cache.clear()
+    cache.set("tasks", "t3", {"status": "stale"}, generation)
+    cache.set("tasks", "t3", {"status": "fresh"}, cache.generation())
+    assert cache.get("tasks", "t3") == {"status": "fresh"}
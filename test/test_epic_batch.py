@@ -0,0 +1,27 @@
+import asyncio
+import json
+
+from controllers import epic_controller
+from firestore import epic
+
+# Stories that, with their epic, need one write more than a commit holds
+OVERSIZED = 500
+
+
+def test_an_epic_too_large_for_one_commit_fails_alone(sqlite_db, monkeypatch):
+    async def run_agent(payload, bypass_cache, refresh_cache):
+        count = OVERSIZED if json.loads(payload)["title"] == "Huge" else 2
+        return json.dumps({"stories": [{"title": f"Story {i}"} for i in range(count)]})
+
+    monkeypatch.setattr(epic_controller, "_run_with_backoff", run_agent)
+
+    async def scenario():
+        response = await epic_controller.decompose_epics_batch_logic([{"title": "Small"}, {"title": "Huge"}])
+        return response, (await epic.list_epics())[0]
+
+    response, epics = asyncio.run(scenario())
+    small, huge = response["results"]
+    assert (response["succeeded"], response["failed"]) == (1, 1)
+    assert len(small["stories"]) == 2
+    assert "501 writes" in huge["error"]
+    assert [e["title"] for e in epics] == ["Small"]
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from firestore import epic, relationships, sprint, story, task
+from firestore.instrumentation import track_storage
+
+# (stories per epic, tasks per story); both stay below one multi-get chunk per level
+SMALL = (2, 2)
+LARGE = (12, 15)
+
+
+async def _seed(stories_per_epic: int, tasks_per_story: int) -> dict:
+    sprint_id = await sprint.create_sprint({"name": "Sprint", "status": "active"})
+    epic_id = epic.new_epic_id()
+    written = await relationships.bulk_create_epics_with_stories({
+        epic_id: (
+            {"title": "Epic", "status": "todo"},
+            [{"title": f"Story {i}", "status": "todo", "sprint_id": sprint_id} for i in range(stories_per_epic)],
+        ),
+    })
+    story_ids = [s["id"] for s in written[epic_id]["stories"]]
+    task_ids = []
+    for story_id in story_ids:
+        for i in range(tasks_per_story):
+            task_data = {"title": f"Task {i}", "status": "todo", "sprint_id": sprint_id}
+            task_id = await task.create_task(task_data)
+            await relationships.link_task_to_story(task_id, story_id, task=task_data)
+            task_ids.append(task_id)
+    for depends_on in task_ids[1:]:
+        await relationships.add_task_dependency(task_ids[0], depends_on)
+    return {"epic_id": epic_id, "sprint_id": sprint_id, "story_id": story_ids[0], "task_id": task_ids[0]}
+
+
+# Reads whose round trips must not depend on how many children there are
+VIEWS = {
+    "epic tree": lambda fx: relationships.get_epic_tree(fx["epic_id"]),
+    "epic stories": lambda fx: relationships.get_epic_stories(fx["epic_id"]),
+    "story tasks": lambda fx: relationships.get_story_tasks(fx["story_id"]),
+    "task dependencies": lambda fx: relationships.get_task_dependencies(fx["task_id"]),
+    "epics with story titles": lambda fx: epic.list_epics(),
+    "sprint with rollup": lambda fx: sprint.get_sprint(fx["sprint_id"]),
+    "sprint stories": lambda fx: story.list_stories({"sprint_id": fx["sprint_id"]}),
+    "sprint tasks": lambda fx: task.list_tasks({"sprint_id": fx["sprint_id"]}),
+}
+
+
+async def _measure(shape, view) -> tuple:
+    fx = await _seed(*shape)
+    with track_storage() as stats:
+        result = await view(fx)
+    return stats.rpcs, result
+
+
+@pytest.mark.parametrize("name", VIEWS)
+def test_round_trips_stay_constant_as_fan_out_grows(sqlite_db, name):
+    from firestore.firestore_client import client_factory
+
+    small_rpcs, _ = asyncio.run(_measure(SMALL, VIEWS[name]))
+    client_factory._client = None
+    large_rpcs, large = asyncio.run(_measure(LARGE, VIEWS[name]))
+
+    assert large is not None
+    assert small_rpcs == large_rpcs, f"{name}: {small_rpcs} RPCs at {SMALL}, {large_rpcs} at {LARGE}"
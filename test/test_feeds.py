@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from firestore import task
+from firestore.feeds import recent_activity
+from firestore.firestore_client import db
+from firestore.pagination import encode_page_token
+
+
+async def _seed() -> set:
+    """Comments and activity on three tasks, many of them sharing a timestamp."""
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    seeded = set()
+    for t in range(3):
+        task_ref = db.collection("tasks").document(await task.create_task({"title": f"Task {t}"}))
+        for i in range(4):
+            at = start + timedelta(minutes=i // 2)
+            _, comment = await task_ref.collection("comments").add({"text": f"{t}.{i}", "created_at": at})
+            _, activity = await task_ref.collection("activity").add({"action": f"{t}.{i}", "timestamp": at})
+            seeded |= {("comments", comment.id), ("activity", activity.id)}
+    return seeded
+
+
+def test_recent_activity_pages_cover_both_kinds_exactly_once(sqlite_db):
+    async def scenario():
+        seeded = await _seed()
+        pages, page_token = [], None
+        while True:
+            items, page_token = await recent_activity(limit=5, page_token=page_token)
+            pages.append(items)
+            if page_token is None:
+                return seeded, pages
+
+    seeded, pages = asyncio.run(scenario())
+    seen = [(item["kind"], item["id"]) for page in pages for item in page]
+    assert len(seen) == len(set(seen))
+    assert set(seen) == seeded
+    times = [item["at"] for page in pages for item in page]
+    assert times == sorted(times, reverse=True)
+
+
+def test_recent_activity_rejects_a_single_cursor_token(sqlite_db):
+    page_token = encode_page_token(["2026-01-01T00:00:00+00:00", "tasks/x/activity/y"])
+
+    with pytest.raises(ValueError, match="Invalid page_token"):
+        asyncio.run(recent_activity(page_token=page_token))
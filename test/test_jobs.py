@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from controllers import job_controller
+from controllers.job_controller import JobQueue
+from firestore import jobs
+
+
+async def _claim(kind: str, worker: str, lease_seconds: float) -> jobs.Lease:
+    [(job, update_time)] = await jobs.claimable_jobs(kind, 1)
+    return await jobs.claim_job(job["id"], update_time, worker, lease_seconds)
+
+
+def test_a_worker_whose_lease_was_taken_over_cannot_renew_or_finish(sqlite_db):
+    async def scenario():
+        job_id = await jobs.create_job("epic_decompose", {"title": "Epic"})
+        first = await _claim("epic_decompose", "worker-a", lease_seconds=0)
+        # The first lease has already expired, so another worker may reclaim the job
+        second = await _claim("epic_decompose", "worker-b", lease_seconds=60)
+        assert first.claim != second.claim
+
+        with pytest.raises(jobs.LeaseLost):
+            await jobs.renew_lease(first, 60)
+        with pytest.raises(jobs.LeaseLost):
+            await jobs.finish_job(first, result="from worker-a")
+        await jobs.renew_lease(second, 60)
+        await jobs.finish_job(second, result="from worker-b")
+        return await jobs.get_job(job_id)
+
+    job = asyncio.run(scenario())
+    assert job["status"] == jobs.SUCCEEDED
+    assert job["result"] == "from worker-b"
+    assert job["worker"] == "worker-b"
+    assert job["attempts"] == 2
+
+
+def test_a_claimed_job_cannot_be_claimed_twice(sqlite_db):
+    async def scenario():
+        await jobs.create_job("sprint_plan", {})
+        [(job, update_time)] = await jobs.claimable_jobs("sprint_plan", 1)
+        first = await jobs.claim_job(job["id"], update_time, "worker-a", 60)
+        second = await jobs.claim_job(job["id"], update_time, "worker-b", 60)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is not None
+    assert second is None
+
+
+def test_the_queue_abandons_a_run_whose_lease_it_lost(sqlite_db, monkeypatch):
+    async def slow(lease, payload, options):
+        await asyncio.sleep(5)
+        return "too late"
+
+    monkeypatch.setitem(job_controller.JOB_HANDLERS, "sprint_plan", slow)
+    queue = JobQueue(concurrency={"sprint_plan": 1}, poll_interval_seconds=0.05, lease_seconds=0.3)
+
+    async def scenario():
+        job_id = await queue.enqueue("sprint_plan", {})
+        queue.start()
+        while not queue._active:
+            await asyncio.sleep(0.01)
+        # Another worker takes the job over, e.g. after this one stalled past its lease
+        await sqlite_db.collection(jobs.COLLECTION).document(job_id).update({"worker": "worker-b", "claim": "other"})
+        while queue._active:
+            await asyncio.sleep(0.05)
+        await queue.stop()
+        return await jobs.get_job(job_id)
+
+    job = asyncio.run(scenario())
+    assert queue.lost == 1
+    assert queue.succeeded == queue.released == 0
+    assert job["status"] == jobs.RUNNING
+    assert job["worker"] == "worker-b"
+    assert "result" not in job
+
+
+def test_workers_are_off_unless_enabled(monkeypatch):
+    monkeypatch.delenv("JOB_WORKERS_ENABLED", raising=False)
+    assert not JobQueue.from_env().enabled
+    monkeypatch.setenv("JOB_WORKERS_ENABLED", "1")
+    assert JobQueue.from_env().enabled
+
+
+def test_an_idle_queue_backs_off_and_an_enqueue_wakes_it(sqlite_db, monkeypatch):
+    polls = []
+    claimable_jobs = jobs.claimable_jobs
+
+    async def counted(kind, limit):
+        polls.append(asyncio.get_running_loop().time())
+        return await claimable_jobs(kind, limit)
+
+    monkeypatch.setattr(jobs, "claimable_jobs", counted)
+    monkeypatch.setitem(job_controller.JOB_HANDLERS, "sprint_plan", lambda lease, payload, options: asyncio.sleep(0))
+    queue = JobQueue(
+        concurrency={"sprint_plan": 1}, poll_interval_seconds=0.01, max_poll_interval_seconds=0.08, lease_seconds=60
+    )
+
+    async def scenario():
+        queue.start()
+        await asyncio.sleep(0.6)
+        idle_polls = len(polls)
+        await queue.enqueue("sprint_plan", {})
+        await asyncio.sleep(0.05)
+        await queue.stop()
+        return idle_polls
+
+    idle_polls = asyncio.run(scenario())
+    # 0.01 + 0.02 + 0.04 + 0.08 + 0.08 ... rather than one poll every 0.01s
+    assert idle_polls <= 12
+    assert queue.succeeded == 1
+
+
+def test_an_epic_job_run_again_reuses_the_epic_of_the_first_run(sqlite_db, monkeypatch, stub_runtime):
+    from controllers import epic_controller
+    from firestore import epic
+
+    runtime = stub_runtime({"stories": [{"title": f"Story {i}"} for i in range(3)]})
+    monkeypatch.setattr(epic_controller, "runtime", runtime)
+    handler = job_controller.JOB_HANDLERS["epic_decompose"]
+    payload = {"title": "Epic", "description": "x"}
+
+    async def scenario():
+        job_id = await jobs.create_job("epic_decompose", payload)
+        # The first worker writes the epic, then dies before recording the outcome
+        first = await handler(await _claim("epic_decompose", "worker-a", lease_seconds=0), payload, {})
+        progress = (await jobs.get_job(job_id))["progress"]
+        second = await handler(await _claim("epic_decompose", "worker-b", lease_seconds=60), payload, {})
+        epics, _ = await epic.list_epics(limit=None)
+        return job_id, first, second, progress, epics
+
+    job_id, first, second, progress, epics = asyncio.run(scenario())
+    assert first["epic_id"] == second["epic_id"] == job_id
+    assert [s["id"] for s in second["stories"]] == [s["id"] for s in first["stories"]]
+    assert [e["id"] for e in epics] == [job_id]
+    assert len(epics[0]["stories"]) == 3
+    assert progress == {"stories_decomposed": 3}
+    assert runtime.runs == 1
@@ -0,0 +1,50 @@
+import asyncio
+import sqlite3
+import time
+
+from agents.result_cache import ResultCache
+
+
+def test_a_stored_response_is_served_until_it_expires(tmp_path):
+    cache = ResultCache(str(tmp_path / "agent_cache.db"), ttl_seconds=0.2)
+
+    async def scenario():
+        await cache.put("key", "agent", "answer")
+        fresh = await cache.get("key")
+        await asyncio.sleep(0.25)
+        return fresh, await cache.get("key")
+
+    assert asyncio.run(scenario()) == ("answer", None)
+    assert cache.stats() == {
+        "enabled": True, "entries": 1, "hits": 1, "misses": 1, "stores": 1, "evictions": 0,
+    }
+
+
+def test_a_locked_cache_file_does_not_block_the_event_loop(tmp_path):
+    path = str(tmp_path / "agent_cache.db")
+    cache = ResultCache(path)
+    asyncio.run(cache.put("key", "agent", "answer"))
+    # Another worker holds the write lock for a while
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.ensure_future(ticker())
+        lookup = asyncio.ensure_future(cache.get("key"))
+        await asyncio.sleep(0.3)
+        other.execute("ROLLBACK")
+        answer = await lookup
+        ticking.cancel()
+        return answer, ticks
+
+    answer, ticks = asyncio.run(scenario())
+    other.close()
+    assert answer == "answer"
+    assert len(ticks) >= 10
@@ -0,0 +1,31 @@
+import asyncio
+
+from firestore import epic, relationships, story
+from firestore.instrumentation import track_storage
+
+
+def _link(story_data, pass_data: bool):
+    async def scenario():
+        epic_id = await epic.create_epic({"title": "Epic"})
+        story_id = await story.create_story(story_data)
+        with track_storage() as stats:
+            await relationships.link_story_to_epic(story_id, epic_id, story=story_data if pass_data else None)
+        return stats.rpcs, await epic.get_epic(epic_id)
+
+    return asyncio.run(scenario())
+
+
+def test_linking_a_story_the_caller_holds_takes_one_commit(sqlite_db):
+    rpcs, linked_epic = _link({"title": "Story", "status": "done", "story_points": 3}, pass_data=True)
+
+    assert rpcs == 1
+    assert linked_epic["rollup"] == {
+        "story_count": 1, "stories_by_status": {"done": 1}, "story_points": 3, "completed_story_points": 3,
+    }
+
+
+def test_linking_by_id_alone_reads_the_story_first(sqlite_db):
+    rpcs, linked_epic = _link({"title": "Story", "status": "todo", "story_points": 2}, pass_data=False)
+
+    assert rpcs == 2
+    assert linked_epic["rollup"] == {"story_count": 1, "stories_by_status": {"todo": 1}, "story_points": 2}
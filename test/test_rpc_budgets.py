@@ -0,0 +1,10 @@
+import asyncio
+
+from bench.run import check_budgets, load_budgets, run_benchmark
+
+
+def test_every_route_stays_within_its_rpc_budget():
+    # Offline: in-memory storage backend and a stubbed LLM, see bench/run.py
+    report = asyncio.run(run_benchmark(iterations=3, warmup=1))
+    violations = check_budgets(report, load_budgets())
+    assert not violations, "\n".join(violations)
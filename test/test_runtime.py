@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from agents import runtime as agent_runtime, single_flight
+from agents.epic_decomposer import root_agent as epic_agent
+from agents.result_cache import ResultCache
+from agents.runtime import USER_ID, AgentRuntime
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    """Keep the runtimes built here out of the app's /health and /metrics."""
+    monkeypatch.setattr(single_flight, "groups", {})
+    monkeypatch.setattr(agent_runtime, "runtimes", {})
+
+
+def _runtime(monkeypatch, **options) -> AgentRuntime:
+    runtime = AgentRuntime(epic_agent, "runtime test", cache=ResultCache(ttl_seconds=0), **options)
+    runtime.sessions_lost = 0
+
+    async def run_async(user_id, session_id, new_message, run_config=None):
+        await asyncio.sleep(0.05)
+        # The run's session must still be there when it finishes
+        session = runtime.session_service.get_session(app_name=runtime.app_name, user_id=USER_ID, session_id=session_id)
+        if session is None:
+            runtime.sessions_lost += 1
+        return
+        yield
+
+    monkeypatch.setattr(runtime.runner, "run_async", run_async)
+    return runtime
+
+
+def test_runs_beyond_max_sessions_wait_instead_of_evicting_live_ones(monkeypatch):
+    runtime = _runtime(monkeypatch, max_sessions=2)
+
+    async def scenario():
+        await asyncio.gather(*(runtime.run(f"message {i}", bypass_cache=True) for i in range(5)))
+
+    asyncio.run(scenario())
+    stats = runtime.stats()
+    assert runtime.sessions_lost == 0
+    assert (stats["runs"], stats["sessions_deleted"], stats["sessions_evicted"]) == (5, 5, 0)
+    assert stats["peak_sessions"] == 2
+    assert stats["runs_waited"] == 3
+    assert stats["live_sessions"] == 0
+
+
+def test_sessions_older_than_the_ttl_are_evicted(monkeypatch):
+    runtime = _runtime(monkeypatch, session_ttl_seconds=0.01)
+    # A session its run never deleted
+    abandoned = runtime._open_session()
+
+    async def scenario():
+        await asyncio.sleep(0.02)
+        await runtime.run("message", bypass_cache=True)
+
+    asyncio.run(scenario())
+    assert abandoned not in runtime._open
+    assert runtime.stats()["sessions_evicted"] == 1
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from agents import runtime as agent_runtime, single_flight
+from agents.epic_decomposer import root_agent as epic_agent
+from agents.result_cache import ResultCache
+from agents.runtime import AgentRuntime
+from agents.single_flight import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    """Keep the groups and runtimes built here out of the app's /health and /metrics."""
+    monkeypatch.setattr(single_flight, "groups", {})
+    monkeypatch.setattr(agent_runtime, "runtimes", {})
+
+
+def test_concurrent_calls_with_one_key_share_a_run():
+    flights = SingleFlight("test_share")
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("key", call) for _ in range(4)))
+
+    assert asyncio.run(scenario()) == ["answer"] * 4
+    assert len(calls) == 1
+    assert (flights.leaders, flights.coalesced) == (1, 3)
+
+
+def test_a_leader_failure_reaches_every_waiter_and_releases_the_key():
+    flights = SingleFlight("test_failure")
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("model unavailable")
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.do("key", failing) for _ in range(3)), return_exceptions=True)
+        in_flight = flights.stats()["in_flight"]
+        # The next call starts a run of its own instead of getting the old failure
+        retried = await flights.do("key", lambda: asyncio.sleep(0, result="recovered"))
+        return results, in_flight, retried
+
+    results, in_flight, retried = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) and str(result) == "model unavailable" for result in results)
+    assert len(calls) == 1
+    assert in_flight == 0
+    assert retried == "recovered"
+    assert flights.leaders == 2
+
+
+def test_a_waiter_that_goes_away_does_not_cancel_the_run():
+    flights = SingleFlight("test_cancel")
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        impatient = asyncio.ensure_future(flights.do("key", call))
+        patient = asyncio.ensure_future(flights.do("key", call))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(scenario()) == "answer"
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    runtime = AgentRuntime(epic_agent, "single flight test", cache=ResultCache(ttl_seconds=0))
+    runs = []
+
+    async def run_agent(text):
+        runs.append(text)
+        run = len(runs)
+        await asyncio.sleep(0.05)
+        return f"answer {run}"
+
+    monkeypatch.setattr(runtime, "_run_agent", run_agent)
+    runtime.agent_runs = runs
+    return runtime
+
+
+def test_identical_runs_with_the_same_cache_flags_are_coalesced(runtime):
+    async def scenario():
+        return await asyncio.gather(runtime.run("same"), runtime.run("same"))
+
+    assert asyncio.run(scenario()) == ["answer 1", "answer 1"]
+    assert len(runtime.agent_runs) == 1
+
+
+@pytest.mark.parametrize("flags", [{"refresh_cache": True}, {"bypass_cache": True}])
+def test_a_run_skipping_the_cache_does_not_join_a_normal_run(runtime, flags):
+    async def scenario():
+        return await asyncio.gather(runtime.run("same"), runtime.run("same", **flags))
+
+    normal, fresh = asyncio.run(scenario())
+    assert len(runtime.agent_runs) == 2
+    assert normal != fresh
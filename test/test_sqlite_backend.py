@@ -0,0 +1,174 @@
+import asyncio
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import pytest
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+from google.cloud import firestore
+
+from firestore import sqlite_backend
+from firestore.sqlite_backend import DOCUMENT_ID, SQLiteClient
+
+
+@pytest.fixture
+def client():
+    client = SQLiteClient()
+    yield client
+    client.close()
+
+
+def test_transforms_resolve_against_the_stored_value(client):
+    ref = client.collection("epics").document("e1")
+
+    async def scenario():
+        await ref.set({"count": 1, "tags": ["a"], "rollup": {"points": 2, "done": 1}, "gone": True})
+        result = await ref.update({
+            "count": firestore.Increment(2),
+            "tags": firestore.ArrayUnion(["a", "b"]),
+            "rollup.points": firestore.Increment(-2),
+            "rollup.done": firestore.DELETE_FIELD,
+            "gone": firestore.DELETE_FIELD,
+            "touched": firestore.SERVER_TIMESTAMP,
+        })
+        await ref.update({"tags": firestore.ArrayRemove(["a"]), "missing": firestore.Increment(5)})
+        return result, (await ref.get()).to_dict()
+
+    result, data = asyncio.run(scenario())
+    assert data == {
+        "count": 3, "tags": ["b"], "rollup": {"points": 0}, "touched": result.update_time, "missing": 5,
+    }
+
+
+def test_write_preconditions(client):
+    ref = client.collection("jobs").document("j1")
+
+    async def scenario():
+        first = await ref.create({"state": "queued"})
+        with pytest.raises(AlreadyExists):
+            await ref.create({"state": "queued"})
+        second = await ref.update({"state": "running"}, option=client.write_option(last_update_time=first.update_time))
+        # A writer still holding the first update time lost the race
+        with pytest.raises(FailedPrecondition):
+            await ref.update({"state": "done"}, option=client.write_option(last_update_time=first.update_time))
+        with pytest.raises(NotFound):
+            await client.collection("jobs").document("missing").update({"state": "done"})
+        with pytest.raises(FailedPrecondition):
+            await ref.delete(option=client.write_option(exists=False))
+        return first, second, (await ref.get()).to_dict()
+
+    first, second, data = asyncio.run(scenario())
+    assert second.update_time > first.update_time
+    assert data == {"state": "running"}
+
+
+def test_a_failed_write_rolls_back_its_whole_batch(client):
+    async def scenario():
+        await client.collection("stories").document("s1").create({"title": "kept"})
+        batch = client.batch()
+        batch.create(client.collection("stories").document("s2"), {"title": "new"})
+        batch.create(client.collection("stories").document("s1"), {"title": "clash"})
+        with pytest.raises(AlreadyExists):
+            await batch.commit()
+        return [snapshot.to_dict() async for snapshot in client.collection("stories").stream()]
+
+    assert asyncio.run(scenario()) == [{"title": "kept"}]
+
+
+def test_cursors_resume_after_ties_in_both_directions(client):
+    feed = client.collection("tasks").document("t1").collection("activity")
+
+    async def read_pages(direction):
+        pages, cursor = [], None
+        while True:
+            query = feed.order_by("at", direction=direction).order_by(DOCUMENT_ID, direction=direction)
+            if cursor:
+                query = query.start_after(cursor)
+            page = [snapshot async for snapshot in query.limit(2).stream()]
+            if not page:
+                return pages
+            pages.append([snapshot.id for snapshot in page])
+            cursor = {"at": page[-1].get("at"), DOCUMENT_ID: page[-1].id}
+
+    async def scenario():
+        for doc_id, at in (("b", 1), ("a", 1), ("d", 2), ("c", 2), ("e", 3)):
+            await feed.document(doc_id).set({"at": at})
+        return await read_pages(firestore.Query.ASCENDING), await read_pages(firestore.Query.DESCENDING)
+
+    ascending, descending = asyncio.run(scenario())
+    assert ascending == [["a", "b"], ["c", "d"], ["e"]]
+    assert descending == [["e", "d"], ["c", "b"], ["a"]]
+
+
+def test_collection_group_cursors_use_the_full_path(client):
+    async def scenario():
+        for task_id in ("t2", "t1"):
+            await client.collection("tasks").document(task_id).collection("comments").document("c").set({"at": 1})
+        query = client.collection_group("comments").order_by("at").order_by(DOCUMENT_ID)
+        first = [snapshot async for snapshot in query.limit(1).stream()]
+        rest = [
+            snapshot.reference.path
+            async for snapshot in query.start_after({"at": 1, DOCUMENT_ID: first[0].reference}).stream()
+        ]
+        return first[0].reference.path, rest
+
+    assert asyncio.run(scenario()) == ("tasks/t1/comments/c", ["tasks/t2/comments/c"])
+
+
+def test_a_write_waiting_on_another_process_does_not_block_the_event_loop(tmp_path):
+    path = str(tmp_path / "storage.db")
+    client = SQLiteClient(path)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.ensure_future(ticker())
+        write = asyncio.ensure_future(client.collection("tasks").document("t1").set({"title": "x"}))
+        await asyncio.sleep(0.3)
+        other.execute("ROLLBACK")
+        await write
+        ticking.cancel()
+        return ticks, (await client.collection("tasks").document("t1").get()).to_dict()
+
+    try:
+        ticks, data = asyncio.run(scenario())
+    finally:
+        other.close()
+        client.close()
+    assert data == {"title": "x"}
+    assert len(ticks) >= 10
+
+
+def test_update_times_increase_across_processes_sharing_the_file(tmp_path, monkeypatch):
+    class StoppedClock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    # Two workers whose clocks read the same time
+    monkeypatch.setattr(sqlite_backend, "datetime", StoppedClock)
+    path = str(tmp_path / "storage.db")
+    worker, other_worker = SQLiteClient(path), SQLiteClient(path)
+
+    async def scenario():
+        first = await worker.collection("jobs").document("j1").create({"state": "queued"})
+        second = await other_worker.collection("jobs").document("j1").update({"state": "running"})
+        with pytest.raises(FailedPrecondition):
+            await worker.collection("jobs").document("j1").update(
+                {"state": "done"}, option=worker.write_option(last_update_time=first.update_time)
+            )
+        return first, second
+
+    try:
+        first, second = asyncio.run(scenario())
+    finally:
+        worker.close()
+        other_worker.close()
+    assert second.update_time > first.update_time
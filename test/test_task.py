@@ -1,25 +1,33 @@
+import asyncio
 from firestore import task
 
-# Create task
-task_id = task.create_task({
-    "title": "Implement Sprint Planner Agent",
-    "status": "open",
-    "assignee": "saurabh"
-})
 
-# Add comment
-task.add_comment(task_id, {
-    "author": "saurabh",
-    "message": "Started initial testing of the planner."
-})
+async def main():
+    # Create task
+    task_id = await task.create_task({
+        "title": "Implement Sprint Planner Agent",
+        "status": "open",
+        "assignee": "saurabh"
+    })
 
-# Log activity
-task.log_activity(task_id, {
-    "actor": "saurabh",
-    "action": "Task created"
-})
+    # Add comment
+    await task.add_comment(task_id, {
+        "author": "saurabh",
+        "message": "Started initial testing of the planner."
+    })
 
-# Fetch everything
-print("Task:", task.get_task(task_id))
-print("Comments:", task.get_comments(task_id))
-print("Activity:", task.get_activity_log(task_id))
+    # Log activity
+    await task.log_activity(task_id, {
+        "actor": "saurabh",
+        "action": "Task created"
+    })
+
+    # Fetch everything
+    print("Task:", await task.get_task(task_id))
+    print("Comments:", (await task.get_comments(task_id))[0])
+    print("Activity:", (await task.get_activity_log(task_id))[0])
+
+
+# Runs against the Firestore project in .env: PYTHONPATH=. python test/test_task.py
+if __name__ == "__main__":
+    asyncio.run(main())